@@ -14,6 +14,7 @@ from actions import (
     DropItem,
     TakeStairAction,
     EquipAction,
+    melee_noise_radius,
 )
 from entity import Entity, Actor, Item
 from game_map import GameMap, GameWorld
@@ -341,6 +342,47 @@ class Test_Actions_MeleeAction(unittest.TestCase):
         # make sure the target's hp is not decreased from 10
         self.assertEqual(ent.fighter.hp, 10)
 
+    @patch('message_log.MessageLog.add_message')
+    def test_perform_makes_noise(self, mock_add_message):
+        '''
+        test that a Melee Action makes a noise at the target
+        '''
+        pl = Actor(x=0, y=0, ai_cls=HostileEnemy, equipment=Equipment(), fighter=Fighter(
+            hp=10, base_defense=0, base_power=5), inventory=Inventory(capacity=5),
+            level=Level())  # player at 0,0
+        ent = Actor(x=1, y=1, ai_cls=HostileEnemy, equipment=Equipment(), fighter=Fighter(
+            hp=10, base_defense=0, base_power=5), inventory=Inventory(capacity=5),
+            level=Level())  # blocking entity at 1,1
+        eng = Engine(player=pl)
+        gm = GameMap(engine=eng, width=10, height=10)
+        gm.entities = {ent}
+        eng.game_map = gm
+        pl.parent = gm
+
+        with patch('game_map.GameMap.make_noise') as patch_noise:
+            MeleeAction(entity=pl, dx=1, dy=1).perform()
+        patch_noise.assert_called_once_with(1, 1, melee_noise_radius)
+
+    def test_validate(self):
+        '''
+        test that validate returns the reason a Melee Action is impossible,
+        or None if there is something to attack, without raising
+        '''
+        pl = Entity()  # player at 0,0
+        ent = Actor(x=1, y=1, ai_cls=HostileEnemy, equipment=Equipment(), fighter=Fighter(
+            hp=10, base_defense=0, base_power=5), inventory=Inventory(capacity=5),
+            level=Level())  # blocking entity at 1,1
+        eng = Engine(player=pl)
+        gm = GameMap(engine=eng, width=10, height=10)
+        gm.entities = {ent}
+        eng.game_map = gm
+        pl.parent = gm
+
+        self.assertIsNone(MeleeAction(entity=pl, dx=1, dy=1).validate())
+        self.assertTrue(MeleeAction(entity=pl, dx=1, dy=1).can_perform())
+        self.assertEqual(MeleeAction(entity=pl, dx=1, dy=0).validate(), "Nothing to attack.")
+        self.assertFalse(MeleeAction(entity=pl, dx=1, dy=0).can_perform())
+
 
 class Test_Actions_MovementAction(unittest.TestCase):
     def test_perform_out_of_bounds(self):
@@ -421,6 +463,28 @@ class Test_Actions_MovementAction(unittest.TestCase):
         self.assertEqual(pl.x, 1)
         self.assertEqual(pl.y, 1)
 
+    def test_validate(self):
+        '''
+        test that validate gives the same reason perform would raise,
+        and None for a free floor tile
+        '''
+        pl = Entity()  # player at 0,0
+        ent = Entity(x=1, y=0, blocks_movement=True)
+        eng = Engine(player=pl)
+        gm = GameMap(engine=eng, width=10, height=10)
+        gm.tiles[0:2, 0:2] = tile_types.floor
+        gm.entities = {pl, ent}
+        eng.game_map = gm
+        pl.parent = gm
+
+        self.assertIsNone(MovementAction(entity=pl, dx=0, dy=1).validate())
+        for dx, dy in ((-1, 0), (0, 2), (1, 0)):  # out of bounds, wall, entity
+            action = MovementAction(entity=pl, dx=dx, dy=dy)
+            self.assertEqual(action.validate(), "That way is blocked.")
+            self.assertFalse(action.can_perform())
+            with self.assertRaises(Impossible):
+                action.perform()
+
 
 class Test_Actions_BumpAction(unittest.TestCase):
     @patch('message_log.MessageLog.add_message')
@@ -482,6 +546,23 @@ class Test_Actions_BumpAction(unittest.TestCase):
         self.assertEqual(pl.x, 1)
         self.assertEqual(pl.y, 1)
 
+    def test_validate(self):
+        '''
+        test that a BumpAction validates as a MeleeAction when there is
+        a blocking entity, and as a MovementAction when there isn't
+        '''
+        pl = Entity()  # player at 0,0
+        ent = Entity(x=1, y=1, blocks_movement=True)  # blocking, but not an actor
+        eng = Engine(player=pl)
+        gm = GameMap(engine=eng, width=10, height=10)
+        gm.tiles[:, :] = tile_types.floor
+        gm.entities = {pl, ent}
+        eng.game_map = gm
+        pl.parent = gm
+
+        self.assertEqual(BumpAction(entity=pl, dx=1, dy=1).validate(), "Nothing to attack.")
+        self.assertIsNone(BumpAction(entity=pl, dx=1, dy=0).validate())
+
 
 class TestPickupAction(unittest.TestCase):
     def test_init(self):
@@ -530,6 +611,36 @@ class TestPickupAction(unittest.TestCase):
         self.assertIn(item, actor.inventory.items)
         patch_add_message.assert_called_once()
 
+    def test_perform_onto_stack(self):
+        '''
+        test that a pickup action with a full inventory
+        still picks up an item which goes onto a stack
+        '''
+        actor = Actor(
+            x=5, y=6,
+            ai_cls=HostileEnemy, equipment=Equipment(),
+            fighter=Fighter(hp=10, base_defense=10, base_power=10),
+            inventory=Inventory(capacity=1),
+            level=Level()
+        )
+        eng = Engine(player=actor)
+        gm = GameMap(engine=eng, width=10, height=10)
+        eng.game_map = gm
+        actor.parent = gm
+        potion = Item(name="Potion", consumable=Consumable())
+        stack = potion.spawn(gm, 0, 0)
+        gm.entities.remove(stack)
+        actor.inventory.add(stack)
+        item = potion.spawn(gm, 5, 6)
+
+        with patch('message_log.MessageLog.add_message') as patch_add_message:
+            PickupAction(entity=actor).perform()
+
+        self.assertNotIn(item, gm.entities)
+        self.assertEqual(actor.inventory.items, [stack])
+        self.assertEqual(stack.count, 2)
+        patch_add_message.assert_called_once_with("You picked up the Potion!")
+
     def test_perform_with_no_item_on_map(self):
         '''
         test that a pickup action with no items on the map
@@ -4,16 +4,20 @@ from unittest.mock import MagicMock, Mock, patch
 
 from numpy import power
 
+from components import ai
 from components.ai import BaseAI, HostileEnemy, ConfusedEnemy
 from components.equipment import Equipment
 from components.fighter import Fighter
 from components.inventory import Inventory
 from components.level import Level
 from entity import Entity, Actor
-from game_map import GameMap
+from game_map import GameMap, GameWorld
 from engine import Engine
+from blackboard import Blackboard
 from actions import MeleeAction, MovementAction, WaitAction
+from procgen import RectangularRoom
 import tile_types
+import tcod
 
 
 class Test_BaseAI(unittest.TestCase):
@@ -111,6 +115,63 @@ class Test_BaseAI(unittest.TestCase):
             (0, 1), (0, 2), (0, 3), (1, 4), (2, 5), (1, 6), (0, 7), (0, 8), (0, 9)]
         self.assertEqual(path, path_should_be)
 
+    def test_get_path_to_window(self):
+        '''
+        test get_path_to function
+        4. test that only the tiles near the start and destination are searched
+        '''
+        ent = Entity(x=50, y=50)
+        eng = Engine(player=ent)
+        gm = GameMap(engine=eng, width=200, height=200)
+        gm.tiles[:, :] = tile_types.floor
+        ent.parent = gm
+        ai = BaseAI(entity=ent)
+        with patch('tcod.path.SimpleGraph', wraps=tcod.path.SimpleGraph) as patch_graph:
+            path = ai.get_path_to(dest_x=53, dest_y=50, margin=2)
+        self.assertEqual(path, [(51, 50), (52, 50), (53, 50)])
+        # the searched window is the box around both ends plus the margin
+        self.assertEqual(patch_graph.call_args.kwargs["cost"].shape, (8, 5))
+
+    def test_get_path_to_window_fallback(self):
+        '''
+        test get_path_to function
+        5. test that the whole map is searched when the way around
+        a wall is outside of the window
+        '''
+        ent = Entity(x=2, y=10)
+        eng = Engine(player=ent)
+        gm = GameMap(engine=eng, width=30, height=30)
+        gm.tiles[:, :] = tile_types.floor
+        # a wall between the start and the destination with a gap at the bottom
+        gm.tiles[5, 0:28] = tile_types.wall
+        ent.parent = gm
+        ai = BaseAI(entity=ent)
+        path = ai.get_path_to(dest_x=8, dest_y=10, margin=2)
+        self.assertEqual(path[-1], (8, 10))
+        # the only way through the wall is the gap at the bottom
+        crossings = [y for x, y in path if x == 5]
+        self.assertTrue(crossings)
+        self.assertTrue(all(y >= 28 for y in crossings))
+        self.assertEqual(path, ai.get_path_to(dest_x=8, dest_y=10, margin=None))
+
+    def test_get_path_to_heuristics(self):
+        '''
+        test get_path_to function
+        6. test that both heuristics find a shortest path
+        '''
+        ent = Entity(x=0, y=0)
+        eng = Engine(player=ent)
+        gm = GameMap(engine=eng, width=10, height=10)
+        gm.tiles[:, :] = tile_types.floor
+        gm.tiles[0:8, 4] = tile_types.wall
+        ent.parent = gm
+        ai = BaseAI(entity=ent)
+        octile = ai.get_path_to(dest_x=0, dest_y=9, heuristic="octile")
+        chebyshev = ai.get_path_to(dest_x=0, dest_y=9, heuristic="chebyshev")
+        self.assertEqual(len(octile), len(chebyshev))
+        self.assertEqual(octile[-1], (0, 9))
+        self.assertEqual(chebyshev[-1], (0, 9))
+
 
 class TestConfusedEnemy(unittest.TestCase):
     def test_init(self):
@@ -154,13 +215,84 @@ class TestConfusedEnemy(unittest.TestCase):
             entity=actor, previous_ai=HostileEnemy(entity=actor), turns_remaining=5)
         actor.ai = ai
         eng = Engine(player=actor)
+        eng.game_world = GameWorld(
+            engine=eng,
+            map_width=10,
+            map_height=10,
+            max_rooms=5,
+            room_min_size=3,
+            room_max_size=4,
+        )
         gm = GameMap(engine=eng, width=10, height=10)
-        actor.parent = gm
+        gm.tiles[:, :] = tile_types.floor
+        eng.game_map = gm
+        actor.place(5, 5, gm)
         with patch('actions.BumpAction.perform') as patch_perform:
             ai.perform()
         self.assertEqual(ai.turns_remaining, 4)
         patch_perform.assert_called_once()
 
+    def test_perform_bump_into_wall(self):
+        '''
+        test that stumbling into a wall wastes the turn without raising
+        '''
+        actor = Actor(ai_cls=HostileEnemy, equipment=Equipment(), fighter=Fighter(
+            hp=10, base_defense=10, base_power=10), inventory=Inventory(capacity=5),
+            level=Level())
+        ai = ConfusedEnemy(
+            entity=actor, previous_ai=HostileEnemy(entity=actor), turns_remaining=5)
+        actor.ai = ai
+        eng = Engine(player=actor)
+        eng.game_world = GameWorld(
+            engine=eng,
+            map_width=10,
+            map_height=10,
+            max_rooms=5,
+            room_min_size=3,
+            room_max_size=4,
+        )
+        gm = GameMap(engine=eng, width=10, height=10)  # all walls
+        eng.game_map = gm
+        actor.place(5, 5, gm)
+        with patch('actions.WaitAction.perform') as patch_wait:
+            ai.perform()
+        self.assertEqual(ai.turns_remaining, 4)
+        self.assertEqual((actor.x, actor.y), (5, 5))
+        patch_wait.assert_called_once()
+
+    def test_perform_uses_combat_rng(self):
+        '''
+        test that the stumbling direction comes from the world's combat stream,
+        so two worlds with the same seed stumble the same way
+        '''
+        directions = []
+        for _ in range(2):
+            actor = Actor(ai_cls=HostileEnemy, equipment=Equipment(), fighter=Fighter(
+                hp=10, base_defense=10, base_power=10), inventory=Inventory(capacity=5),
+                level=Level())
+            ai = ConfusedEnemy(
+                entity=actor, previous_ai=HostileEnemy(entity=actor), turns_remaining=5)
+            actor.ai = ai
+            eng = Engine(player=actor)
+            eng.game_world = GameWorld(
+                engine=eng,
+                map_width=10,
+                map_height=10,
+                max_rooms=5,
+                room_min_size=3,
+                room_max_size=4,
+                seed=1234,
+            )
+            gm = GameMap(engine=eng, width=10, height=10)
+            actor.parent = gm
+            with patch('actions.BumpAction.__init__', return_value=None) as patch_init, \
+                    patch('actions.BumpAction.can_perform', return_value=True):
+                with patch('actions.BumpAction.perform'):
+                    for _ in range(5):
+                        ai.perform()
+            directions.append([c.args[1:] for c in patch_init.call_args_list])
+        self.assertEqual(directions[0], directions[1])
+
 
 class TestHostileEnemy(unittest.TestCase):
     def test_init(self):
@@ -267,3 +399,335 @@ class TestHostileEnemy(unittest.TestCase):
 
         # verify the WaitAction.perform was called
         mock_MeleeAction_perform.assert_called()
+
+
+class TestHostileEnemyPathCache(unittest.TestCase):
+    def make_map(self):
+        '''
+        makes a 20x20 open map with the player at (0, 0)
+        and a hostile enemy at (0, 6) that can see the player
+        '''
+        player = Entity(x=0, y=0, blocks_movement=True)
+        eng = Engine(player=player)
+        gm = GameMap(engine=eng, width=20, height=20)
+        gm.tiles[:, :] = tile_types.floor
+        gm.entities.add(player)
+        hostile_ent = Actor(x=0, y=6, ai_cls=HostileEnemy, equipment=Equipment(), fighter=Fighter(
+            hp=10, base_defense=10, base_power=10), inventory=Inventory(capacity=5),
+            level=Level())
+        gm.entities.add(hostile_ent)
+        player.parent = gm
+        hostile_ent.parent = gm
+        eng.game_map = gm
+        eng.update_fov()
+        return player, hostile_ent
+
+    def test_reuse_path(self):
+        '''
+        test that the path is only computed once while the player stands still
+        '''
+        player, hostile_ent = self.make_map()
+        with patch('components.ai.BaseAI.get_path_to',
+                   wraps=hostile_ent.ai.get_path_to) as patch_path:
+            hostile_ent.ai.perform()
+            hostile_ent.ai.perform()
+            hostile_ent.ai.perform()
+        patch_path.assert_called_once_with(0, 0)
+        self.assertEqual((hostile_ent.x, hostile_ent.y), (0, 3))
+        self.assertEqual(hostile_ent.ai.path_target, (0, 0))
+
+    def test_follow_single_step(self):
+        '''
+        test that when the player takes one step, the path is extended
+        instead of computed again
+        '''
+        player, hostile_ent = self.make_map()
+        hostile_ent.ai.perform()
+        player.move(1, 0)
+        with patch('components.ai.BaseAI.get_path_to') as patch_path:
+            hostile_ent.ai.perform()
+        patch_path.assert_not_called()
+        self.assertEqual(hostile_ent.ai.path[-1], (1, 0))
+        self.assertEqual(hostile_ent.ai.path_target, (1, 0))
+
+    def test_target_stepped_onto_path(self):
+        '''
+        test that when the player steps onto the path, the path is cut short
+        '''
+        player, hostile_ent = self.make_map()
+        hostile_ent.ai.perform()
+        player.move(0, 2)
+        with patch('components.ai.BaseAI.get_path_to') as patch_path:
+            hostile_ent.ai.update_path(0, 2)
+        patch_path.assert_not_called()
+        self.assertEqual(hostile_ent.ai.path, [(0, 4), (0, 3), (0, 2)])
+
+    def test_target_jumped(self):
+        '''
+        test that a new path is computed when the player moved more than one tile
+        '''
+        player, hostile_ent = self.make_map()
+        hostile_ent.ai.perform()
+        player.move(5, 0)
+        with patch('components.ai.BaseAI.get_path_to', return_value=[(1, 4)]) as patch_path:
+            hostile_ent.ai.update_path(5, 0)
+        patch_path.assert_called_once_with(5, 0)
+        self.assertEqual(hostile_ent.ai.path_target, (5, 0))
+
+    def test_path_not_next_to_entity(self):
+        '''
+        test that a cached path which doesn't start next to the entity is thrown away
+        '''
+        player, hostile_ent = self.make_map()
+        hostile_ent.ai.perform()
+        hostile_ent.x = 10
+        with patch('components.ai.BaseAI.get_path_to', return_value=[]) as patch_path:
+            hostile_ent.ai.update_path(0, 0)
+        patch_path.assert_called_once_with(0, 0)
+
+    def test_repair_blocked_path(self):
+        '''
+        test that an actor stepping into the path only causes a detour
+        around it, which rejoins the cached path
+        '''
+        player, hostile_ent = self.make_map()
+        hostile_ent.ai.perform()
+        self.assertEqual(hostile_ent.ai.path[0], (0, 4))
+        blocker = Entity(blocks_movement=True)
+        blocker.place(0, 4, hostile_ent.gamemap)
+
+        with patch('components.ai.BaseAI.get_path_to',
+                   wraps=hostile_ent.ai.get_path_to) as patch_path:
+            hostile_ent.ai.perform()
+        # the detour only goes as far as the first free tile past the blocker
+        patch_path.assert_called_once_with(0, 3)
+        self.assertNotEqual((hostile_ent.x, hostile_ent.y), (0, 4))
+        self.assertEqual(hostile_ent.ai.path[-1], (0, 0))
+
+    def test_perform_flank(self):
+        '''
+        test that with a blackboard the enemy heads for the flank tile
+        it claimed instead of the player
+        '''
+        player, hostile_ent = self.make_map()
+        eng = hostile_ent.gamemap.engine
+        eng.blackboard = Blackboard(eng)
+        eng.blackboard.claims[(0, 1)] = player  # already taken
+        hostile_ent.ai.perform()
+        self.assertEqual(eng.blackboard.claimed[hostile_ent], (1, 1))
+        self.assertEqual(hostile_ent.ai.path_target, (1, 1))
+        self.assertEqual(hostile_ent.ai.path[-1], (1, 1))
+
+    def test_perform_follow_scent(self):
+        '''
+        test that an enemy which can't see the player follows the scent
+        instead of its old path, without searching for a path
+        '''
+        player, hostile_ent = self.make_map()
+        hostile_ent.ai.perform()
+        hostile_ent.gamemap.visible[:, :] = False
+        hostile_ent.gamemap.scent[1, 4] = 1
+
+        with patch('components.ai.BaseAI.get_path_to') as patch_path:
+            hostile_ent.ai.perform()
+        patch_path.assert_not_called()
+        self.assertEqual((hostile_ent.x, hostile_ent.y), (1, 4))
+        self.assertEqual(hostile_ent.ai.path, [])
+
+    def test_update_path_deferred(self):
+        '''
+        test that without time to think the old path is kept,
+        and the actor is queued for the next turn
+        '''
+        player, hostile_ent = self.make_map()
+        hostile_ent.ai.perform()
+        path = list(hostile_ent.ai.path)
+        eng = hostile_ent.gamemap.engine
+        eng.turn_deadline = 0  # the time is up
+
+        with patch('components.ai.BaseAI.get_path_to') as patch_path:
+            hostile_ent.ai.update_path(5, 0)
+        patch_path.assert_not_called()
+        self.assertEqual(hostile_ent.ai.path, path)
+        self.assertEqual(hostile_ent.ai.path_target, (0, 0))
+        self.assertEqual(eng.deferred_actors, [hostile_ent])
+
+    def test_update_path_deferred_stale(self):
+        '''
+        test that a deferred actor throws away a path which doesn't
+        start next to it, so it waits instead
+        '''
+        player, hostile_ent = self.make_map()
+        hostile_ent.ai.perform()
+        hostile_ent.place(10, 10)
+        hostile_ent.gamemap.engine.turn_deadline = 0
+
+        hostile_ent.ai.update_path(5, 0)
+        self.assertEqual(hostile_ent.ai.path, [])
+
+    def test_perform_blocked_keeps_path(self):
+        '''
+        test that the next step isn't dropped from the path
+        when the actor can't take it
+        '''
+        player, hostile_ent = self.make_map()
+        hostile_ent.ai.perform()
+        hostile_ent.gamemap.engine.turn_deadline = 0  # no time to repair the path
+        blocker = Entity(blocks_movement=True)
+        blocker.place(*hostile_ent.ai.path[0], hostile_ent.gamemap)
+        path = list(hostile_ent.ai.path)
+
+        hostile_ent.ai.perform()
+        self.assertEqual(hostile_ent.ai.path, path)
+        self.assertEqual((hostile_ent.x, hostile_ent.y), (0, 5))
+
+
+class TestAILevelOfDetail(unittest.TestCase):
+    def make_map(self, x, y):
+        '''
+        makes a 60x60 open map with the player at (0, 0)
+        and a hostile enemy at x, y which can't see the player
+        '''
+        player = Entity(x=0, y=0)
+        eng = Engine(player=player)
+        gm = GameMap(engine=eng, width=60, height=60)
+        gm.tiles[:, :] = tile_types.floor
+        hostile_ent = Actor(x=x, y=y, ai_cls=HostileEnemy, equipment=Equipment(), fighter=Fighter(
+            hp=10, base_defense=10, base_power=10), inventory=Inventory(capacity=5),
+            level=Level())
+        hostile_ent.place(x, y, gm)
+        player.parent = gm
+        eng.game_map = gm
+        return hostile_ent
+
+    def test_active_radius(self):
+        '''
+        test that a monster near the player thinks every turn
+        '''
+        hostile_ent = self.make_map(ai.ai_active_radius, 0)
+        for turn in range(1, 6):
+            self.assertTrue(hostile_ent.ai.should_think(turn))
+        self.assertFalse(hostile_ent.ai.awake)
+
+    def test_idle_radius(self):
+        '''
+        test that a monster in the idle radius only thinks
+        once every ai_idle_interval turns
+        '''
+        hostile_ent = self.make_map(ai.ai_idle_radius, 0)
+        turns = [turn for turn in range(1, 10) if hostile_ent.ai.should_think(turn)]
+        self.assertEqual(turns, list(range(1, 10, ai.ai_idle_interval)))
+
+    def test_dormant(self):
+        '''
+        test that a monster further away than the idle radius never thinks
+        '''
+        hostile_ent = self.make_map(ai.ai_idle_radius + 1, 0)
+        for turn in range(1, 10):
+            self.assertFalse(hostile_ent.ai.should_think(turn))
+
+    def test_sight_wakes(self):
+        '''
+        test that a monster the player can see wakes up and thinks every turn,
+        until it is too far away from the player
+        '''
+        hostile_ent = self.make_map(ai.ai_idle_radius, 0)
+        hostile_ent.gamemap.visible[hostile_ent.x, hostile_ent.y] = True
+        self.assertTrue(hostile_ent.ai.should_think(1))
+        self.assertTrue(hostile_ent.ai.awake)
+
+        hostile_ent.gamemap.visible[:, :] = False
+        self.assertTrue(hostile_ent.ai.should_think(2))
+
+        hostile_ent.place(ai.ai_idle_radius + 1, 0)
+        self.assertFalse(hostile_ent.ai.should_think(3))
+        self.assertFalse(hostile_ent.ai.awake)
+
+    def test_noise_wakes(self):
+        '''
+        test that hearing a noise wakes a monster up, and that it walks
+        towards the noise when it can't see the player
+        '''
+        hostile_ent = self.make_map(ai.ai_idle_radius, 0)
+        hostile_ent.ai.hear(ai.ai_idle_radius, 5)
+        self.assertTrue(hostile_ent.ai.awake)
+        self.assertTrue(hostile_ent.ai.should_think(1))
+
+        hostile_ent.ai.perform()
+        self.assertEqual((hostile_ent.x, hostile_ent.y), (ai.ai_idle_radius, 1))
+        self.assertEqual(hostile_ent.ai.path_target, (ai.ai_idle_radius, 5))
+        self.assertIsNone(hostile_ent.ai.noise)
+
+
+class TestRoomRoute(unittest.TestCase):
+    def make_map(self):
+        '''
+        makes a 60x10 map with three rooms in a row joined by tunnels,
+        the player in the first room and a hostile enemy in the last one
+        '''
+        player = Entity(x=3, y=3)
+        eng = Engine(player=player)
+        gm = GameMap(engine=eng, width=60, height=10)
+        gm.rooms = [RectangularRoom(x, 1, 5, 5) for x in (1, 25, 50)]
+        gm.room_links = [(0, 1), (1, 2)]
+        for room in gm.rooms:
+            gm.tiles[room.inner] = tile_types.floor
+        gm.tiles[3:53, 3] = tile_types.floor
+        hostile_ent = Actor(x=52, y=3, ai_cls=HostileEnemy, equipment=Equipment(), fighter=Fighter(
+            hp=10, base_defense=10, base_power=10), inventory=Inventory(capacity=5),
+            level=Level())
+        hostile_ent.place(52, 3, gm)
+        player.parent = gm
+        eng.game_map = gm
+        return player, hostile_ent
+
+    def test_get_waypoint(self):
+        '''
+        test that a far away destination in another room gives the center
+        of the next room on the route
+        '''
+        player, hostile_ent = self.make_map()
+        self.assertEqual(hostile_ent.ai.get_waypoint(3, 3), (27, 3))
+
+    def test_get_waypoint_close(self):
+        '''
+        test that close destinations and destinations outside of rooms
+        are returned as they are
+        '''
+        player, hostile_ent = self.make_map()
+        self.assertEqual(hostile_ent.ai.get_waypoint(51, 3), (51, 3))
+        self.assertEqual(hostile_ent.ai.get_waypoint(20, 3), (20, 3))
+
+    def test_perform_noise_in_another_room(self):
+        '''
+        test that an enemy going to see about a far away noise in another room
+        heads from room to room, and keeps the noise until its path leads there
+        '''
+        player, hostile_ent = self.make_map()
+        hostile_ent.ai.hear(3, 3)
+        hostile_ent.ai.perform()
+        self.assertEqual((hostile_ent.x, hostile_ent.y), (51, 3))
+        # only as far as the middle room
+        self.assertEqual(hostile_ent.ai.path[-1], (27, 3))
+        self.assertEqual(hostile_ent.ai.noise, (3, 3))
+
+        for _ in range(24):
+            hostile_ent.ai.perform()
+        self.assertEqual((hostile_ent.x, hostile_ent.y), (27, 3))
+        hostile_ent.ai.perform()
+        self.assertEqual(hostile_ent.ai.path[-1], (3, 3))
+        self.assertIsNone(hostile_ent.ai.noise)
+
+    def test_update_path_waypoint(self):
+        '''
+        test that a far away destination only gets a path to the next room,
+        which isn't extended when the destination takes a step
+        '''
+        player, hostile_ent = self.make_map()
+        hostile_ent.ai.update_path(3, 3)
+        self.assertEqual(hostile_ent.ai.path[-1], (27, 3))
+        self.assertEqual(hostile_ent.ai.path_target, (3, 3))
+
+        with patch('components.ai.BaseAI.get_path_to', return_value=[(51, 3)]) as patch_path:
+            hostile_ent.ai.update_path(4, 3)
+        patch_path.assert_called_once_with(27, 3)
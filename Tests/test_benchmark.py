@@ -0,0 +1,75 @@
+import unittest
+from unittest.mock import patch
+
+import benchmark
+from engine import Engine
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_new_headless_engine(self):
+        '''
+        test that a headless engine has a game world but no map yet
+        '''
+        eng = benchmark.new_headless_engine(generator="bsp")
+        self.assertIsInstance(eng, Engine)
+        self.assertEqual(eng.game_world.generator, "bsp")
+        self.assertFalse(hasattr(eng, "game_map"))
+
+    def test_time_generation(self):
+        '''
+        test that timing generation reports a time and a room count
+        '''
+        result = benchmark.time_generation("bsp", floors=2)
+        self.assertGreater(result["ms_per_floor"], 0)
+        self.assertEqual(result["rooms_per_floor"], 30)
+
+    def test_time_enemy_turns(self):
+        '''
+        test that timing enemy turns reports a time and the extra monsters
+        '''
+        result = benchmark.time_enemy_turns(monsters=10, turns=2, budget_ms=None)
+        self.assertGreater(result["ms_per_turn"], 0)
+        self.assertGreaterEqual(result["monsters"], 10)
+
+    def test_time_enemy_turns_workers(self):
+        '''
+        test that enemy turns can be timed with a process pool
+        '''
+        result = benchmark.time_enemy_turns(
+            monsters=10, turns=2, budget_ms=None, workers=1)
+        self.assertGreater(result["ms_per_turn"], 0)
+        self.assertEqual(result["deferred_per_turn"], 0)
+
+    def test_measure_entity_memory(self):
+        '''
+        test that measuring entity memory reports sizes for every spawned entity
+        '''
+        result = benchmark.measure_entity_memory(entities=20)
+        self.assertEqual(result["entities"], 20)
+        self.assertGreater(result["bytes_per_entity"], 0)
+        self.assertGreater(result["save_bytes_per_entity"], 0)
+
+    def test_main(self):
+        '''
+        test that main prints one line per generator
+        '''
+        with patch('builtins.print') as patch_print:
+            benchmark.main(["--floors", "1"])
+        self.assertEqual(patch_print.call_count, 2)
+
+    def test_main_monsters(self):
+        '''
+        test that main prints one line per population and no generation timings
+        '''
+        with patch('builtins.print') as patch_print:
+            benchmark.main(["--monsters", "0", "--monsters", "5", "--turns", "1",
+                            "--no-budget"])
+        self.assertEqual(patch_print.call_count, 2)
+
+    def test_main_entities(self):
+        '''
+        test that main prints the entity memory and no generation timings
+        '''
+        with patch('builtins.print') as patch_print:
+            benchmark.main(["--entities", "5"])
+        patch_print.assert_called_once()
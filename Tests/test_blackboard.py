@@ -0,0 +1,61 @@
+import unittest
+
+from blackboard import Blackboard
+from engine import Engine
+from entity import Entity
+from game_map import GameMap
+import tile_types
+
+
+class TestBlackboard(unittest.TestCase):
+    def make_map(self):
+        '''
+        makes a 10x10 open map with the player at (1, 1),
+        a blocking entity at (2, 2) and a wall at (0, 1)
+        '''
+        player = Entity(x=1, y=1, blocks_movement=True)
+        eng = Engine(player=player)
+        gm = GameMap(engine=eng, width=10, height=10)
+        gm.tiles[1:, :] = tile_types.floor
+        Entity(blocks_movement=True).place(2, 2, gm)
+        player.place(1, 1, gm)
+        eng.game_map = gm
+        return eng
+
+    def test_flank_tiles(self):
+        '''
+        test that the flank tiles are the free floor tiles around the player,
+        with the cardinal ones first
+        '''
+        blackboard = Blackboard(self.make_map())
+        self.assertEqual(blackboard.player_xy, (1, 1))
+        self.assertEqual(
+            blackboard.flank_tiles[:3], [(1, 0), (2, 1), (1, 2)])
+        self.assertEqual(
+            sorted(blackboard.flank_tiles[3:]), [(2, 0)])
+
+    def test_flank_tiles_leave_movement_cost(self):
+        '''
+        test that working out the flank tiles doesn't rebuild the movement cost
+        '''
+        eng = self.make_map()
+        eng.game_map.invalidate_movement_cost()
+        Blackboard(eng)
+        self.assertIsNone(eng.game_map._movement_cost)
+
+    def test_claim_flank_tile(self):
+        '''
+        test that actors claim the closest free flank tile,
+        keep their claim, and get None once every tile is taken
+        '''
+        blackboard = Blackboard(self.make_map())
+        east = Entity(x=5, y=1)
+        north = Entity(x=5, y=0)
+        self.assertEqual(blackboard.claim_flank_tile(east), (2, 1))
+        self.assertEqual(blackboard.claim_flank_tile(north), (2, 0))
+        self.assertEqual(blackboard.claim_flank_tile(east), (2, 1))
+        self.assertEqual(blackboard.claims[(2, 0)], north)
+
+        self.assertIsNotNone(blackboard.claim_flank_tile(Entity()))
+        self.assertIsNotNone(blackboard.claim_flank_tile(Entity()))
+        self.assertIsNone(blackboard.claim_flank_tile(Entity()))
@@ -80,6 +80,23 @@ class TestConsumable(unittest.TestCase):
         consumable.consume()
         self.assertNotIn(item, actor.inventory.items)
 
+    def test_consume_from_stack(self):
+        '''
+        test that consume takes one item off a stack,
+        leaving the rest in the inventory
+        '''
+        actor = Actor(
+            ai_cls=BaseAI, equipment=Equipment(),
+            fighter=Fighter(hp=10, base_defense=10, base_power=10),
+            inventory=Inventory(capacity=5),
+            level=Level()
+        )
+        item = Item(consumable=Consumable(), count=3)
+        actor.inventory.add(item)
+        item.consumable.consume()
+        self.assertEqual(actor.inventory.items, [item])
+        self.assertEqual(item.count, 2)
+
 
 class TestConfusionConsumable(unittest.TestCase):
     def test_init(self):
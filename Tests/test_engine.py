@@ -4,6 +4,7 @@ import numpy as np
 from components.ai import HostileEnemy
 from engine import Engine
 from game_map import GameMap, GameWorld
+import time
 import unittest
 
 import tcod
@@ -28,6 +29,8 @@ class Test_Engine(unittest.TestCase):
         self.assertEqual(eng.player, ent1)
         self.assertIsInstance(eng.message_log, MessageLog)
         self.assertEqual(eng.mouse_location, (0, 0))
+        # so the same seed plays out the same on any machine
+        self.assertIsNone(eng.enemy_turn_budget)
 
     def test_gamemap_set(self):
         '''
@@ -60,6 +63,173 @@ class Test_Engine(unittest.TestCase):
         # verify the WaitAction.perform was called
         mock_ai_perform.assert_called_once()
 
+    def test_handle_enemy_turns_invalidates_movement_cost(self):
+        '''
+        tests that the shared movement costs are rebuilt and the scent
+        is updated once every time the enemies take their turns
+        '''
+        ent1 = Entity()
+        eng = Engine(player=ent1)
+        gm = GameMap(engine=eng, width=10, height=10)
+        eng.game_map = gm
+        ent1.parent = gm
+
+        with patch('game_map.GameMap.invalidate_movement_cost') as patch_invalidate, \
+                patch('game_map.GameMap.update_scent') as patch_scent:
+            eng.handle_enemy_turns()
+
+        patch_invalidate.assert_called_once()
+        patch_scent.assert_called_once_with(0, 0)
+
+    def test_handle_enemy_turns_dormant(self):
+        '''
+        tests that enemies far away from the player don't take their turn,
+        and that every call counts as a turn
+        '''
+        ent1 = Entity()
+        ent2 = Actor(x=29, y=29, ai_cls=HostileEnemy, equipment=Equipment(), fighter=Fighter(
+            hp=10, base_defense=10, base_power=10), inventory=Inventory(capacity=5),
+            level=Level())
+        eng = Engine(player=ent1)
+        gm = GameMap(engine=eng, width=30,
+                     height=30, entities={ent2})
+        eng.game_map = gm
+        ent1.parent = gm
+        ent2.parent = gm
+
+        with patch('components.ai.HostileEnemy.perform') as mock_ai_perform:
+            eng.handle_enemy_turns()
+            eng.handle_enemy_turns()
+
+        mock_ai_perform.assert_not_called()
+        self.assertEqual(eng.turn, 2)
+
+    def test_handle_enemy_turns_active_actors(self):
+        '''
+        tests that dormant enemies aren't looked at at all,
+        and that enemies falling out of range fall asleep
+        '''
+        ent1 = Entity()
+        ent2 = Actor(x=5, y=5, ai_cls=HostileEnemy, equipment=Equipment(), fighter=Fighter(
+            hp=10, base_defense=10, base_power=10), inventory=Inventory(capacity=5),
+            level=Level())
+        ent3 = Actor(x=29, y=29, ai_cls=HostileEnemy, equipment=Equipment(), fighter=Fighter(
+            hp=10, base_defense=10, base_power=10), inventory=Inventory(capacity=5),
+            level=Level())
+        eng = Engine(player=ent1)
+        gm = GameMap(engine=eng, width=30, height=30, entities={ent2, ent3})
+        eng.game_map = gm
+        ent1.parent = gm
+        ent2.parent = gm
+        ent3.parent = gm
+        ent2.ai.awake = True
+
+        with patch('components.ai.HostileEnemy.perform'), \
+                patch('components.ai.BaseAI.should_think', autospec=True,
+                      return_value=True) as patch_think:
+            eng.handle_enemy_turns()
+            self.assertEqual(eng.active_actors, {ent2})
+            self.assertEqual([c.args[0] for c in patch_think.call_args_list], [ent2.ai])
+
+            ent2.place(28, 28)
+            eng.handle_enemy_turns()
+
+        self.assertEqual(eng.active_actors, set())
+        self.assertFalse(ent2.ai.awake)
+
+    def test_handle_enemy_turns_blackboard(self):
+        '''
+        tests that the blackboard is only there while the enemies take their turns
+        '''
+        ent1 = Entity()
+        ent2 = Actor(ai_cls=HostileEnemy, equipment=Equipment(), fighter=Fighter(
+            hp=10, base_defense=10, base_power=10), inventory=Inventory(capacity=5),
+            level=Level())
+        eng = Engine(player=ent1)
+        gm = GameMap(engine=eng, width=10, height=10, entities={ent2})
+        eng.game_map = gm
+        ent1.parent = gm
+        ent2.parent = gm
+
+        with patch('components.ai.HostileEnemy.perform',
+                   side_effect=lambda: self.assertIsNotNone(eng.blackboard)) as mock_perform:
+            eng.handle_enemy_turns()
+        mock_perform.assert_called_once()
+        self.assertIsNone(eng.blackboard)
+
+    def test_try_think(self):
+        '''
+        tests that an actor may think while there is time left in the turn,
+        and is queued and counted once the time is up
+        '''
+        ent1 = Entity()
+        ent2 = Entity()
+        eng = Engine(player=ent1)
+        self.assertTrue(eng.try_think(ent2))  # outside of the enemy turns
+
+        eng.turn_deadline = time.perf_counter() + 60
+        self.assertTrue(eng.try_think(ent2))
+
+        eng.turn_deadline = time.perf_counter() - 1
+        self.assertFalse(eng.try_think(ent2))
+        self.assertFalse(eng.try_think(ent2))
+        self.assertEqual(eng.deferred_decisions, 2)
+        self.assertEqual(eng.deferred_actors, [ent2])
+
+    def test_handle_enemy_turns_deferred(self):
+        '''
+        tests that the enemy turns report the deferred decisions,
+        and that the deferred enemies go first on the next turn
+        '''
+        ent1 = Entity()
+        eng = Engine(player=ent1)
+        enemies = [
+            Actor(x=i, ai_cls=HostileEnemy, equipment=Equipment(), fighter=Fighter(
+                hp=10, base_defense=10, base_power=10), inventory=Inventory(capacity=5),
+                level=Level())
+            for i in range(5)
+        ]
+        gm = GameMap(engine=eng, width=10, height=10, entities=enemies)
+        eng.game_map = gm
+        ent1.parent = gm
+        for enemy in enemies:
+            enemy.parent = gm
+        eng.enemy_turn_budget = 0
+
+        order = []
+
+        def perform(ai):
+            order.append(ai.entity)
+            eng.try_think(ai.entity)
+
+        with patch('components.ai.HostileEnemy.perform', autospec=True, side_effect=perform):
+            self.assertEqual(eng.handle_enemy_turns(), 5)
+            deferred = list(eng.deferred_actors)
+            order.clear()
+            eng.handle_enemy_turns()
+
+        self.assertEqual(order, deferred)
+        self.assertIsNone(eng.turn_deadline)
+
+    def test_handle_enemy_turns_no_budget(self):
+        '''
+        tests that nothing is deferred without a budget
+        '''
+        ent1 = Entity()
+        ent2 = Actor(ai_cls=HostileEnemy, equipment=Equipment(), fighter=Fighter(
+            hp=10, base_defense=10, base_power=10), inventory=Inventory(capacity=5),
+            level=Level())
+        eng = Engine(player=ent1)
+        gm = GameMap(engine=eng, width=10, height=10, entities={ent2})
+        eng.game_map = gm
+        ent1.parent = gm
+        ent2.parent = gm
+        eng.enemy_turn_budget = None
+
+        with patch('components.ai.HostileEnemy.perform',
+                   side_effect=lambda: self.assertTrue(eng.try_think(ent2))):
+            self.assertEqual(eng.handle_enemy_turns(), 0)
+
     def test_handle_enemy_turns_exception(self):
         '''
         tests that an enemy taking its turn will pass
@@ -1,11 +1,15 @@
+import copy
 import math
+import pickle
+
+import entity
 from entity import Entity, Actor, Item
 from game_map import GameMap
 from engine import Engine
 from render_order import RenderOrder
 from equipment_types import EquipmentType
 
-from components.ai import BaseAI
+from components.ai import BaseAI, HostileEnemy
 from components.equipment import Equipment
 from components.fighter import Fighter
 from components.consumable import Consumable
@@ -16,6 +20,10 @@ from components.level import Level
 import unittest
 
 
+class TaggedEntity(Entity):
+    '''an entity subclass without __slots__, so its instances have a __dict__'''
+
+
 class Test_Entity(unittest.TestCase):
     def test_init_no_gamemap(self):
         '''
@@ -163,6 +171,73 @@ class TestActor(unittest.TestCase):
         self.assertIsInstance(actor.level, Level)
         self.assertEqual(actor, actor.level.parent)
 
+    def test_slots(self):
+        '''
+        test that actors and their components have no instance dict,
+        and still survive deepcopy and pickling with every attribute
+        '''
+        act = Actor(x=3, y=4, ai_cls=HostileEnemy, equipment=Equipment(),
+                    fighter=Fighter(hp=10, base_defense=2, base_power=3),
+                    inventory=Inventory(capacity=5), level=Level(xp_given=35))
+        act.fighter.hp = 6
+        for obj in (act, act.ai, act.equipment, act.fighter, act.inventory, act.level):
+            self.assertFalse(hasattr(obj, "__dict__"))
+
+        for clone in (copy.deepcopy(act), pickle.loads(pickle.dumps(act))):
+            self.assertEqual((clone.x, clone.y), (3, 4))
+            self.assertEqual(clone.fighter.hp, 6)
+            self.assertEqual(clone.fighter.power, 3)
+            self.assertEqual(clone.level.xp_given, 35)
+            self.assertIs(clone.fighter.parent, clone)
+            self.assertIs(clone.ai.entity, clone)
+            self.assertFalse(clone.ai.awake)
+            self.assertFalse(hasattr(clone, "parent"))
+
+    def test_ids(self):
+        '''
+        test that every entity and spawned clone gets its own id,
+        and that loading an entity keeps its id out of the way of new ones
+        '''
+        ent = Entity()
+        gm = GameMap(engine=Engine(player=ent), width=10, height=10)
+        clone = ent.spawn(gm, 1, 1)
+        self.assertNotEqual(ent.id, Entity().id)
+        self.assertNotEqual(clone.id, ent.id)
+
+        loaded = pickle.loads(pickle.dumps(clone))
+        self.assertEqual(loaded.id, clone.id)
+        entity.reserve_id(clone.id + 100)
+        self.assertGreater(entity.new_id(), clone.id + 100)
+
+    def test_load_instance_dict(self):
+        '''
+        test that attributes outside of __slots__ survive pickling and copying
+        '''
+        ent = TaggedEntity(x=3, name="Totem")
+        ent.tag = "carved"
+        for loaded in (pickle.loads(pickle.dumps(ent)), copy.deepcopy(ent)):
+            self.assertEqual(loaded.tag, "carved")
+            self.assertEqual((loaded.x, loaded.name, loaded.id), (3, "Totem", ent.id))
+
+    def test_spawn_shares_kinds(self):
+        '''
+        test that spawned clones share their prototype's kinds
+        until one of them changes
+        '''
+        act = Actor(char="o", name="Orc", ai_cls=HostileEnemy, equipment=Equipment(),
+                    fighter=Fighter(hp=10, base_defense=0, base_power=3),
+                    inventory=Inventory(capacity=0), level=Level(xp_given=35))
+        gm = GameMap(engine=Engine(player=act), width=10, height=10)
+        clone = act.spawn(gm, 2, 2)
+        self.assertIs(clone.kind, act.kind)
+        self.assertIs(clone.fighter.kind, act.fighter.kind)
+        self.assertIs(clone.level.kind, act.level.kind)
+
+        clone.fighter.max_hp += 5
+        self.assertEqual(clone.fighter.max_hp, 15)
+        self.assertEqual(act.fighter.max_hp, 10)
+        self.assertEqual(clone.fighter.base_power, 3)
+
     def test_property_is_alive_true(self):
         '''
         test the is_alive property returns true if there is an ai component
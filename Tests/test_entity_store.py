@@ -0,0 +1,111 @@
+import unittest
+
+import numpy as np
+
+from entity import Entity, Actor, Item
+from entity_store import ACTOR, ALIVE, BLOCKS, ITEM, EntityStore
+from engine import Engine
+from game_map import GameMap
+from components.ai import HostileEnemy
+from components.consumable import Consumable
+from components.equipment import Equipment
+from components.fighter import Fighter
+from components.inventory import Inventory
+from components.level import Level
+from render_order import RenderOrder
+
+
+def make_actor(x, y, hp=10):
+    return Actor(x=x, y=y, ai_cls=HostileEnemy, equipment=Equipment(),
+                 fighter=Fighter(hp=hp, base_defense=2, base_power=3),
+                 inventory=Inventory(capacity=5), level=Level())
+
+
+class TestEntityStore(unittest.TestCase):
+    def test_init(self):
+        '''
+        test that the store copies the positions, stats and flags
+        of every entity into its arrays
+        '''
+        actor = make_actor(1, 2, hp=7)
+        item = Item(x=3, y=4, consumable=Consumable())
+        ent = Entity(x=5, y=6, blocks_movement=True)
+        store = EntityStore([actor, item, ent])
+
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.rows[item], 1)
+        self.assertEqual(list(store.x), [1, 3, 5])
+        self.assertEqual(list(store.y), [2, 4, 6])
+        self.assertEqual(list(store.hp), [7, 0, 0])
+        self.assertEqual(list(store.max_hp), [7, 0, 0])
+        self.assertEqual(list(store.power), [3, 0, 0])
+        self.assertEqual(list(store.defense), [2, 0, 0])
+        self.assertEqual(store.render_order[1], RenderOrder.ITEM.value)
+        self.assertEqual(list(store.flags), [BLOCKS | ACTOR | ALIVE, ITEM, BLOCKS])
+
+    def test_empty(self):
+        '''
+        test that a store without entities has empty arrays
+        '''
+        store = EntityStore([])
+        self.assertEqual(len(store), 0)
+        self.assertEqual(store.x.shape, (0,))
+        self.assertEqual(store.select(np.flatnonzero(store.mask(ALIVE))), [])
+
+    def test_mask_select(self):
+        '''
+        test that mask only matches rows with all of the flags,
+        and select returns their entities
+        '''
+        actor = make_actor(1, 1)
+        dead = make_actor(2, 2)
+        dead.ai = None
+        store = EntityStore([actor, dead, Item(consumable=Consumable())])
+
+        self.assertEqual(list(store.mask(ACTOR)), [True, True, False])
+        self.assertEqual(store.select(np.flatnonzero(store.mask(ACTOR | ALIVE))), [actor])
+
+    def test_refresh_move(self):
+        '''
+        test that refresh copies an entity again, move only copies its position,
+        and entities without a row are ignored
+        '''
+        actor = make_actor(1, 1)
+        store = EntityStore([actor])
+        actor.x, actor.y = 4, 5
+        actor.fighter._hp = 3
+        store.move(actor)
+        self.assertEqual((store.x[0], store.y[0], store.hp[0]), (4, 5, 10))
+
+        store.refresh(actor)
+        self.assertEqual(store.hp[0], 3)
+
+        store.move(make_actor(0, 0))
+        store.refresh(make_actor(0, 0))
+        self.assertEqual(len(store), 1)
+
+    def test_game_map_keeps_store_up_to_date(self):
+        '''
+        test that damage, stat changes and deaths on a map
+        are copied into its entity store
+        '''
+        player = make_actor(0, 0)
+        actor = make_actor(3, 3)
+        gm = GameMap(engine=Engine(player=player), width=10, height=10, entities={actor})
+        actor.parent = gm
+        store = gm.entity_store
+        self.assertIs(gm.entity_store, store)
+
+        actor.fighter.take_damage(4)
+        self.assertEqual(store.hp[0], 6)
+
+        actor.fighter.base_power += 2
+        actor.fighter.invalidate_stats()
+        self.assertEqual(store.power[0], 5)
+
+        actor.fighter.die()
+        self.assertEqual(store.flags[0], ACTOR)
+        self.assertEqual(store.render_order[0], RenderOrder.CORPSE.value)
+
+        gm.invalidate_entity_store()
+        self.assertIsNot(gm.entity_store, store)
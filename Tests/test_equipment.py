@@ -347,3 +347,38 @@ class TestEquipment(unittest.TestCase):
         eq.parent = actor
         eq.toggle_equip(equippable_item=item, add_message=False)
         self.assertIsNone(eq.armor)
+
+    def test_extra_slots(self):
+        '''
+        test that extra slots can be added, and count towards the bonuses
+        '''
+        ring = Item(equippable=Equippable(
+            equipment_type=EquipmentType.ARMOR, power_bonus=1, defense_bonus=1))
+        eq = Equipment(ring=ring)
+        self.assertEqual(list(eq.slots), ["weapon", "armor", "ring"])
+        self.assertTrue(eq.item_is_equipped(ring))
+        self.assertEqual(eq.power_bonus, 1)
+        self.assertEqual(eq.defense_bonus, 1)
+
+    def test_equip_invalidates_stats(self):
+        '''
+        test that equipping and unequipping an item changes the fighter's
+        stats, even after they were cached
+        '''
+        item = Item(equippable=Equippable(
+            equipment_type=EquipmentType.WEAPON, power_bonus=2, defense_bonus=1))
+        actor = Actor(
+            ai_cls=BaseAI, equipment=Equipment(),
+            fighter=Fighter(hp=10, base_defense=10, base_power=10),
+            inventory=Inventory(capacity=5),
+            level=Level()
+        )
+        self.assertEqual(actor.fighter.power, 10)
+
+        actor.equipment.equip_to_slot("weapon", item, add_message=False)
+        self.assertEqual(actor.fighter.power, 12)
+        self.assertEqual(actor.fighter.defense, 11)
+
+        actor.equipment.unequip_from_slot("weapon", add_message=False)
+        self.assertEqual(actor.fighter.power, 10)
+        self.assertEqual(actor.fighter.defense, 10)
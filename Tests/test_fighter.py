@@ -38,8 +38,8 @@ class Test_Fighter(unittest.TestCase):
         act = Actor(ai_cls=HostileEnemy, equipment=Equipment(), fighter=ft,
                     inventory=Inventory(capacity=5),
                     level=Level())
-        ft.entity = act
-        self.assertEqual(act, ft.entity)
+        ft.parent = act
+        self.assertEqual(act, ft.parent)
 
     def test_property_hp(self):
         '''
@@ -66,7 +66,7 @@ class Test_Fighter(unittest.TestCase):
         act = Actor(ai_cls=HostileEnemy, equipment=Equipment(), fighter=ft,
                     inventory=Inventory(capacity=5),
                     level=Level())
-        ft.entity = act
+        ft.parent = act
 
         eng = Engine(player=act)
         gm = GameMap(engine=eng, width=10, height=10)
@@ -137,6 +137,22 @@ class Test_Fighter(unittest.TestCase):
         ft.parent = act
         self.assertEqual(ft.power, 12)
 
+    def test_stats_cached(self):
+        '''
+        test that defense and power are only added up again after invalidate_stats
+        '''
+        ft = Fighter(hp=10, base_defense=10, base_power=10)
+        Actor(ai_cls=HostileEnemy, equipment=Equipment(), fighter=ft,
+              inventory=Inventory(capacity=5), level=Level())
+        self.assertEqual((ft.defense, ft.power), (10, 10))
+
+        ft.base_defense = 20
+        ft.base_power = 20
+        self.assertEqual((ft.defense, ft.power), (10, 10))
+
+        ft.invalidate_stats()
+        self.assertEqual((ft.defense, ft.power), (20, 20))
+
     def test_property_defense_bonus(self):
         '''
         def that that the property will return the defense of equipment
@@ -263,6 +279,32 @@ class Test_Fighter(unittest.TestCase):
         # verify xp is given to the player
         self.assertEqual(act2.level.current_xp, 150)
 
+    @patch('message_log.MessageLog.add_message')
+    def test_die_leaves_corpse(self, mock_add_message):
+        '''
+        test that a dead actor is replaced by a corpse in the corpse layer,
+        while a dead player stays on the map
+        '''
+        act = Actor(x=3, y=4, name="actor", ai_cls=HostileEnemy, equipment=Equipment(),
+                    fighter=Fighter(hp=10, base_defense=10, base_power=10),
+                    inventory=Inventory(capacity=5), level=Level())
+        player = Actor(name="player", ai_cls=HostileEnemy, equipment=Equipment(),
+                       fighter=Fighter(hp=10, base_defense=10, base_power=10),
+                       inventory=Inventory(capacity=5), level=Level())
+        eng = Engine(player=player)
+        gm = GameMap(engine=eng, width=10, height=10, entities={act, player})
+        act.parent = gm
+        player.parent = gm
+        eng.game_map = gm
+
+        act.fighter.die()
+        self.assertNotIn(act, gm.entities)
+        self.assertEqual(gm.corpse_at(3, 4).name, "remains of actor")
+
+        player.fighter.die()
+        self.assertIn(player, gm.entities)
+        self.assertIsNone(gm.corpse_at(0, 0))
+
     def test_heal_max_hp(self):
         '''
         test that healing any amount while at max hp will heal 0
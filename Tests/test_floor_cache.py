@@ -0,0 +1,169 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from components.ai import HostileEnemy
+from components.equipment import Equipment
+from components.fighter import Fighter
+from components.inventory import Inventory
+from components.level import Level
+from engine import Engine
+from entity import Actor
+import floor_cache
+from floor_cache import FloorCache
+from game_map import GameMap, GameWorld
+
+
+def make_world(cache, seed=11):
+    '''
+    makes a world with a real player that uses the given floor cache
+    '''
+    player = Actor(ai_cls=HostileEnemy, equipment=Equipment(),
+                   fighter=Fighter(hp=10, base_defense=10, base_power=10),
+                   inventory=Inventory(capacity=5), level=Level())
+    eng = Engine(player=player)
+    eng.game_world = GameWorld(
+        engine=eng,
+        map_width=80,
+        map_height=43,
+        max_rooms=30,
+        room_min_size=6,
+        room_max_size=10,
+        seed=seed,
+        floor_cache=cache,
+    )
+    return eng
+
+
+def spawns(game_map):
+    '''
+    returns the name and position of everything on the map except the player
+    '''
+    return sorted(
+        (e.name, e.x, e.y) for e in game_map.entities if e is not game_map.engine.player
+    )
+
+
+class TestFloorCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = FloorCache(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_key(self):
+        '''
+        test that the key changes with every parameter
+        '''
+        key = self.cache.key(seed=1, floor=1)
+        self.assertEqual(key, self.cache.key(seed=1, floor=1))
+        self.assertNotEqual(key, self.cache.key(seed=1, floor=2))
+        self.assertNotEqual(key, self.cache.key(seed=2, floor=1))
+
+    def test_key_version(self):
+        '''
+        test that changing the source of procgen or tile_types changes the key
+        '''
+        key = self.cache.key(seed=1, floor=1)
+        with patch('floor_cache._version', 'edited'):
+            self.assertNotEqual(key, self.cache.key(seed=1, floor=1))
+
+    def test_cache_version(self):
+        '''
+        test that the version is a hash of the versioned modules
+        '''
+        self.assertEqual(len(floor_cache.cache_version()), 40)
+        self.assertIn("procgen.py", floor_cache.VERSIONED_MODULES)
+        self.assertIn("tile_types.py", floor_cache.VERSIONED_MODULES)
+
+    def test_cache_version_without_source(self):
+        '''
+        test that modules shipped without their source are left out of the version
+        '''
+        with patch('floor_cache._version', None), \
+                patch('floor_cache.VERSIONED_MODULES', ("missing.py",)):
+            version = floor_cache.cache_version()
+        self.assertEqual(len(version), 40)
+
+    def test_load_missing(self):
+        '''
+        test that loading a floor that was never stored returns None
+        '''
+        eng = make_world(self.cache)
+        self.assertIsNone(self.cache.load("missing", eng))
+
+    def test_store_and_load(self):
+        '''
+        test that a loaded floor matches the generated one
+        '''
+        eng = make_world(self.cache)
+        eng.game_world.generate_floor()
+        generated = eng.game_map
+        generated_spawns = spawns(generated)
+        key = eng.game_world.floor_cache_key()
+        self.assertTrue(os.path.isdir(self.cache.path(key)))
+
+        loaded = self.cache.load(key, eng)
+        self.assertIsInstance(loaded, GameMap)
+        self.assertTrue((loaded.tiles == generated.tiles).all())
+        self.assertTrue((loaded.start_distance == generated.start_distance).all())
+        self.assertEqual(loaded.downstairs_location, generated.downstairs_location)
+        self.assertEqual(loaded.layout, generated.layout)
+        self.assertEqual(
+            [(r.x1, r.y1, r.x2, r.y2) for r in loaded.rooms],
+            [(r.x1, r.y1, r.x2, r.y2) for r in generated.rooms],
+        )
+        self.assertEqual(loaded.room_links, generated.room_links)
+        self.assertEqual(spawns(loaded), generated_spawns)
+        self.assertIn(eng.player, loaded.entities)
+        self.assertEqual((eng.player.x, eng.player.y), loaded.rooms[0].center)
+
+    def test_store_without_layout(self):
+        '''
+        test that a map which wasn't generated from a seed isn't cached
+        '''
+        eng = make_world(self.cache)
+        gm = GameMap(engine=eng, width=10, height=10)
+        self.cache.store("unseeded", gm)
+        self.assertFalse(os.path.exists(self.cache.path("unseeded")))
+
+    def test_generate_floor_uses_cache(self):
+        '''
+        test that generating the same floor again loads it from the cache
+        '''
+        eng = make_world(self.cache)
+        eng.game_world.generate_floor()
+        generated_spawns = spawns(eng.game_map)
+
+        eng.game_world.current_floor = 0
+        with patch('procgen.generate_dungeon') as patch_gen_dun:
+            eng.game_world.generate_floor()
+        patch_gen_dun.assert_not_called()
+        self.assertEqual(spawns(eng.game_map), generated_spawns)
+
+    def test_evict(self):
+        '''
+        test that the least recently used floors are removed
+        once the cache is too big
+        '''
+        eng = make_world(self.cache)
+        eng.game_world.generate_floor()
+        first_key = eng.game_world.floor_cache_key()
+        floor_size = sum(
+            entry.stat().st_size for entry in os.scandir(self.cache.path(first_key))
+        )
+        # room for two floors
+        self.cache.max_bytes = floor_size * 2 + floor_size // 2
+        os.utime(self.cache.path(first_key), (0, 0))
+
+        eng.game_world.generate_floor()
+        second_key = eng.game_world.floor_cache_key()
+        os.utime(self.cache.path(second_key), (1, 1))
+        eng.game_world.generate_floor()
+
+        self.assertFalse(os.path.exists(self.cache.path(first_key)))
+        self.assertTrue(os.path.exists(self.cache.path(second_key)))
+        self.assertTrue(os.path.exists(
+            self.cache.path(eng.game_world.floor_cache_key())))
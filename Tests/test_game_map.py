@@ -1,6 +1,13 @@
+import pickle
 import unittest
 from unittest.mock import patch
+
+import numpy as np
+import tcod
+
+from actions import PickupAction
 from game_map import GameMap, GameWorld
+import game_map
 from entity import Entity, Actor, Item
 from engine import Engine
 from components.ai import HostileEnemy
@@ -8,7 +15,10 @@ from components.equipment import Equipment
 from components.fighter import Fighter
 from components.inventory import Inventory
 from components.consumable import Consumable
+from components.equippable import Dagger
 from components.level import Level
+from procgen import RectangularRoom
+import tile_types
 
 
 class Test_Game_Map(unittest.TestCase):
@@ -40,6 +50,9 @@ class Test_Game_Map(unittest.TestCase):
         self.assertIn(ent2, gm.entities)
         # check that the downstairs location was set
         self.assertEqual(gm.downstairs_location, (0, 0))
+        # procgen fills in the layout details
+        self.assertEqual(gm.rooms, [])
+        self.assertIsNone(gm.start_distance)
 
     def test_property_gamemap(self):
         '''
@@ -57,10 +70,10 @@ class Test_Game_Map(unittest.TestCase):
         player = Entity()
         eng = Engine(player=player)
         ent1 = Entity()
-        act2 = Actor(ai_cls=HostileEnemy, equipment=Equipment(), fighter=Fighter,
+        act2 = Actor(ai_cls=HostileEnemy, equipment=Equipment(), fighter=Fighter(hp=10, base_defense=10, base_power=10),
                      inventory=Inventory(capacity=5),
                      level=Level())
-        act3 = Actor(ai_cls=HostileEnemy, equipment=Equipment(), fighter=Fighter,
+        act3 = Actor(ai_cls=HostileEnemy, equipment=Equipment(), fighter=Fighter(hp=10, base_defense=10, base_power=10),
                      inventory=Inventory(capacity=5),
                      level=Level())
         act3.ai = None
@@ -78,7 +91,7 @@ class Test_Game_Map(unittest.TestCase):
         player = Entity()
         eng = Engine(player=player)
         ent1 = Entity()
-        act2 = Actor(ai_cls=HostileEnemy, equipment=Equipment(), fighter=Fighter,
+        act2 = Actor(ai_cls=HostileEnemy, equipment=Equipment(), fighter=Fighter(hp=10, base_defense=10, base_power=10),
                      inventory=Inventory(capacity=5),
                      level=Level())
         itm3 = Item(consumable=Consumable())
@@ -89,6 +102,121 @@ class Test_Game_Map(unittest.TestCase):
         # itm3 is the only item
         self.assertEqual(len(list(items)), 1)
 
+    def test_get_entity(self):
+        '''
+        test that entities can be looked up by id while they're on the map
+        '''
+        ent1 = Entity()
+        ent2 = Entity()
+        gm = GameMap(engine=Engine(player=ent1), width=10, height=10, entities={ent1})
+        self.assertIs(gm.get_entity(ent1.id), ent1)
+        self.assertIsNone(gm.get_entity(ent2.id))
+
+        gm.entities.add(ent2)
+        gm.entities.remove(ent1)
+        self.assertIs(gm.get_entity(ent2.id), ent2)
+        self.assertIsNone(gm.get_entity(ent1.id))
+
+        gm.entities = [ent1]
+        self.assertIsInstance(gm.entities, game_map.EntitySet)
+        self.assertIs(gm.get_entity(ent1.id), ent1)
+
+    def test_entity_set_pickle(self):
+        '''
+        test that a pickled map's entities are indexed by id and
+        still invalidate the map's entity store
+        '''
+        ent = Entity(x=1, y=1)
+        gm = GameMap(engine=Engine(player=ent), width=10, height=10, entities={ent})
+        ent.parent = gm
+
+        loaded = pickle.loads(pickle.dumps(gm))
+        loaded_ent = loaded.get_entity(ent.id)
+        self.assertEqual((loaded_ent.x, loaded_ent.y), (1, 1))
+        store = loaded.entity_store
+        loaded.entities.discard(loaded_ent)
+        self.assertIsNot(loaded.entity_store, store)
+
+    def test_entity_store_follows_entity_set(self):
+        '''
+        test that items added to or removed from the map show up in the entity store
+        '''
+        gm = GameMap(engine=Engine(player=Entity()), width=10, height=10)
+        self.assertEqual(len(gm.entity_store), 0)
+        itm = Item(consumable=Consumable()).spawn(gm, 2, 2)
+        self.assertEqual(gm.entity_store.entities, [itm])
+        gm.entities.remove(itm)
+        self.assertEqual(len(gm.entity_store), 0)
+
+    def test_sub_collections(self):
+        '''
+        test that the living actors, dead actors and items follow
+        entities being added, removed, dying and being pickled
+        '''
+        player = Actor(ai_cls=HostileEnemy, equipment=Equipment(),
+                       fighter=Fighter(hp=10, base_defense=10, base_power=10),
+                       inventory=Inventory(capacity=5), level=Level())
+        act = Actor(ai_cls=HostileEnemy, equipment=Equipment(),
+                    fighter=Fighter(hp=10, base_defense=10, base_power=10),
+                    inventory=Inventory(capacity=5), level=Level())
+        itm = Item(consumable=Consumable())
+        ent = Entity()
+        eng = Engine(player=player)
+        gm = GameMap(engine=eng, width=10, height=10, entities={player, act, ent})
+        for e in gm.entities:
+            e.parent = gm
+        self.assertEqual(set(gm.actors), {player, act})
+        self.assertEqual(list(gm.items), [])
+
+        itm.place(1, 1, gm)
+        self.assertEqual(list(gm.items), [itm])
+        gm.entities.remove(itm)
+        self.assertEqual(list(gm.items), [])
+
+        with patch('message_log.MessageLog.add_message'):
+            player.fighter.die()
+        self.assertEqual(list(gm.actors), [act])
+        self.assertEqual(list(gm.dead_actors), [player])
+
+        loaded = pickle.loads(pickle.dumps(gm))
+        self.assertEqual(len(list(loaded.actors)), 1)
+        self.assertEqual(len(list(loaded.dead_actors)), 1)
+
+    def test_add_item(self):
+        '''
+        test that stackable items put down on a pile of their kind merge into it,
+        and that moved or picked up piles are no longer found
+        '''
+        gm = GameMap(engine=None, width=10, height=10)
+        potion = Item(name="Potion", consumable=Consumable())
+        pile = gm.add_item(potion.spawn(gm, 0, 0), 2, 3)
+        self.assertIs(gm.item_pile_at(2, 3, potion.kind), pile)
+        self.assertIsNone(gm.item_pile_at(2, 3, Item(consumable=Consumable()).kind))
+
+        other = potion.spawn(gm, 0, 0)
+        gm.entities.remove(other)
+        self.assertIs(gm.add_item(other, 2, 3), pile)
+        self.assertEqual(pile.count, 2)
+        self.assertEqual(len(list(gm.items)), 1)
+
+        loaded = pickle.loads(pickle.dumps(gm))
+        loaded_pile = next(loaded.items)
+        self.assertIs(loaded.item_pile_at(2, 3, potion.kind), loaded_pile)
+        self.assertIs(loaded.add_item(potion.spawn(loaded, 0, 0), 2, 3), loaded_pile)
+        self.assertEqual(loaded_pile.count, 3)
+
+        pile.place(4, 4, gm)
+        self.assertIsNone(gm.item_pile_at(2, 3, potion.kind))
+        self.assertIs(gm.item_pile_at(4, 4, potion.kind), pile)
+        gm.entities.remove(pile)
+        self.assertIsNone(gm.item_pile_at(4, 4, potion.kind))
+
+        # equipment never stacks
+        sword = Item(name="Sword", consumable=Consumable(), equippable=Dagger())
+        gm.add_item(sword.spawn(gm, 0, 0), 1, 1)
+        gm.add_item(sword.spawn(gm, 0, 0), 1, 1)
+        self.assertEqual(len(list(gm.items)), 2)
+
     def test_get_blocking_entity_at_location_true(self):
         '''
         tests whether a blocking entity returns when checking
@@ -109,6 +237,410 @@ class Test_Game_Map(unittest.TestCase):
         ent2 = gm.get_blocking_entity_at_location(5, 5)
         self.assertIsNone(ent2)
 
+    def test_movement_cost(self):
+        '''
+        test that the movement cost is 0 on walls, 1 on floor
+        and blocking entities add 10
+        '''
+        ent = Entity(x=5, y=5, blocks_movement=True)
+        ent2 = Entity(x=6, y=5, blocks_movement=False)
+        eng = Engine(player=ent)
+        gm = GameMap(engine=eng, width=10, height=10, entities={ent, ent2})
+        gm.tiles[1:9, 1:9] = tile_types.floor
+        cost = gm.movement_cost
+        self.assertEqual(cost[0, 0], 0)
+        self.assertEqual(cost[5, 5], 11)
+        self.assertEqual(cost[6, 5], 1)
+        # the array is built once and shared
+        self.assertIs(gm.movement_cost, cost)
+
+    def test_movement_cost_blockers(self):
+        '''
+        test that adding and removing blockers keeps the cost up to date,
+        and that walls are never changed
+        '''
+        gm = GameMap(engine=Engine(player=Entity()), width=10, height=10)
+        gm.tiles[1:9, 1:9] = tile_types.floor
+        gm.movement_cost
+        gm.add_blocker(2, 2)
+        gm.add_blocker(0, 0)
+        self.assertEqual(gm.movement_cost[2, 2], 11)
+        self.assertEqual(gm.movement_cost[0, 0], 0)
+        gm.remove_blocker(2, 2)
+        self.assertEqual(gm.movement_cost[2, 2], 1)
+        with self.assertRaises(AssertionError):
+            gm.remove_blocker(2, 2)
+
+        for _ in range(20):
+            gm.add_blocker(3, 3)
+        self.assertEqual(gm.movement_cost[3, 3], 201)
+        for _ in range(20):
+            gm.remove_blocker(3, 3)
+        self.assertEqual(gm.movement_cost[3, 3], 1)
+
+    def test_invalidate_movement_cost(self):
+        '''
+        test that an invalidated cost array is rebuilt from the entities
+        '''
+        ent = Entity(x=5, y=5, blocks_movement=True)
+        gm = GameMap(engine=Engine(player=ent), width=10, height=10)
+        gm.tiles[:, :] = tile_types.floor
+        self.assertEqual(gm.movement_cost[5, 5], 1)
+        gm.entities.add(ent)
+        gm.invalidate_movement_cost()
+        self.assertEqual(gm.movement_cost[5, 5], 11)
+
+    def test_movement_cost_follows_entities(self):
+        '''
+        test that moving, placing, spawning and killing blocking entities
+        keeps the shared cost array the same as a rebuilt one
+        '''
+        player = Actor(ai_cls=HostileEnemy, equipment=Equipment(),
+                       fighter=Fighter(hp=10, base_defense=10, base_power=10),
+                       inventory=Inventory(capacity=5), level=Level())
+        eng = Engine(player=player)
+        gm = GameMap(engine=eng, width=10, height=10)
+        gm.tiles[:, :] = tile_types.floor
+        eng.game_map = gm
+        player.place(1, 1, gm)
+        gm.movement_cost
+
+        player.move(1, 1)
+        orc = player.spawn(gm, 5, 5)
+        orc.place(6, 6)
+        self.assertEqual(gm.movement_cost[2, 2], 11)
+        self.assertEqual(gm.movement_cost[6, 6], 11)
+
+        with patch('message_log.MessageLog.add_message'):
+            orc.fighter.die()
+        self.assertEqual(gm.movement_cost[6, 6], 1)
+
+        shared = gm.movement_cost.copy()
+        gm.invalidate_movement_cost()
+        self.assertTrue(np.array_equal(shared, gm.movement_cost))
+
+    def test_scent_not_saved(self):
+        '''
+        test that the scent is left out of a save and starts fresh after loading
+        '''
+        gm = GameMap(engine=Engine(player=Entity()), width=10, height=3)
+        gm.tiles[:, 1] = tile_types.floor
+        gm.update_scent(0, 1)
+        self.assertIsNone(gm.__getstate__()["scent"])
+
+        loaded = pickle.loads(pickle.dumps(gm))
+        self.assertEqual(loaded.scent.shape, gm.scent.shape)
+        self.assertFalse(loaded.scent.any())
+
+    def test_update_scent(self):
+        '''
+        test that scent is left at the player, spreads one tile a turn over the floor
+        but not through walls, and fades away
+        '''
+        gm = GameMap(engine=Engine(player=Entity()), width=10, height=3)
+        gm.tiles[:, 1] = tile_types.floor
+        gm.tiles[5, 1] = tile_types.wall
+
+        gm.update_scent(0, 1)
+        self.assertEqual(gm.scent[0, 1], 1)
+        self.assertEqual(gm.scent[1, 1], 0)
+
+        gm.update_scent(0, 1)
+        self.assertAlmostEqual(
+            gm.scent[1, 1], game_map.scent_spread * game_map.scent_decay, places=5)
+        self.assertEqual(gm.scent[0, 0], 0)  # walls never smell
+
+        for _ in range(10):
+            gm.update_scent(0, 1)
+        self.assertGreater(gm.scent[3, 1], gm.scent[4, 1])
+        self.assertEqual(gm.scent[6, 1], 0)  # behind the wall
+
+        gm.scent[9, 1] = game_map.scent_minimum
+        gm.update_scent(0, 1)
+        self.assertEqual(gm.scent[9, 1], 0)
+
+    def test_scent_step(self):
+        '''
+        test that the step goes to the free tile with the strongest scent
+        '''
+        gm = GameMap(engine=Engine(player=Entity()), width=10, height=10)
+        gm.tiles[:, :] = tile_types.floor
+        gm.scent[5, 5] = 0.5
+        gm.scent[6, 6] = 0.7
+        gm.scent[4, 5] = 0.9
+        self.assertEqual(gm.scent_step(5, 5), (-1, 0))
+
+        Entity(blocks_movement=True).place(4, 5, gm)
+        self.assertEqual(gm.scent_step(5, 5), (1, 1))
+
+        gm.scent[5, 5] = 1
+        self.assertIsNone(gm.scent_step(5, 5))
+
+    def test_make_noise(self):
+        '''
+        test that a noise is only heard by the actors within its radius
+        '''
+        near = Actor(x=3, y=3, ai_cls=HostileEnemy, equipment=Equipment(),
+                     fighter=Fighter(hp=10, base_defense=10, base_power=10),
+                     inventory=Inventory(capacity=5), level=Level())
+        far = Actor(x=9, y=9, ai_cls=HostileEnemy, equipment=Equipment(),
+                    fighter=Fighter(hp=10, base_defense=10, base_power=10),
+                    inventory=Inventory(capacity=5), level=Level())
+        gm = GameMap(engine=Engine(player=Entity()), width=10, height=10,
+                     entities={near, far})
+
+        gm.make_noise(1, 1, radius=2)
+        self.assertTrue(near.ai.awake)
+        self.assertEqual(near.ai.noise, (1, 1))
+        self.assertFalse(far.ai.awake)
+
+    def make_actor(self, x, y):
+        '''
+        makes a hostile actor at x, y
+        '''
+        return Actor(x=x, y=y, ai_cls=HostileEnemy, equipment=Equipment(),
+                     fighter=Fighter(hp=10, base_defense=10, base_power=10),
+                     inventory=Inventory(capacity=5), level=Level())
+
+    def test_actors_in_radius(self):
+        '''
+        test that actors_in_radius returns the living actors within
+        a straight distance of the radius, and nothing on an empty map
+        '''
+        gm = GameMap(engine=Engine(player=Entity()), width=10, height=10)
+        self.assertEqual(gm.actors_in_radius(5, 5, 3), [])
+
+        inside = self.make_actor(5, 8)
+        edge = self.make_actor(3, 3)  # 2.83 away
+        corner = self.make_actor(8, 8)  # 4.24 away
+        dead = self.make_actor(5, 5)
+        gm = GameMap(engine=Engine(player=self.make_actor(0, 0)), width=10, height=10,
+                     entities={inside, edge, corner, dead})
+        for actor in gm.entities:
+            actor.parent = gm
+        dead.fighter.die()
+
+        self.assertCountEqual(gm.actors_in_radius(5, 5, 3), [inside, edge])
+        self.assertCountEqual(gm.actors_in_radius(5, 5, 4.5), [inside, edge, corner])
+
+    def test_nearest_visible_actor(self):
+        '''
+        test that nearest_visible_actor picks the closest actor on a visible
+        tile that's closer than max_distance, leaving out the excluded actor
+        '''
+        gm = GameMap(engine=Engine(player=Entity()), width=10, height=10)
+        self.assertIsNone(gm.nearest_visible_actor(5, 5, 10))
+
+        center = self.make_actor(5, 5)
+        near = self.make_actor(6, 6)
+        hidden = self.make_actor(5, 6)
+        far = self.make_actor(9, 5)
+        gm = GameMap(engine=Engine(player=Entity()), width=10, height=10,
+                     entities={center, near, hidden, far})
+        gm.visible[:] = True
+        gm.visible[5, 6] = False
+
+        self.assertIs(gm.nearest_visible_actor(5, 5, 10), center)
+        self.assertIs(gm.nearest_visible_actor(5, 5, 10, exclude=center), near)
+        self.assertIs(gm.nearest_visible_actor(9, 4, 3, exclude=center), far)
+        # near is 1.41 away from center, so a maximum of 1.4 misses it
+        self.assertIsNone(gm.nearest_visible_actor(5, 5, 1.4, exclude=center))
+
+    def test_actors_within(self):
+        '''
+        test that actors_within finds the living actors in a square around a tile
+        '''
+        near = self.make_actor(3, 1)
+        far = self.make_actor(4, 5)
+        gm = GameMap(engine=Engine(player=self.make_actor(0, 0)), width=10, height=10,
+                     entities={near, far})
+        self.assertEqual(gm.actors_within(1, 2, 2), [near])
+        self.assertCountEqual(gm.actors_within(1, 2, 3), [near, far])
+
+    def test_entity_store_follows_actors(self):
+        '''
+        test that the area queries keep up with actors moving,
+        spawning and dying
+        '''
+        mover = self.make_actor(1, 1)
+        gm = GameMap(engine=Engine(player=self.make_actor(0, 0)), width=10, height=10,
+                     entities={mover})
+        mover.parent = gm
+        self.assertEqual(gm.actors_in_radius(8, 8, 1), [])
+
+        for _ in range(7):
+            mover.move(1, 1)
+        self.assertEqual(gm.actors_in_radius(8, 8, 1), [mover])
+
+        spawned = self.make_actor(0, 0).spawn(gm, 9, 9)
+        self.assertCountEqual(gm.actors_in_radius(8, 8, 1.5), [mover, spawned])
+
+        mover.fighter.die()
+        self.assertEqual(gm.actors_in_radius(8, 8, 1.5), [spawned])
+
+        gm.invalidate_entity_store()
+        self.assertEqual(gm.actors_in_radius(8, 8, 1.5), [spawned])
+
+    def test_tile_lookups(self):
+        '''
+        test that the living actor and the blocking entity on a tile are found
+        through the tile indexes, following moves, deaths, removals and loading
+        '''
+        player = self.make_actor(0, 0)
+        eng = Engine(player=player)
+        gm = GameMap(engine=eng, width=10, height=10)
+        gm.tiles[:, :] = tile_types.floor
+        eng.game_map = gm
+        player.place(0, 0, gm)
+        act = self.make_actor(0, 0).spawn(gm, 2, 2)
+        rock = Entity(blocks_movement=True).spawn(gm, 5, 5)
+        self.assertIs(gm.get_actor_at_location(2, 2), act)
+        self.assertIs(gm.get_blocking_entity_at_location(2, 2), act)
+        self.assertIsNone(gm.get_actor_at_location(5, 5))
+        self.assertIs(gm.get_blocking_entity_at_location(5, 5), rock)
+
+        act.move(1, 0)
+        self.assertIsNone(gm.get_actor_at_location(2, 2))
+        self.assertIsNone(gm.get_blocking_entity_at_location(2, 2))
+        self.assertIs(gm.get_actor_at_location(3, 2), act)
+        loaded = pickle.loads(pickle.dumps(gm))
+        self.assertEqual(loaded.get_actor_at_location(3, 2).id, act.id)
+
+        player.place(3, 3)
+        with patch('message_log.MessageLog.add_message'):
+            player.fighter.die()
+        self.assertIsNone(gm.get_actor_at_location(3, 3))
+        self.assertIsNone(gm.get_blocking_entity_at_location(3, 3))
+
+        gm.entities.remove(rock)
+        self.assertIsNone(gm.get_blocking_entity_at_location(5, 5))
+
+    def test_item_pile_at_any_kind(self):
+        '''
+        test that without a kind, item_pile_at finds any item on the tile,
+        following items as they move, are removed and are loaded
+        '''
+        gm = GameMap(engine=None, width=10, height=10)
+        sword = Item(name="Sword", consumable=Consumable(), equippable=Dagger()).spawn(gm, 2, 2)
+        self.assertIs(gm.item_pile_at(2, 2), sword)
+        self.assertIsNone(gm.item_pile_at(3, 3))
+
+        sword.place(3, 3)
+        self.assertIsNone(gm.item_pile_at(2, 2))
+        self.assertIs(gm.item_pile_at(3, 3), sword)
+        self.assertEqual(pickle.loads(pickle.dumps(gm)).item_pile_at(3, 3).name, "Sword")
+
+        gm.entities.remove(sword)
+        self.assertIsNone(gm.item_pile_at(3, 3))
+        self.assertEqual(gm.entities.items_at, {})
+
+    def test_add_corpse(self):
+        '''
+        test that corpses are taken off the map into the corpse layer,
+        with one kind per distinct look, newer corpses covering older ones
+        '''
+        orc1 = Entity(x=1, y=1, char="%", color=(191, 0, 0), name="remains of Orc")
+        orc2 = Entity(x=2, y=2, char="%", color=(191, 0, 0), name="remains of Orc")
+        troll = Entity(x=1, y=1, char="%", color=(191, 0, 0), name="remains of Troll")
+        gm = GameMap(engine=Engine(player=Entity()), width=10, height=10,
+                     entities={orc1, orc2})
+        self.assertIsNone(gm.corpse_at(1, 1))
+
+        for corpse in (orc1, orc2, troll):
+            gm.add_corpse(corpse)
+        self.assertEqual(len(gm.entities), 0)
+        self.assertEqual(len(gm.corpse_kinds), 2)
+        self.assertEqual(gm.corpse_at(2, 2).name, "remains of Orc")
+        self.assertEqual(gm.corpse_at(1, 1).name, "remains of Troll")
+
+    def test_save_corpses(self):
+        '''
+        test that only the tiles with corpses are saved, and they survive loading
+        '''
+        gm = GameMap(engine=Engine(player=Entity()), width=80, height=40)
+        saved = pickle.dumps(gm.__getstate__()["corpses"])
+        self.assertLess(len(saved), gm.corpses.nbytes / 10)
+
+        gm.add_corpse(Entity(x=3, y=4, char="%", color=(191, 0, 0), name="remains of Orc"))
+        loaded = pickle.loads(pickle.dumps(gm))
+        self.assertEqual(loaded.corpse_at(3, 4).name, "remains of Orc")
+        self.assertIsNone(loaded.corpse_at(4, 4))
+        self.assertEqual(loaded.corpses.shape, gm.corpses.shape)
+
+    def test_render_corpses(self):
+        '''
+        test that visible corpses are drawn, and hidden ones aren't
+        '''
+        gm = GameMap(engine=Engine(player=Entity()), width=10, height=10)
+        gm.add_corpse(Entity(x=1, y=1, char="%", color=(191, 0, 0)))
+        gm.add_corpse(Entity(x=2, y=2, char="%", color=(191, 0, 0)))
+        gm.visible[1, 1] = True
+        console = tcod.Console(10, 10, order="F")
+        gm.render(console)
+        self.assertEqual(console.rgb["ch"][1, 1], ord("%"))
+        self.assertEqual(tuple(console.rgb["fg"][1, 1]), (191, 0, 0))
+        self.assertNotEqual(console.rgb["ch"][2, 2], ord("%"))
+
+    def test_render_dropped_and_picked_up_items(self):
+        '''
+        test that an item dropped onto the map is drawn,
+        and stops being drawn once it's picked up again
+        '''
+        act = self.make_actor(3, 3)
+        eng = Engine(player=act)
+        gm = GameMap(engine=eng, width=10, height=10)
+        eng.game_map = gm
+        act.parent = gm  # off the entity set, so it isn't drawn over the item
+        gm.visible[:] = True
+        itm = Item(char="!", consumable=Consumable())
+        act.inventory.add(itm)
+        console = tcod.Console(10, 10, order="F")
+        gm.render(console)
+
+        with patch('message_log.MessageLog.add_message'):
+            act.inventory.drop(itm)
+            gm.render(console)
+            self.assertEqual(console.rgb["ch"][3, 3], ord("!"))
+
+            PickupAction(entity=act).perform()
+        console.clear()
+        gm.render(console)
+        self.assertNotEqual(console.rgb["ch"][3, 3], ord("!"))
+
+    def make_rooms(self):
+        '''
+        makes a map with four rooms in a row, linked as 0-1-2-3,
+        with a shortcut between rooms 0 and 2
+        '''
+        gm = GameMap(engine=Engine(player=Entity()), width=40, height=10)
+        gm.rooms = [RectangularRoom(x, 1, 5, 5) for x in (0, 10, 20, 30)]
+        gm.room_links = [(0, 1), (1, 2), (2, 3), (0, 2)]
+        return gm
+
+    def test_room_at(self):
+        '''
+        test that room_at finds the room a tile is in, and None outside of rooms
+        '''
+        gm = self.make_rooms()
+        self.assertEqual(gm.room_at(2, 2), 0)
+        self.assertEqual(gm.room_at(22, 3), 2)
+        self.assertIsNone(gm.room_at(0, 0))  # a room's wall
+        self.assertIsNone(gm.room_at(8, 3))
+
+    def test_room_route(self):
+        '''
+        test that the route goes through the rooms in order,
+        taking the shortcut, and is empty when the goal can't be reached
+        '''
+        gm = self.make_rooms()
+        self.assertEqual(gm.room_route(0, 3), [0, 2, 3])
+        self.assertEqual(gm.room_route(3, 1), [3, 2, 1])
+        self.assertEqual(gm.room_route(1, 1), [1])
+
+        gm = self.make_rooms()
+        gm.room_links = [(0, 1)]
+        self.assertEqual(gm.room_route(0, 3), [])
+
     def test_in_bounds_both_in(self):
         '''
         tests whether x and y in bounds of map returns true
@@ -231,6 +763,8 @@ class TestGameWorld(unittest.TestCase):
         self.assertEqual(gw.room_min_size, rmin)
         self.assertEqual(gw.room_max_size, rmax)
         self.assertEqual(gw.current_floor, cf)
+        self.assertEqual(gw.generator, "rooms")
+        self.assertIsInstance(gw.seed, int)
 
     def test_generate_floor(self):
         '''
@@ -250,3 +784,128 @@ class TestGameWorld(unittest.TestCase):
 
         self.assertEqual(gw.current_floor, 1)
         patch_gen_dun.assert_called()
+
+    def test_generate_floor_generator(self):
+        '''
+        test that the room generator is passed through to generate_dungeon
+        '''
+        gw = GameWorld(
+            engine=Engine(player=Entity()),
+            map_width=10,
+            map_height=10,
+            max_rooms=10,
+            room_min_size=3,
+            room_max_size=6,
+            generator="bsp",
+        )
+        with patch('procgen.generate_dungeon') as patch_gen_dun:
+            gw.generate_floor()
+
+        self.assertEqual(patch_gen_dun.call_args.kwargs["generator"], "bsp")
+
+    def make_world(self, seed):
+        '''
+        makes a world with a real player and generates the first floor
+        '''
+        player = Actor(ai_cls=HostileEnemy, equipment=Equipment(),
+                       fighter=Fighter(hp=10, base_defense=10, base_power=10),
+                       inventory=Inventory(capacity=5), level=Level())
+        eng = Engine(player=player)
+        eng.game_world = GameWorld(
+            engine=eng,
+            map_width=80,
+            map_height=43,
+            max_rooms=30,
+            room_min_size=6,
+            room_max_size=10,
+            seed=seed,
+        )
+        eng.game_world.generate_floor()
+        return eng
+
+    def test_seed_reproduces_floor(self):
+        '''
+        test that two worlds with the same seed generate the same floor
+        '''
+        eng1 = self.make_world(seed=42)
+        eng2 = self.make_world(seed=42)
+        self.assertTrue((eng1.game_map.tiles == eng2.game_map.tiles).all())
+        self.assertEqual(
+            sorted((e.name, e.x, e.y) for e in eng1.game_map.entities),
+            sorted((e.name, e.x, e.y) for e in eng2.game_map.entities),
+        )
+
+    def test_streams_are_independent(self):
+        '''
+        test that each stream and floor has its own seed
+        '''
+        gw = GameWorld(
+            engine=Engine(player=Entity()),
+            map_width=10,
+            map_height=10,
+            max_rooms=10,
+            room_min_size=3,
+            room_max_size=6,
+            seed=7,
+        )
+        self.assertNotEqual(gw.stream_seed("generation", 1),
+                            gw.stream_seed("spawning", 1))
+        self.assertNotEqual(gw.stream_seed("generation", 1),
+                            gw.stream_seed("generation", 2))
+        self.assertEqual(gw.rng("generation", 1).random(),
+                         gw.rng("generation", 1).random())
+
+    def test_save_rebuilds_tiles(self):
+        '''
+        test that a saved map leaves out its tiles and rebuilds them from the seed
+        '''
+        eng = self.make_world(seed=3)
+        gm = eng.game_map
+        self.assertIsNone(gm.__getstate__()["tiles"])
+
+        loaded = pickle.loads(pickle.dumps(eng)).game_map
+        self.assertTrue((loaded.tiles == gm.tiles).all())
+        self.assertEqual(loaded.downstairs_location, gm.downstairs_location)
+        self.assertEqual(len(loaded.rooms), len(gm.rooms))
+        self.assertEqual(loaded.room_links, gm.room_links)
+        self.assertTrue((loaded.start_distance == gm.start_distance).all())
+
+    def test_save_keeps_changed_tiles(self):
+        '''
+        test that tiles changed after generation survive a save
+        '''
+        eng = self.make_world(seed=3)
+        gm = eng.game_map
+        gm.tiles[0, 0] = tile_types.floor
+
+        loaded = pickle.loads(pickle.dumps(eng)).game_map
+        self.assertEqual(loaded.tiles[0, 0], tile_types.floor)
+        self.assertTrue((loaded.tiles == gm.tiles).all())
+
+    def test_save_other_version(self):
+        '''
+        test that a map dug by another layout version is saved in full,
+        and that a save of another layout version fails to load
+        '''
+        eng = self.make_world(seed=3)
+        gm = eng.game_map
+        version = gm.layout["version"]
+        gm.layout["version"] = "old"
+        self.assertIsNotNone(gm.__getstate__()["tiles"])
+        loaded = pickle.loads(pickle.dumps(gm))
+        self.assertTrue(np.array_equal(loaded.tiles, gm.tiles))
+
+        gm.layout["version"] = version
+        saved = pickle.dumps(gm)
+        with patch('procgen.LAYOUT_VERSION', version + 1):
+            with self.assertRaises(ValueError):
+                pickle.loads(saved)
+
+    def test_save_without_layout(self):
+        '''
+        test that a map without a layout seed is saved in full
+        '''
+        gm = GameMap(engine=Engine(player=Entity()), width=10, height=10)
+        gm.tiles[2, 2] = tile_types.floor
+        loaded = pickle.loads(pickle.dumps(gm))
+        self.assertTrue(np.array_equal(loaded.tiles, gm.tiles))
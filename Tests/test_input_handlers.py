@@ -1533,9 +1533,9 @@ class TestIventoryEventHandler(unittest.TestCase):
             level=Level()
         )
         player.inventory.items = [
-            Item(consumable=Consumable),
-            Item(consumable=Consumable),
-            Item(consumable=Consumable),
+            Item(consumable=Consumable()),
+            Item(consumable=Consumable()),
+            Item(consumable=Consumable()),
         ]
         eng = Engine(player=player)
         eng.game_world = GameWorld(
@@ -1576,9 +1576,9 @@ class TestIventoryEventHandler(unittest.TestCase):
             level=Level()
         )
         player.inventory.items = [
-            Item(name="item1", consumable=Consumable),
-            Item(name="item2", consumable=Consumable),
-            Item(name="item3", consumable=Consumable),
+            Item(name="item1", consumable=Consumable()),
+            Item(name="item2", consumable=Consumable()),
+            Item(name="item3", consumable=Consumable()),
         ]
         eng = Engine(player=player)
         eng.game_world = GameWorld(
@@ -1637,7 +1637,7 @@ class TestIventoryEventHandler(unittest.TestCase):
             inventory=Inventory(capacity=5),
             level=Level()
         )
-        item1 = Item(name="item1", consumable=Consumable)
+        item1 = Item(name="item1", consumable=Consumable())
         player.inventory.items = [
             item1,
         ]
@@ -1663,7 +1663,7 @@ class TestIventoryEventHandler(unittest.TestCase):
             inventory=Inventory(capacity=5),
             level=Level()
         )
-        item1 = Item(name="item1", consumable=Consumable)
+        item1 = Item(name="item1", consumable=Consumable())
         player.inventory.items = [
             item1,
         ]
@@ -1690,7 +1690,7 @@ class TestIventoryEventHandler(unittest.TestCase):
             inventory=Inventory(capacity=5),
             level=Level()
         )
-        item1 = Item(name="item1", consumable=Consumable)
+        item1 = Item(name="item1", consumable=Consumable())
         player.inventory.items = [
             item1,
         ]
@@ -1715,7 +1715,7 @@ class TestIventoryEventHandler(unittest.TestCase):
             inventory=Inventory(capacity=5),
             level=Level()
         )
-        item1 = Item(name="item1", consumable=Consumable)
+        item1 = Item(name="item1", consumable=Consumable())
         player.inventory.items = [
             item1,
         ]
@@ -1739,7 +1739,7 @@ class TestInventoryActivateHandler(unittest.TestCase):
             inventory=Inventory(capacity=5),
             level=Level()
         )
-        item1 = Item(name="item1", consumable=Consumable)
+        item1 = Item(name="item1", consumable=Consumable())
         player.inventory.items = [
             item1,
         ]
@@ -1811,7 +1811,7 @@ class TestInventoryDropHandler(unittest.TestCase):
             inventory=Inventory(capacity=5),
             level=Level()
         )
-        item1 = Item(name="item1", consumable=Consumable)
+        item1 = Item(name="item1", consumable=Consumable())
         player.inventory.items = [
             item1,
         ]
@@ -1,3 +1,4 @@
+import pickle
 import unittest
 from unittest.mock import patch
 
@@ -6,6 +7,7 @@ from components.ai import BaseAI
 from components.equipment import Equipment
 from components.fighter import Fighter
 from components.consumable import Consumable
+from components.equippable import Dagger
 from components.level import Level
 from entity import Actor, Item
 from engine import Engine
@@ -25,8 +27,9 @@ class TestInventory(unittest.TestCase):
         '''
         test that the parent (actor) of an inventory can be set without issues
         '''
-        actor = Actor(ai_cls=BaseAI, equipment=Equipment(), fighter=Fighter(hp=10, base_defense=10, base_power=10), inventory=Inventory(capacity=5),
-                      level=Level())
+        actor = Actor(ai_cls=BaseAI, equipment=Equipment(),
+                      fighter=Fighter(hp=10, base_defense=10, base_power=10),
+                      inventory=Inventory(capacity=5), level=Level())
         inv = Inventory(capacity=5)
         inv.parent = actor
         self.assertEqual(inv.parent, actor)
@@ -36,8 +39,9 @@ class TestInventory(unittest.TestCase):
         test that an item can be dropped
         from the inventory and onto the map
         '''
-        actor = Actor(ai_cls=BaseAI, equipment=Equipment(), fighter=Fighter(hp=10, base_defense=10, base_power=10), inventory=Inventory(capacity=5),
-                      level=Level())
+        actor = Actor(ai_cls=BaseAI, equipment=Equipment(),
+                      fighter=Fighter(hp=10, base_defense=10, base_power=10),
+                      inventory=Inventory(capacity=5), level=Level())
         inv = Inventory(capacity=5)
         inv.parent = actor
         item = Item(consumable=Consumable())
@@ -54,3 +58,110 @@ class TestInventory(unittest.TestCase):
         self.assertEqual([], inv.items)
         self.assertIn(item, gm.entities)
         patch_add_message.assert_called_once()
+
+    def test_add_stacks(self):
+        '''
+        test that stackable items of the same kind are added onto one stack,
+        while equipment and other kinds get slots of their own
+        '''
+        inv = Inventory(capacity=5)
+        potion = Item(name="Potion", consumable=Consumable())
+        first = potion.spawn(GameMap(engine=None, width=5, height=5), 0, 0)
+        second = potion.spawn(GameMap(engine=None, width=5, height=5), 0, 0)
+        scroll = Item(name="Scroll", consumable=Consumable())
+
+        self.assertIs(inv.add(first), first)
+        self.assertIs(inv.add(second), first)
+        self.assertIs(inv.add(scroll), scroll)
+        self.assertEqual(inv.items, [first, scroll])
+        self.assertEqual(first.count, 2)
+        self.assertIs(first.parent, inv)
+        self.assertEqual(first.display_name, "Potion (x2)")
+        self.assertEqual(scroll.display_name, "Scroll")
+
+        sword = Item(name="Sword", consumable=Consumable(), equippable=Dagger())
+        other_sword = sword.spawn(GameMap(engine=None, width=5, height=5), 0, 0)
+        inv.add(sword)
+        inv.add(other_sword)
+        self.assertEqual(inv.items, [first, scroll, sword, other_sword])
+
+    def test_has_room_for(self):
+        '''
+        test that a full inventory still has room for an item
+        which goes onto a stack
+        '''
+        inv = Inventory(capacity=1)
+        potion = Item(name="Potion", consumable=Consumable())
+        inv.add(potion)
+        self.assertFalse(inv.has_room_for(Item(name="Scroll", consumable=Consumable())))
+        other = potion.spawn(GameMap(engine=None, width=5, height=5), 0, 0)
+        self.assertTrue(inv.has_room_for(other))
+
+    def test_remove_one(self):
+        '''
+        test that removing one item from a stack decrements its count,
+        and the stack leaves the inventory with its last item
+        '''
+        inv = Inventory(capacity=5)
+        potion = Item(name="Potion", consumable=Consumable(), count=2)
+        inv.add(potion)
+
+        inv.remove_one(potion)
+        self.assertEqual(potion.count, 1)
+        self.assertEqual(inv.items, [potion])
+
+        inv.remove_one(potion)
+        self.assertEqual(inv.items, [])
+        self.assertIsNone(inv.stack_of(potion))
+
+    def test_items_pickle(self):
+        '''
+        test that the stack index is rebuilt after the items are pickled
+        '''
+        inv = Inventory(capacity=5)
+        inv.add(Item(name="Potion", consumable=Consumable(), count=3))
+        loaded = pickle.loads(pickle.dumps(inv))
+        stack = loaded.items[0]
+        self.assertEqual(stack.count, 3)
+        self.assertIs(loaded.items.by_kind[stack.kind], stack)
+
+    def test_add_after_loading(self):
+        '''
+        test that items still stack onto a stack loaded from a save
+        '''
+        inv = Inventory(capacity=5)
+        potion = Item(name="Potion", consumable=Consumable())
+        inv.add(potion.spawn(GameMap(engine=None, width=5, height=5), 0, 0))
+        inv.add(potion.spawn(GameMap(engine=None, width=5, height=5), 0, 0))
+        loaded = pickle.loads(pickle.dumps(inv))
+
+        stack = loaded.add(potion.spawn(GameMap(engine=None, width=5, height=5), 0, 0))
+        self.assertEqual(loaded.items, [stack])
+        self.assertEqual(stack.count, 3)
+
+    def test_drop_onto_pile(self):
+        '''
+        test that dropping a stack onto a pile of its kind
+        merges it into the pile
+        '''
+        actor = Actor(ai_cls=BaseAI, equipment=Equipment(),
+                      fighter=Fighter(hp=10, base_defense=10, base_power=10),
+                      inventory=Inventory(capacity=5), level=Level())
+        eng = Engine(player=actor)
+        gm = GameMap(engine=eng, width=10, height=10)
+        eng.game_map = gm
+        actor.place(2, 3, gm)
+        potion = Item(name="Potion", consumable=Consumable())
+        pile = potion.spawn(gm, 2, 3)
+        stack = potion.spawn(gm, 0, 0)
+        gm.entities.remove(stack)
+        stack.count = 2
+        actor.inventory.add(stack)
+
+        with patch('message_log.MessageLog.add_message') as patch_add_message:
+            actor.inventory.drop(item=stack)
+
+        self.assertEqual(actor.inventory.items, [])
+        self.assertNotIn(stack, gm.entities)
+        self.assertEqual(pile.count, 3)
+        patch_add_message.assert_called_once_with("You dropped the Potion (x2).")
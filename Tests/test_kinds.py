@@ -0,0 +1,97 @@
+import copy
+import pickle
+import unittest
+
+from kinds import Kind, SharedAttribute
+
+
+class Named:
+    __slots__ = ("kind",)
+
+    name = SharedAttribute[str]()
+
+    def __init__(self, name):
+        self.kind = Kind(name=name, size=2)
+
+
+class TestKind(unittest.TestCase):
+    def test_init(self):
+        '''
+        test that a kind holds the fields it was made with
+        '''
+        kind = Kind(name="Orc", size=2)
+        self.assertEqual(kind.name, "Orc")
+        self.assertEqual(kind.size, 2)
+
+    def test_read_only(self):
+        '''
+        test that the fields of a kind can't be changed in place
+        '''
+        kind = Kind(name="Orc")
+        with self.assertRaises(AttributeError):
+            kind.name = "Troll"
+
+    def test_copy(self):
+        '''
+        test that copies and deep copies of a kind are the kind itself
+        '''
+        kind = Kind(name="Orc")
+        self.assertIs(copy.copy(kind), kind)
+        self.assertIs(copy.deepcopy(kind), kind)
+
+    def test_equality(self):
+        '''
+        test that kinds with the same fields are equal and hash the same,
+        including a kind loaded from a save
+        '''
+        kind = Kind(name="Orc", color=(63, 127, 63))
+        loaded = pickle.loads(pickle.dumps(kind))
+        self.assertIsNot(loaded, kind)
+        self.assertEqual(loaded, kind)
+        self.assertEqual(hash(loaded), hash(kind))
+        self.assertEqual({kind: 1}[loaded], 1)
+        self.assertNotEqual(kind, kind.replace(name="Troll"))
+        self.assertNotEqual(kind, Kind(name="Orc"))
+
+    def test_replace(self):
+        '''
+        test that replace returns a new kind with the changes,
+        leaving the original alone
+        '''
+        kind = Kind(name="Orc", size=2)
+        changed = kind.replace(name="Troll")
+        self.assertEqual((changed.name, changed.size), ("Troll", 2))
+        self.assertEqual(kind.name, "Orc")
+
+    def test_pickle(self):
+        '''
+        test that a kind shared by many owners is pickled once
+        and still shared after loading
+        '''
+        kind = Kind(name="Orc")
+        loaded = pickle.loads(pickle.dumps([kind, kind]))
+        self.assertEqual(loaded[0].name, "Orc")
+        self.assertIs(loaded[0], loaded[1])
+
+
+class TestSharedAttribute(unittest.TestCase):
+    def test_get(self):
+        '''
+        test that the attribute is read from the owner's kind,
+        and from the class returns the descriptor
+        '''
+        self.assertEqual(Named("Orc").name, "Orc")
+        self.assertIsInstance(Named.name, SharedAttribute)
+
+    def test_set(self):
+        '''
+        test that setting the attribute only changes the kind of that owner
+        '''
+        prototype = Named("Orc")
+        clone = copy.deepcopy(prototype)
+        self.assertIs(clone.kind, prototype.kind)
+
+        clone.name = "remains of Orc"
+        self.assertEqual(clone.name, "remains of Orc")
+        self.assertEqual(clone.kind.size, 2)
+        self.assertEqual(prototype.name, "Orc")
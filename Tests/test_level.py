@@ -211,6 +211,28 @@ class TestLevel(unittest.TestCase):
         self.assertEqual(actor.fighter.power, 15)
         patch_add_message.assert_called_once()
 
+    def test_increase_power_cached(self):
+        '''
+        test that increase_power changes power after it was cached
+        '''
+        actor = Actor(
+            ai_cls=BaseAI, equipment=Equipment(),
+            fighter=Fighter(hp=10, base_defense=10, base_power=10),
+            inventory=Inventory(capacity=5),
+            level=Level()
+        )
+        eng = Engine(player=actor)
+        gm = GameMap(engine=eng, width=10, height=10)
+        actor.parent = gm
+        self.assertEqual(actor.fighter.power, 10)
+        self.assertEqual(actor.fighter.defense, 10)
+
+        with patch('message_log.MessageLog.add_message'):
+            actor.level.increase_power(amount=5)
+            actor.level.increase_defense(amount=2)
+        self.assertEqual(actor.fighter.power, 15)
+        self.assertEqual(actor.fighter.defense, 12)
+
     def test_increase_defense(self):
         '''
         test that calling increase_defense will increase the defense
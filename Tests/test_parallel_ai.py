@@ -0,0 +1,185 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from components.ai import ConfusedEnemy, HostileEnemy
+from components.equipment import Equipment
+from components.fighter import Fighter
+from components.inventory import Inventory
+from components.level import Level
+from engine import Engine
+from entity import Actor
+from game_map import GameMap
+import parallel_ai
+from parallel_ai import MELEE, MOVE, WAIT, ProcessPoolAI, first_step, propose
+import tile_types
+
+
+def make_actor(x, y):
+    return Actor(x=x, y=y, ai_cls=HostileEnemy, equipment=Equipment(), fighter=Fighter(
+        hp=10, base_defense=0, base_power=1), inventory=Inventory(capacity=5),
+        level=Level())
+
+
+class TestPropose(unittest.TestCase):
+    def make_arrays(self):
+        '''
+        makes the arrays of a 10x10 open map, with the player at (0, 0)
+        visible from the left half of the map
+        '''
+        cost = np.ones((10, 10), dtype=np.int16, order="F")
+        cost[0, 0] = 11
+        scent = np.zeros((10, 10), dtype=np.float32, order="F")
+        visible = np.zeros((10, 10), dtype=bool, order="F")
+        visible[:5, :] = True
+        return cost, scent, visible
+
+    def test_first_step(self):
+        '''
+        test that the first step heads straight for the destination
+        '''
+        cost, _, _ = self.make_arrays()
+        self.assertEqual(first_step(cost, 4, 0, 0, 0), (-1, 0))
+        self.assertIsNone(first_step(cost, 4, 0, 4, 0))
+
+    def test_propose_melee(self):
+        '''
+        test that an enemy next to the player attacks
+        '''
+        cost, scent, visible = self.make_arrays()
+        self.assertEqual(propose(cost, scent, visible, (0, 0), 1, 1), (MELEE, -1, -1))
+
+    def test_propose_chase(self):
+        '''
+        test that an enemy which can see the player steps towards them
+        '''
+        cost, scent, visible = self.make_arrays()
+        self.assertEqual(propose(cost, scent, visible, (0, 0), 0, 4), (MOVE, 0, -1))
+
+    def test_propose_scent(self):
+        '''
+        test that an enemy which can't see the player follows the scent,
+        and waits without any
+        '''
+        cost, scent, visible = self.make_arrays()
+        self.assertEqual(propose(cost, scent, visible, (0, 0), 8, 8), (WAIT, 0, 0))
+        scent[7, 8] = 0.5
+        self.assertEqual(propose(cost, scent, visible, (0, 0), 8, 8), (MOVE, -1, 0))
+
+
+class TestProcessPoolAI(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool_ai = ProcessPoolAI(workers=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool_ai.close()
+
+    def make_map(self, enemies):
+        '''
+        makes a 10x10 open map with the player at (0, 0) and an enemy at each position,
+        with the player able to see the whole map
+        '''
+        player = make_actor(0, 0)
+        eng = Engine(player=player)
+        gm = GameMap(engine=eng, width=10, height=10)
+        gm.tiles[:, :] = tile_types.floor
+        gm.visible[:, :] = True
+        eng.game_map = gm
+        player.place(0, 0, gm)
+        actors = [make_actor(x, y) for x, y in enemies]
+        for actor in actors:
+            actor.place(actor.x, actor.y, gm)
+        return eng, actors
+
+    def test_take_turns(self):
+        '''
+        test that the enemies close in on the player, attack them,
+        and that two enemies never end up on the same tile
+        '''
+        eng, actors = self.make_map([(1, 1), (3, 0), (0, 3), (3, 1)])
+        with patch('message_log.MessageLog.add_message'):
+            self.pool_ai.take_turns(eng, actors)
+        self.assertEqual(eng.player.fighter.hp, 9)
+        self.assertEqual((actors[1].x, actors[1].y), (2, 0))
+        self.assertEqual((actors[2].x, actors[2].y), (0, 2))
+        positions = [(actor.x, actor.y) for actor in actors]
+        self.assertEqual(len(set(positions)), len(positions))
+
+    def test_take_turns_deterministic(self):
+        '''
+        test that the outcome doesn't depend on the order the enemies are given in
+        '''
+        results = []
+        for reverse in (False, True):
+            # both enemies want to step onto (1, 0)
+            eng, actors = self.make_map([(2, 0), (2, 1)])
+            self.pool_ai.take_turns(eng, actors[::-1] if reverse else actors)
+            results.append([(actor.x, actor.y) for actor in actors])
+        self.assertEqual(results[0], results[1])
+
+    def test_take_turns_other_ai(self):
+        '''
+        test that AIs other than HostileEnemy perform in this process
+        '''
+        eng, actors = self.make_map([(5, 5)])
+        actors[0].ai = ConfusedEnemy(actors[0], actors[0].ai, turns_remaining=2)
+        with patch('components.ai.ConfusedEnemy.perform') as patch_perform:
+            self.pool_ai.take_turns(eng, actors)
+        patch_perform.assert_called_once()
+
+    def test_engine_uses_pool(self):
+        '''
+        test that the engine hands the thinking enemies to its pool,
+        and that saving the engine leaves the pool out
+        '''
+        eng, actors = self.make_map([(5, 5)])
+        eng.ai_pool = self.pool_ai
+        with patch('parallel_ai.ProcessPoolAI.take_turns') as patch_take_turns:
+            eng.handle_enemy_turns()
+        patch_take_turns.assert_called_once_with(eng, actors)
+        self.assertIsNone(eng.__getstate__()["ai_pool"])
+
+    def test_resource_tracker_posix_only(self):
+        '''
+        test that the resource tracker is only started on posix systems
+        '''
+        for name, started in (("posix", True), ("nt", False)):
+            with patch('parallel_ai.os.name', name), \
+                    patch('parallel_ai.resource_tracker.ensure_running') as patch_tracker, \
+                    patch('parallel_ai.multiprocessing.Pool'):
+                ProcessPoolAI(workers=1)
+            self.assertEqual(patch_tracker.called, started)
+
+    def test_collect_proposals(self):
+        '''
+        test that the pool proposes an action for every hostile enemy,
+        and that no enemies need no pool
+        '''
+        eng, actors = self.make_map([(1, 1), (5, 5)])
+        proposals = self.pool_ai.collect_proposals(eng, actors)
+        self.assertEqual(proposals[id(actors[0])], (MELEE, -1, -1))
+        self.assertEqual(proposals[id(actors[1])][0], MOVE)
+        self.assertEqual(self.pool_ai.collect_proposals(eng, []), {})
+
+    def test_share_resized(self):
+        '''
+        test that the shared memory is replaced when the map size changes
+        '''
+        pool_ai = ProcessPoolAI(workers=1)
+        try:
+            eng, _ = self.make_map([])
+            arrays = pool_ai.share(eng.game_map)
+            self.assertTrue(np.array_equal(arrays["cost"], eng.game_map.movement_cost))
+            names = [block.name for block in pool_ai.blocks.values()]
+
+            gm = GameMap(engine=eng, width=20, height=5)
+            arrays = pool_ai.share(gm)
+            self.assertEqual(arrays["scent"].shape, (20, 5))
+            self.assertNotEqual(names, [block.name for block in pool_ai.blocks.values()])
+        finally:
+            pool_ai.close()
+        self.assertEqual(pool_ai.blocks, {})
+        self.assertEqual(parallel_ai._attached, {})
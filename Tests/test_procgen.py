@@ -1,14 +1,25 @@
+import random
 import unittest
+
+import numpy as np
+
 from procgen import (
     RectangularRoom,
+    bsp_rooms,
+    carve_rooms,
+    compute_start_distance,
+    place_stairs,
+    remove_unreachable,
     generate_dungeon,
+    random_rooms,
     tunnel_between,
     place_entities,
     get_max_value_for_floor,
 )
 from entity import Entity
 from engine import Engine
-from game_map import GameWorld
+from game_map import GameMap, GameWorld
+import tile_types
 
 
 class TestMaxValue(unittest.TestCase):
@@ -142,6 +153,213 @@ class Test_Generate_Dungeon(unittest.TestCase):
         self.assertEqual(d.height, 50)
         self.assertEqual(d.width, 50)
 
+    def test_generate_dungeon_bsp(self):
+        '''
+        tests that the bsp generator can be picked by name and that
+        the rooms it makes are kept on the map
+        '''
+        ent = Entity()
+        eng = Engine(player=ent)
+        eng.game_world = GameWorld(
+            engine=eng,
+            map_width=80,
+            map_height=43,
+            max_rooms=30,
+            room_min_size=6,
+            room_max_size=10,
+            current_floor=1
+        )
+        d = generate_dungeon(
+            max_rooms=30,
+            room_min_size=6,
+            room_max_size=10,
+            map_width=80,
+            map_height=43,
+            engine=eng,
+            generator="bsp",
+        )
+        self.assertEqual(len(d.rooms), 30)
+        # the player starts in the first room
+        self.assertEqual((ent.x, ent.y), d.rooms[0].center)
+
+
+class Test_Room_Generators(unittest.TestCase):
+    def assert_rooms_valid(self, rooms, map_width, map_height, room_min_size, room_max_size):
+        '''
+        checks that the rooms fit on the map, have a valid size
+        and don't overlap each other
+        '''
+        for i, room in enumerate(rooms):
+            self.assertGreaterEqual(room.x1, 0)
+            self.assertGreaterEqual(room.y1, 0)
+            self.assertLess(room.x2, map_width)
+            self.assertLess(room.y2, map_height)
+            self.assertGreaterEqual(room.x2 - room.x1, room_min_size)
+            self.assertLessEqual(room.x2 - room.x1, room_max_size)
+            self.assertGreaterEqual(room.y2 - room.y1, room_min_size)
+            self.assertLessEqual(room.y2 - room.y1, room_max_size)
+            for other in rooms[i + 1:]:
+                self.assertFalse(room.intersects(other))
+
+    def test_random_rooms(self):
+        '''
+        test that random rooms never overlap and never exceed max_rooms
+        '''
+        rooms = random_rooms(30, 6, 10, 80, 43, random.Random())
+        self.assertLessEqual(len(rooms), 30)
+        self.assert_rooms_valid(rooms, 80, 43, 6, 10)
+
+    def test_bsp_rooms_count(self):
+        '''
+        test that the bsp generator makes exactly max_rooms rooms
+        when there is space for them
+        '''
+        for _ in range(20):
+            rooms = bsp_rooms(30, 6, 10, 80, 43, random.Random())
+            self.assertEqual(len(rooms), 30)
+            self.assert_rooms_valid(rooms, 80, 43, 6, 10)
+
+    def test_bsp_rooms_small_map(self):
+        '''
+        test that the bsp generator stops splitting when the map is full
+        '''
+        rooms = bsp_rooms(30, 3, 4, 10, 10, random.Random())
+        self.assertGreaterEqual(len(rooms), 1)
+        self.assertLess(len(rooms), 30)
+        self.assert_rooms_valid(rooms, 10, 10, 3, 4)
+
+
+class Test_Carve_Rooms(unittest.TestCase):
+    def test_carve_rooms(self):
+        '''
+        test that carving digs out the inside of every room and
+        joins each room to the previous one
+        '''
+        gm = GameMap(engine=Engine(player=Entity()), width=30, height=30)
+        rooms = [RectangularRoom(1, 1, 5, 5), RectangularRoom(20, 20, 5, 5)]
+        carve_rooms(gm, rooms, random.Random())
+        for room in rooms:
+            self.assertTrue(gm.tiles["walkable"][room.inner].all())
+        # the walls around the rooms are left alone
+        self.assertFalse(gm.tiles["walkable"][0, :].any())
+        self.assertFalse(gm.tiles["walkable"][rooms[0].x1, rooms[0].y1])
+        # both tunnel ends are walkable, and the rooms are joined
+        # by more floor than the rooms themselves
+        self.assertGreater(
+            gm.tiles["walkable"].sum(), 2 * 4 * 4
+        )
+
+    def test_carve_rooms_links(self):
+        '''
+        test that a tunnel running through a room links the rooms
+        on either side of it to that room, not to each other
+        '''
+        gm = GameMap(engine=Engine(player=Entity()), width=30, height=10)
+        rooms = [
+            RectangularRoom(1, 1, 5, 5),
+            RectangularRoom(20, 1, 5, 5),
+            RectangularRoom(10, 1, 5, 5),
+        ]
+        carve_rooms(gm, rooms, random.Random())
+        self.assertEqual(gm.room_links, [(0, 2), (1, 2)])
+
+    def test_carve_rooms_single_room(self):
+        '''
+        test that carving a single room doesn't need any tunnels
+        '''
+        gm = GameMap(engine=Engine(player=Entity()), width=10, height=10)
+        carve_rooms(gm, [RectangularRoom(1, 1, 5, 5)], random.Random())
+        self.assertEqual(gm.tiles["walkable"].sum(), 16)
+        self.assertEqual(gm.room_links, [])
+        self.assertTrue((gm.tiles[gm.tiles["walkable"]] == tile_types.floor).all())
+
+
+class Test_Floor_Connectivity(unittest.TestCase):
+    def make_map(self):
+        '''
+        makes a 10x10 map with a 4x4 room in the corner
+        and a separate 2x2 room that can't be reached from it
+        '''
+        gm = GameMap(engine=Engine(player=Entity()), width=10, height=10)
+        gm.tiles[1:5, 1:5] = tile_types.floor
+        gm.tiles[7:9, 7:9] = tile_types.floor
+        return gm
+
+    def test_compute_start_distance(self):
+        '''
+        test that distances use the same costs as the ai pathfinder
+        and unreachable tiles are left at the maximum value
+        '''
+        gm = self.make_map()
+        distance = compute_start_distance(gm, (1, 1))
+        self.assertEqual(distance[1, 1], 0)
+        self.assertEqual(distance[2, 1], 2)
+        self.assertEqual(distance[2, 2], 3)
+        self.assertEqual(distance[4, 4], 9)
+        self.assertEqual(distance[8, 8], np.iinfo(np.int32).max)
+
+    def test_remove_unreachable(self):
+        '''
+        test that unreachable floor and anything on it is removed
+        '''
+        gm = self.make_map()
+        ent1 = Entity(x=2, y=2)
+        ent2 = Entity(x=8, y=8)
+        gm.entities = {ent1, ent2}
+        remove_unreachable(gm, compute_start_distance(gm, (1, 1)))
+        self.assertFalse(gm.tiles["walkable"][7:9, 7:9].any())
+        self.assertTrue(gm.tiles["walkable"][1:5, 1:5].all())
+        self.assertEqual(gm.entities, {ent1})
+
+    def test_place_stairs_farthest(self):
+        '''
+        test that the 100th percentile puts the stairs as far away as possible
+        '''
+        gm = self.make_map()
+        place_stairs(gm, compute_start_distance(gm, (1, 1)), (1, 1), 100, random.Random())
+        self.assertEqual(gm.downstairs_location, (4, 4))
+        self.assertEqual(gm.tiles[4, 4], tile_types.down_stairs)
+
+    def test_place_stairs_not_on_start(self):
+        '''
+        test that the stairs are never placed where the player starts
+        '''
+        gm = self.make_map()
+        place_stairs(gm, compute_start_distance(gm, (1, 1)), (1, 1), 0, random.Random())
+        self.assertNotEqual(gm.downstairs_location, (1, 1))
+        self.assertIn(gm.downstairs_location, [(1, 2), (2, 1)])
+
+    def test_generate_dungeon_connected(self):
+        '''
+        test that a generated floor caches the distance map and
+        every floor tile, including the stairs, can be reached
+        '''
+        ent = Entity()
+        eng = Engine(player=ent)
+        eng.game_world = GameWorld(
+            engine=eng,
+            map_width=80,
+            map_height=43,
+            max_rooms=30,
+            room_min_size=6,
+            room_max_size=10,
+            current_floor=1
+        )
+        for generator in ("rooms", "bsp"):
+            d = generate_dungeon(
+                max_rooms=30,
+                room_min_size=6,
+                room_max_size=10,
+                map_width=80,
+                map_height=43,
+                engine=eng,
+                generator=generator,
+            )
+            unreachable = d.start_distance == np.iinfo(np.int32).max
+            self.assertFalse((d.tiles["walkable"] & unreachable).any())
+            self.assertEqual(d.tiles[d.downstairs_location], tile_types.down_stairs)
+            self.assertNotEqual(d.downstairs_location, (ent.x, ent.y))
+
 
 class Test_Tunnel_Between(unittest.TestCase):
     def test_tunnel_between(self):
@@ -55,6 +55,22 @@ class Test_Render_Functions(unittest.TestCase):
         # notice that the first letter is capitalized
         self.assertEqual(names, "Entity1, entity1")
 
+    def test_get_names_at_location_corpse(self):
+        '''
+        test that get_names_at_location includes the corpse on the tile
+        after the entities
+        '''
+        ent = Entity()
+        ent1 = Entity(x=5, y=6, name="entity1")
+        corpse = Entity(x=5, y=6, char="%", name="remains of orc")
+        eng = Engine(player=ent)
+        gm = GameMap(engine=eng, width=10, height=10)
+        gm.visible[:] = True
+        gm.entities = {ent1}
+        gm.add_corpse(corpse)
+        names = render_functions.get_names_at_location(5, 6, gm)
+        self.assertEqual(names, "Entity1, remains of orc")
+
     def test_render_bar_value_0(self):
         '''
         verify that the hp bar is rendered with 2 rectangles
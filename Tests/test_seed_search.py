@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import seed_search
+
+
+class TestSeedSearch(unittest.TestCase):
+    def test_floor_metrics(self):
+        '''
+        test that the metrics of a floor are all filled in
+        and make sense for the floor
+        '''
+        metrics = seed_search.floor_metrics(seed=3, floor=1, generator="bsp")
+        self.assertEqual(set(metrics), set(seed_search.FIELDS))
+        self.assertEqual(metrics["seed"], 3)
+        self.assertEqual(metrics["floor"], 1)
+        self.assertEqual(metrics["rooms"], 30)
+        self.assertGreater(metrics["floor_coverage"], 0)
+        self.assertLess(metrics["floor_coverage"], 1)
+        self.assertGreater(metrics["corridor_length"], 0)
+        self.assertGreater(metrics["stairs_distance"], 0)
+        self.assertAlmostEqual(
+            metrics["monsters_per_room"], metrics["monsters"] / metrics["rooms"]
+        )
+
+    def test_floor_metrics_reproducible(self):
+        '''
+        test that the same seed always gives the same metrics
+        '''
+        self.assertEqual(
+            seed_search.floor_metrics(seed=8), seed_search.floor_metrics(seed=8)
+        )
+
+    def test_write_rows_jsonl(self):
+        '''
+        test that each row is written as a json line
+        '''
+        output = io.StringIO()
+        count = seed_search.write_rows(
+            [{"seed": 1}, {"seed": 2}], output, "jsonl")
+        self.assertEqual(count, 2)
+        lines = output.getvalue().splitlines()
+        self.assertEqual([json.loads(line)["seed"] for line in lines], [1, 2])
+
+    def test_main_csv(self):
+        '''
+        test that main writes a csv row for every seed
+        '''
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "seeds.csv")
+            seed_search.main(
+                ["--seeds", "3", "--first-seed", "10", "--workers", "1", "--output", path]
+            )
+            with open(path, newline="") as f:
+                rows = list(csv.DictReader(f))
+        self.assertEqual([row["seed"] for row in rows], ["10", "11", "12"])
+        self.assertEqual(list(rows[0]), seed_search.FIELDS)
+
+    def test_main_pool(self):
+        '''
+        test that a process pool writes the same rows, in any order
+        '''
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "seeds.jsonl")
+            seed_search.main(
+                ["--seeds", "4", "--workers", "2", "--output", path]
+            )
+            with open(path) as f:
+                rows = [json.loads(line) for line in f]
+        self.assertEqual(sorted(row["seed"] for row in rows), [0, 1, 2, 3])
+        self.assertIn(seed_search.floor_metrics(seed=2), rows)
@@ -5,7 +5,7 @@ import tcod
 from input_handlers import MainGameEventHandler
 
 import setup_game
-from engine import Engine
+from engine import Engine, game_enemy_turn_budget
 from game_map import GameMap
 from entity import Actor
 
@@ -20,6 +20,7 @@ class TestSetupGame(unittest.TestCase):
         self.assertIsInstance(eng, Engine)
         self.assertIsInstance(eng.game_map, GameMap)
         self.assertIsInstance(eng.player, Actor)
+        self.assertEqual(eng.enemy_turn_budget, game_enemy_turn_budget)
 
 
 class TestMainMenu(unittest.TestCase):
@@ -9,8 +9,13 @@ if TYPE_CHECKING:
     from engine import Engine
     from entity import Entity, Actor, Item
 
+# how far away the sound of a fight wakes up monsters
+melee_noise_radius = 6
+
 
 class Action:
+    __slots__ = ("entity",)
+
     def __init__(self, entity: Actor) -> None:
         super().__init__()
         self.entity = entity
@@ -29,6 +34,17 @@ class Action:
         """
         raise NotImplementedError()
 
+    def validate(self) -> Optional[str]:
+        """
+        Return the reason this action is impossible, or None if it can be performed.
+        Unlike `perform` this never raises, so the AI can check its actions
+        without building exceptions for moves that fail all the time.
+        """
+        return None
+
+    def can_perform(self) -> bool:
+        return self.validate() is None
+
 
 class WaitAction(Action):
     def perform(self) -> None:
@@ -76,11 +92,18 @@ class ActionWithDirection(Action):
 
 
 class MeleeAction(ActionWithDirection):
+    def validate(self) -> Optional[str]:
+        if not self.target_actor:
+            return "Nothing to attack."
+        return None
+
     def perform(self) -> None:
         target = self.target_actor
         if not target:
             raise exceptions.Impossible("Nothing to attack.")
 
+        self.engine.game_map.make_noise(target.x, target.y, melee_noise_radius)
+
         damage = self.entity.fighter.power - target.fighter.defense
 
         attack_desc = f"{self.entity.name.capitalize()} attacks {target.name}"
@@ -102,23 +125,35 @@ class MeleeAction(ActionWithDirection):
 
 
 class MovementAction(ActionWithDirection):
-    def perform(self) -> None:
+    def validate(self) -> Optional[str]:
         dest_x, dest_y = self.dest_xy
 
         if not self.engine.game_map.in_bounds(dest_x, dest_y):
             # destination is out of bounds
-            raise exceptions.Impossible("That way is blocked.")
+            return "That way is blocked."
         if not self.engine.game_map.tiles["walkable"][dest_x, dest_y]:
             # destination is blocked by a tile
-            raise exceptions.Impossible("That way is blocked.")
+            return "That way is blocked."
         if self.engine.game_map.get_blocking_entity_at_location(dest_x, dest_y):
             # destination blocked by an entity
-            raise exceptions.Impossible("That way is blocked.")
+            return "That way is blocked."
+        return None
+
+    def perform(self) -> None:
+        reason = self.validate()
+        if reason:
+            raise exceptions.Impossible(reason)
 
         self.entity.move(self.dx, self.dy)
 
 
 class BumpAction(ActionWithDirection):
+    def validate(self) -> Optional[str]:
+        if self.blocking_entity:
+            return MeleeAction(self.entity, self.dx, self.dy).validate()
+        else:
+            return MovementAction(self.entity, self.dx, self.dy).validate()
+
     def perform(self) -> None:
         if self.blocking_entity:
             return MeleeAction(self.entity, self.dx, self.dy).perform()
@@ -133,23 +168,18 @@ class PickupAction(Action):
         super().__init__(entity)
 
     def perform(self) -> None:
-        actor_location_x = self.entity.x
-        actor_location_y = self.entity.y
         inventory = self.entity.inventory
 
-        for item in self.engine.game_map.items:
-            if actor_location_x == item.x and actor_location_y == item.y:
-                if len(inventory.items) >= inventory.capacity:
-                    raise exceptions.Impossible("Your inventory is full.")
-                self.engine.game_map.entities.remove(item)
-                item.parent = self.entity.inventory
-                inventory.items.append(item)
-
-                self.engine.message_log.add_message(
-                    f"You picked up the {item.name}!")
-                return
+        item = self.engine.game_map.item_pile_at(self.entity.x, self.entity.y)
+        if item is None:
+            raise exceptions.Impossible("There is nothing here to pick up.")
+        if not inventory.has_room_for(item):
+            raise exceptions.Impossible("Your inventory is full.")
+        self.engine.game_map.entities.remove(item)
+        inventory.add(item)
 
-        raise exceptions.Impossible("There is nothing here to pick up.")
+        self.engine.message_log.add_message(
+            f"You picked up the {item.display_name}!")
 
 
 class ItemAction(Action):
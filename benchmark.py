@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+"""
+Time the slow parts of the game without opening a tcod window.
+
+Run `python benchmark.py --help` to see the options.
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import pickle
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+from engine import Engine, game_enemy_turn_budget
+import entity_factories
+from floor_cache import FloorCache
+from game_map import GameWorld
+from parallel_ai import ProcessPoolAI
+import procgen
+
+
+def new_headless_engine(
+    generator: str = "rooms", cache_dir: Optional[str] = None, seed: Optional[int] = None
+) -> Engine:
+    """Return an engine with the same world settings as a new game, but no map"""
+    player = copy.deepcopy(entity_factories.player)
+    engine = Engine(player=player)
+    engine.game_world = GameWorld(
+        engine=engine,
+        map_width=80,
+        map_height=43,
+        max_rooms=30,
+        room_min_size=6,
+        room_max_size=10,
+        generator=generator,
+        seed=seed,
+        floor_cache=FloorCache(cache_dir) if cache_dir else None,
+    )
+    return engine
+
+
+def time_generation(
+    generator: str, floors: int, cache_dir: Optional[str] = None
+) -> Dict[str, float]:
+    """
+    Generate `floors` dungeon floors with the given room generator.
+    With `cache_dir` every run uses the same seed, so all but the first
+    floor are loaded from the floor cache.
+    Returns the average time per floor in milliseconds and the average room count.
+    """
+    engine = new_headless_engine(
+        generator, cache_dir=cache_dir, seed=0 if cache_dir else None)
+    elapsed = 0.0
+    room_count = 0
+
+    for _ in range(floors):
+        # always time the first floor so deeper floors don't skew the spawns
+        engine.game_world.current_floor = 0
+        start = time.perf_counter()
+        engine.game_world.generate_floor()
+        elapsed += time.perf_counter() - start
+        room_count += len(engine.game_map.rooms)
+
+    return {
+        "ms_per_floor": elapsed * 1000 / floors,
+        "rooms_per_floor": room_count / floors,
+    }
+
+
+def time_enemy_turns(
+    monsters: int,
+    turns: int,
+    budget_ms: Optional[float] = game_enemy_turn_budget * 1000,
+    workers: Optional[int] = None,
+) -> Dict[str, float]:
+    """
+    Spawn `monsters` extra orcs on random floor tiles of a generated floor,
+    then let the enemies take `turns` turns while the player stands still.
+    `budget_ms` is the enemy turn budget, the game's by default, None turns it off.
+    With `workers` the enemy decisions are made across that many processes.
+    Returns the average and the longest time per turn in milliseconds,
+    the average number of deferred decisions per turn and how many monsters
+    were spawned.
+    """
+    engine = new_headless_engine(seed=0)
+    if budget_ms is not None:
+        engine.enemy_turn_budget = budget_ms / 1000
+    engine.game_world.generate_floor()
+    game_map = engine.game_map
+    rng = engine.game_world.rng("benchmark")
+
+    floor = list(zip(*game_map.tiles["walkable"].nonzero()))
+    for x, y in rng.sample(floor, min(monsters, len(floor))):
+        if not game_map.get_blocking_entity_at_location(x, y):
+            entity_factories.orc.spawn(game_map, x, y)
+    engine.update_fov()
+
+    if workers:
+        engine.ai_pool = ProcessPoolAI(workers)
+
+    elapsed = longest = 0.0
+    deferred = 0
+    try:
+        for _ in range(turns):
+            start = time.perf_counter()
+            deferred += engine.handle_enemy_turns()
+            turn_time = time.perf_counter() - start
+            elapsed += turn_time
+            longest = max(longest, turn_time)
+    finally:
+        if engine.ai_pool:
+            engine.ai_pool.close()
+
+    return {
+        "ms_per_turn": elapsed * 1000 / turns,
+        "max_ms_per_turn": longest * 1000,
+        "deferred_per_turn": deferred / turns,
+        "monsters": len(set(game_map.actors)) - 1,
+    }
+
+
+def measure_entity_memory(entities: int) -> Dict[str, float]:
+    """
+    Spawn `entities` copies of the monster and item prototypes, in turn,
+    on random floor tiles of a generated floor.
+    Returns the memory allocated and the pickled save size per entity in bytes.
+    """
+    engine = new_headless_engine(seed=0)
+    engine.game_world.generate_floor()
+    game_map = engine.game_map
+    rng = engine.game_world.rng("benchmark")
+    prototypes = [
+        entity_factories.orc,
+        entity_factories.troll,
+        entity_factories.health_potion,
+        entity_factories.lightning_scroll,
+        entity_factories.dagger,
+    ]
+    floor = list(zip(*game_map.tiles["walkable"].nonzero()))
+
+    spawned = len(game_map.entities)
+    saved = len(pickle.dumps(game_map.entities))
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    for i in range(entities):
+        x, y = rng.choice(floor)
+        prototypes[i % len(prototypes)].spawn(game_map, x, y)
+    allocated = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    spawned = len(game_map.entities) - spawned
+    saved = len(pickle.dumps(game_map.entities)) - saved
+
+    return {
+        "bytes_per_entity": allocated / max(1, spawned),
+        "save_bytes_per_entity": saved / max(1, spawned),
+        "entities": spawned,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--floors", type=int, default=200, help="floors to generate per generator"
+    )
+    parser.add_argument(
+        "--generator",
+        choices=sorted(procgen.room_generators),
+        action="append",
+        help="room generator to time, may be repeated (default: all of them)",
+    )
+    parser.add_argument(
+        "--cache", metavar="DIR", help="load repeated floors from a floor cache in DIR"
+    )
+    parser.add_argument(
+        "--monsters",
+        type=int,
+        action="append",
+        help="time enemy turns on a floor with this many extra monsters, "
+        "may be repeated (skips the generation timings)",
+    )
+    parser.add_argument(
+        "--turns", type=int, default=100, help="enemy turns to time per population"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="make the enemy decisions across this many processes",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        metavar="MS",
+        default=game_enemy_turn_budget * 1000,
+        help="enemy turn budget in milliseconds (default: the game's)",
+    )
+    parser.add_argument(
+        "--no-budget",
+        dest="budget",
+        action="store_const",
+        const=None,
+        help="let the enemies think without a turn budget",
+    )
+    parser.add_argument(
+        "--entities",
+        type=int,
+        help="measure the memory of this many spawned entities "
+        "(skips the generation timings)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.entities:
+        result = measure_entity_memory(args.entities)
+        print(
+            f"entities[{result['entities']:.0f}]: "
+            f"{result['bytes_per_entity']:.0f} bytes/entity in memory, "
+            f"{result['save_bytes_per_entity']:.0f} bytes/entity saved"
+        )
+        return
+
+    if args.monsters:
+        for monsters in args.monsters:
+            result = time_enemy_turns(
+                monsters, args.turns, args.budget, args.workers)
+            print(
+                f"handle_enemy_turns[{result['monsters']:.0f} monsters]: "
+                f"{result['ms_per_turn']:.2f} ms/turn, "
+                f"{result['max_ms_per_turn']:.2f} ms worst turn, "
+                f"{result['deferred_per_turn']:.1f} deferred/turn"
+            )
+        return
+
+    for generator in args.generator or sorted(procgen.room_generators):
+        result = time_generation(generator, args.floors, args.cache)
+        print(
+            f"generate_floor[{generator}]: {result['ms_per_floor']:.2f} ms/floor, "
+            f"{result['rooms_per_floor']:.1f} rooms/floor"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+
+from entity_store import BLOCKS
+from game_map import NEIGHBORS
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from entity import Actor
+
+
+class Blackboard:
+    """
+    What the enemies know about the player this turn, worked out once at the
+    start of the enemy turns and shared by every AI instead of each one
+    looking it up again.
+    Enemies closing in on the player each claim a different free tile next
+    to the player, so they spread out and surround the player instead of
+    queueing up behind each other.
+    """
+
+    def __init__(self, engine: Engine):
+        game_map = engine.game_map
+        self.player_xy = engine.player.x, engine.player.y
+
+        # free tiles next to the player, cardinal ones first
+        # as they can be reached from more directions.
+        # the blockers come from the entity store rather than the movement cost,
+        # which would have to be rebuilt every turn
+        x, y = self.player_xy
+        store = game_map.entity_store
+        near = (
+            store.mask(BLOCKS) & (np.abs(store.x - x) <= 1) & (np.abs(store.y - y) <= 1)
+        )
+        blocked = set(zip(store.x[near].tolist(), store.y[near].tolist()))
+        walkable = game_map.tiles["walkable"]
+        self.flank_tiles: List[Tuple[int, int]] = sorted(
+            (
+                (x + dx, y + dy)
+                for dx, dy in NEIGHBORS
+                if game_map.in_bounds(x + dx, y + dy)
+                and walkable[x + dx, y + dy]
+                and (x + dx, y + dy) not in blocked
+            ),
+            key=lambda tile: abs(tile[0] - x) + abs(tile[1] - y),
+        )
+
+        self.claims: Dict[Tuple[int, int], Actor] = {}  # flank tile to claiming actor
+        self.claimed: Dict[Actor, Tuple[int, int]] = {}  # actor to its flank tile
+
+    def claim_flank_tile(self, actor: Actor) -> Optional[Tuple[int, int]]:
+        """
+        Return the flank tile this actor should head for, claiming the closest
+        one nobody else has claimed yet.
+        Returns None once every flank tile is taken.
+        """
+        if actor in self.claimed:
+            return self.claimed[actor]
+
+        best: Optional[Tuple[int, int]] = None
+        best_distance = 0
+        for tile in self.flank_tiles:
+            if tile in self.claims:
+                continue
+            distance = max(abs(tile[0] - actor.x), abs(tile[1] - actor.y))
+            if best is None or distance < best_distance:
+                best, best_distance = tile, distance
+
+        if best is not None:
+            self.claims[best] = actor
+            self.claimed[actor] = best
+        return best
@@ -3,7 +3,6 @@ from __future__ import annotations
 import random
 from typing import List, Optional, Tuple, TYPE_CHECKING
 
-import numpy as np  # type: ignore
 import tcod
 
 from actions import Action, MeleeAction, MovementAction, WaitAction, BumpAction
@@ -11,43 +10,162 @@ from actions import Action, MeleeAction, MovementAction, WaitAction, BumpAction
 if TYPE_CHECKING:
     from entity import Actor
 
+# A* heuristic weights for a cardinal and a diagonal step, see BaseAI.get_path_to
+# both are admissible for step costs of 2 and 3, octile is the better estimate
+path_heuristics = {
+    "octile": {"cardinal": 2, "diagonal": 3},
+    "chebyshev": {"cardinal": 2, "diagonal": 2},
+}
+
+# how many tiles a path search may look past the start and the destination
+path_search_margin = 8
+
+# destinations further away than a path search looks past them, in another room,
+# are planned over the room graph first, see BaseAI.get_waypoint.
+# enemies only chase what they can see or hear, so this has to be well
+# within the fov and noise radii to ever matter
+room_route_distance = path_search_margin + 1
+
+# level of detail for monsters that are not awake, see BaseAI.should_think
+# within ai_active_radius of the player they think every turn, within
+# ai_idle_radius every ai_idle_interval turns, and further away not at all
+ai_active_radius = 8
+ai_idle_radius = 24
+ai_idle_interval = 4
+
 
 class BaseAI(Action):
+    __slots__ = ("awake", "next_think")
+
     entity: Actor
 
+    def __init__(self, entity: Actor) -> None:
+        super().__init__(entity)
+        # set once this AI has seen or heard the player, awake AIs think every turn
+        self.awake = False
+        self.next_think = 0  # the first turn an idle AI may think again
+
+    @property
+    def rng(self) -> random.Random:
+        """The combat random stream of the world this AI is in"""
+        return self.engine.game_world.combat_rng
+
     def perform(self) -> None:
         raise NotImplementedError()
 
-    def get_path_to(self, dest_x: int, dest_y: int) -> List[Tuple[int, int]]:
+    def perform_or_wait(self, action: Action) -> None:
+        """
+        Perform the action if it's possible, otherwise wait a turn.
+        Checking first keeps exceptions out of the enemy turns,
+        a failed move is a normal outcome for an AI.
+        """
+        if action.can_perform():
+            return action.perform()
+        return WaitAction(self.entity).perform()
+
+    def hear(self, x: int, y: int) -> None:
+        """Called when this AI hears a noise at x, y"""
+        self.awake = True
+
+    def should_think(self, turn: int) -> bool:
+        """
+        Return True if this AI should perform on the given turn.
+        Seeing the player wakes it up, and it falls asleep again
+        once it's further than ai_idle_radius from the player.
+        """
+        game_map = self.engine.game_map
+        player = self.engine.player
+        x, y = self.entity.x, self.entity.y
+        distance = max(abs(player.x - x), abs(player.y - y))  # chebyshev distance
+
+        if game_map.visible[x, y]:
+            self.awake = True
+        elif distance > ai_idle_radius:
+            self.awake = False
+            return False  # dormant
+
+        if self.awake or distance <= ai_active_radius:
+            return True
+
+        if turn < self.next_think:
+            return False
+        self.next_think = turn + ai_idle_interval
+        return True
+
+    def get_waypoint(self, dest_x: int, dest_y: int) -> Tuple[int, int]:
+        """
+        Return where to search a tile path to on the way to the destination.
+        A far away destination in another room is planned over the rooms first,
+        so only the way to the center of the next room on the route is searched.
+        Close destinations, and anything outside of a room, are returned as they are.
+        """
+        game_map = self.entity.gamemap
+        x, y = self.entity.x, self.entity.y
+        if max(abs(dest_x - x), abs(dest_y - y)) < room_route_distance:
+            return dest_x, dest_y
+
+        start = game_map.room_at(x, y)
+        goal = game_map.room_at(dest_x, dest_y)
+        if start is None or goal is None or start == goal:
+            return dest_x, dest_y
+
+        route = game_map.room_route(start, goal)
+        if len(route) < 2:
+            return dest_x, dest_y
+        return game_map.rooms[route[1]].center
+
+    def get_path_to(
+        self,
+        dest_x: int,
+        dest_y: int,
+        heuristic: str = "octile",
+        margin: Optional[int] = path_search_margin,
+    ) -> List[Tuple[int, int]]:
         """
         Compute and return a path to the target positon
         if there is no valid path, then returns and empty list
+
+        The A* search uses one of the `path_heuristics`, and only looks at the tiles
+        within `margin` of the box around the start and the destination, so its cost
+        depends on how far away the destination is rather than on the map size.
+        If there is no path inside that window the whole map is searched.
+        A `margin` of None always searches the whole map.
         """
+        game_map = self.entity.gamemap
+        x, y = self.entity.x, self.entity.y
 
-        # copy the walkable array
-        cost = np.array(self.entity.gamemap.tiles["walkable"], dtype=np.int8)
+        if margin is None:
+            x1, y1, x2, y2 = 0, 0, game_map.width, game_map.height
+        else:
+            x1 = max(0, min(x, dest_x) - margin)
+            y1 = max(0, min(y, dest_y) - margin)
+            x2 = min(game_map.width, max(x, dest_x) + margin + 1)
+            y2 = min(game_map.height, max(y, dest_y) + margin + 1)
 
-        for entity in self.entity.gamemap.entities:
-            # check that an entity blocks movement and the cost isn't zero (blocking)
-            if entity.blocks_movement and cost[entity.x, entity.y]:
-                # add to the cost of a blocked position
-                # a lower number means more enemies will crowd behind each other in
-                # hallways. a higher number means enemies will take longer paths in
-                # order to surround the player
-                cost[entity.x, entity.y] += 10
+        # a view into the movement costs shared by every ai, it must not be changed
+        cost = game_map.movement_cost[x1:x2, y1:y2]
 
         # create a graph from the cost array and pass that graph into a new pathfinder
         graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=3)
+        graph.set_heuristic(**path_heuristics[heuristic])
         pathfinder = tcod.path.Pathfinder(graph)
 
-        pathfinder.add_root((self.entity.x, self.entity.y))  # start position
+        pathfinder.add_root((x - x1, y - y1))  # start position
 
         # compute the path to the destination and remove the starting point
-        path: List[List[int]] = pathfinder.path_to((dest_x, dest_y))[
+        path: List[List[int]] = pathfinder.path_to((dest_x - x1, dest_y - y1))[
             1:].tolist()
 
+        if (
+            not path
+            and (dest_x, dest_y) != (x, y)
+            and (x1, y1, x2, y2) != (0, 0, game_map.width, game_map.height)
+        ):
+            # the way around is outside of the window
+            return self.get_path_to(dest_x, dest_y, heuristic, margin=None)
+
         # convert from list[list[int]] to List[Tuple[int, int]]
-        return [(index[0], index[1]) for index in path]
+        return [(index[0] + x1, index[1] + y1) for index in path]
 
 
 class ConfusedEnemy(BaseAI):
@@ -56,6 +174,8 @@ class ConfusedEnemy(BaseAI):
     If an actor occupies a tile it is randomly moving to, it will attack
     """
 
+    __slots__ = ("previous_ai", "turns_remaining")
+
     def __init__(
         self, entity: Actor, previous_ai: Optional[BaseAI], turns_remaining: int
     ):
@@ -72,7 +192,7 @@ class ConfusedEnemy(BaseAI):
             self.entity.ai = self.previous_ai
         else:
             # pick a random direction
-            direction_x, direction_y = random.choice(
+            direction_x, direction_y = self.rng.choice(
                 [
                     (-1, -1),
                     (0, -1),
@@ -89,13 +209,87 @@ class ConfusedEnemy(BaseAI):
 
             # the actor will either try to move or run in the chosen random direction
             # its possible the actor will just bump into the wall, wasting a turn
-            return BumpAction(self.entity, direction_x, direction_y,).perform()
+            return self.perform_or_wait(
+                BumpAction(self.entity, direction_x, direction_y,))
 
 
 class HostileEnemy(BaseAI):
+    __slots__ = ("path", "path_target", "noise")
+
     def __init__(self, entity: Actor):
         super().__init__(entity)
         self.path: List[Tuple[int, int]] = []
+        self.path_target: Optional[Tuple[int, int]] = None  # where self.path heads
+        self.noise: Optional[Tuple[int, int]] = None  # the last noise heard
+
+    def hear(self, x: int, y: int) -> None:
+        super().hear(x, y)
+        self.noise = x, y
+
+    def update_path(self, dest_x: int, dest_y: int) -> None:
+        """
+        Make self.path lead to the destination, reusing the cached path when possible.
+        A new path is only computed when the destination jumped, or when the cached
+        path no longer starts next to this entity (for example after being confused).
+        The path to a far away destination may only lead to a waypoint, see get_waypoint.
+        """
+        if self.path and self.path_target and self.is_next_to(*self.path[0]):
+            if self.path_target == (dest_x, dest_y):
+                return  # the destination hasn't moved
+
+            if (dest_x, dest_y) in self.path:
+                # the destination stepped back onto the path, so cut it short
+                del self.path[self.path.index((dest_x, dest_y)) + 1:]
+                self.path_target = dest_x, dest_y
+                return
+
+            target_x, target_y = self.path_target
+            distance = max(
+                abs(dest_x - self.entity.x), abs(dest_y - self.entity.y))
+            if (
+                self.path[-1] == self.path_target  # not just to a waypoint
+                and max(abs(dest_x - target_x), abs(dest_y - target_y)) <= 1
+                and len(self.path) < distance * 2
+            ):
+                # the destination took a single step, so follow it, as long
+                # as the path doesn't wander too far from a direct route
+                self.path.append((dest_x, dest_y))
+                self.path_target = dest_x, dest_y
+                return
+
+        if not self.engine.try_think(self.entity):
+            # no time to search this turn, so keep following the old path if possible
+            if self.path and not self.is_next_to(*self.path[0]):
+                self.path = []
+            return
+
+        self.path = self.get_path_to(*self.get_waypoint(dest_x, dest_y))
+        self.path_target = dest_x, dest_y
+
+    def is_next_to(self, x: int, y: int) -> bool:
+        return max(abs(x - self.entity.x), abs(y - self.entity.y)) == 1
+
+    def repair_path(self) -> None:
+        """
+        Route around actors blocking the start of self.path,
+        rejoining the cached path right after them.
+        """
+        if not self.engine.try_think(self.entity):
+            return  # wait for the way to clear, or for time to search
+
+        game_map = self.engine.game_map
+
+        for i, (x, y) in enumerate(self.path):
+            if i > 0 and not game_map.get_blocking_entity_at_location(x, y):
+                detour = self.get_path_to(x, y)
+                if detour:
+                    self.path[:i + 1] = detour
+                    return
+                break
+
+        # no way around, so start again from scratch
+        if self.path_target:
+            self.path = self.get_path_to(*self.get_waypoint(*self.path_target))
 
     def perform(self) -> None:
         target = self.engine.player
@@ -107,12 +301,42 @@ class HostileEnemy(BaseAI):
             if distance <= 1:
                 return MeleeAction(self.entity, dx, dy).perform()
 
-            self.path = self.get_path_to(target.x, target.y)
+            # head for a free tile next to the player, to surround them
+            blackboard = self.engine.blackboard
+            flank = blackboard.claim_flank_tile(self.entity) if blackboard else None
+            self.update_path(*(flank or (target.x, target.y)))
+            self.noise = None
+        else:
+            step = self.engine.game_map.scent_step(self.entity.x, self.entity.y)
+            if step:
+                # the scent is fresher than any old path, and needs no search
+                self.path = []
+                self.noise = None
+                return MovementAction(self.entity, *step).perform()
+
+            if self.noise and not self.path:
+                # go and see what made the noise
+                self.update_path(*self.noise)
+                if self.path_target == self.noise and (
+                    not self.path or self.path[-1] == self.noise
+                ):
+                    # unless there was no time to find the way there,
+                    # or the path only leads to a waypoint on the way
+                    self.noise = None
+
+        if self.path and self.engine.game_map.get_blocking_entity_at_location(
+            *self.path[0]
+        ):
+            self.repair_path()
 
         if self.path:
-            dest_x, dest_y = self.path.pop(0)
-            return MovementAction(
+            dest_x, dest_y = self.path[0]
+            action = MovementAction(
                 self.entity, dest_x - self.entity.x, dest_y - self.entity.y,
-            ).perform()
+            )
+            if action.can_perform():
+                # only step along the path once the step is taken
+                del self.path[0]
+                return action.perform()
 
         return WaitAction(self.entity).perform()
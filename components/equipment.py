@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Optional, TYPE_CHECKING
+from typing import Dict, Optional, TYPE_CHECKING
 
 from components.base_component import BaseComponent
 from equipment_types import EquipmentType
@@ -8,44 +8,58 @@ from equipment_types import EquipmentType
 if TYPE_CHECKING:
     from entity import Actor, Item
 
+# the slot each type of equipment is worn in
+equipment_slots = {
+    EquipmentType.WEAPON: "weapon",
+    EquipmentType.ARMOR: "armor",
+}
+
 
 class Equipment(BaseComponent):
+    """
+    The items an actor has equipped, one per slot.
+    Every slot in `equipment_slots` exists, more can be added as keyword arguments.
+    """
+
+    __slots__ = ("slots",)
+
     parent: Actor
 
     def __init__(
         self,
         weapon: Optional[Item] = None,
         armor: Optional[Item] = None,
+        **slots: Optional[Item],
     ) -> None:
-        self.weapon = weapon
-        self.armor = armor
+        self.slots: Dict[str, Optional[Item]] = dict.fromkeys(equipment_slots.values())
+        self.slots.update(weapon=weapon, armor=armor, **slots)
 
     @property
-    def defense_bonus(self) -> int:
-        bonus = 0
+    def weapon(self) -> Optional[Item]:
+        return self.slots["weapon"]
 
-        if self.weapon is not None and self.weapon.equippable is not None:
-            bonus += self.weapon.equippable.defense_bonus
-
-        if self.armor is not None and self.armor.equippable is not None:
-            bonus += self.armor.equippable.defense_bonus
+    @property
+    def armor(self) -> Optional[Item]:
+        return self.slots["armor"]
 
-        return bonus
+    @property
+    def defense_bonus(self) -> int:
+        return sum(
+            item.equippable.defense_bonus
+            for item in self.slots.values()
+            if item is not None and item.equippable is not None
+        )
 
     @property
     def power_bonus(self) -> int:
-        bonus = 0
-
-        if self.weapon is not None and self.weapon.equippable is not None:
-            bonus += self.weapon.equippable.power_bonus
-
-        if self.armor is not None and self.armor.equippable is not None:
-            bonus += self.armor.equippable.power_bonus
-
-        return bonus
+        return sum(
+            item.equippable.power_bonus
+            for item in self.slots.values()
+            if item is not None and item.equippable is not None
+        )
 
     def item_is_equipped(self, item: Item) -> bool:
-        return self.weapon == item or self.armor == item
+        return any(equipped is item for equipped in self.slots.values())
 
     def unequip_message(self, item_name: str) -> None:
         self.parent.gamemap.engine.message_log.add_message(
@@ -57,35 +71,39 @@ class Equipment(BaseComponent):
             f"You equip the {item_name}."
         )
 
+    def stats_changed(self) -> None:
+        """Let the fighter know its equipment bonuses have to be added up again"""
+        if hasattr(self, "parent") and self.parent.fighter:
+            self.parent.fighter.invalidate_stats()
+
     def equip_to_slot(self, slot: str, item: Item, add_message: bool) -> None:
-        current_item = getattr(self, slot)
+        current_item = self.slots.get(slot)
 
         if current_item is not None:
             self.unequip_from_slot(slot, add_message)
 
-        setattr(self, slot, item)
+        self.slots[slot] = item
+        self.stats_changed()
 
         if add_message:
             self.equip_message(item.name)
 
     def unequip_from_slot(self, slot: str, add_message: bool) -> None:
-        current_item = getattr(self, slot)
+        current_item = self.slots[slot]
 
         if add_message:
             self.unequip_message(current_item.name)
 
-        setattr(self, slot, None)
+        self.slots[slot] = None
+        self.stats_changed()
 
     def toggle_equip(self, equippable_item: Item, add_message: bool = True) -> None:
-        if (
-            equippable_item.equippable
-            and equippable_item.equippable.equipment_type == EquipmentType.WEAPON
-        ):
-            slot = "weapon"
+        if equippable_item.equippable:
+            slot = equipment_slots[equippable_item.equippable.equipment_type]
         else:
             slot = "armor"
 
-        if getattr(self, slot) == equippable_item:
+        if self.slots.get(slot) == equippable_item:
             self.unequip_from_slot(slot, add_message)
         else:
             self.equip_to_slot(slot, equippable_item, add_message)
@@ -4,40 +4,58 @@ from typing import TYPE_CHECKING
 
 from components.base_component import BaseComponent
 from equipment_types import EquipmentType
+from kinds import Kind, SharedAttribute
 
 if TYPE_CHECKING:
     from entity import Item
 
 
 class Equippable(BaseComponent):
+    __slots__ = ("kind",)
+
     parent: Item
 
+    # the same for every item spawned from one prototype, see kinds.Kind
+    equipment_type = SharedAttribute[EquipmentType]()
+    power_bonus = SharedAttribute[int]()
+    defense_bonus = SharedAttribute[int]()
+
     def __init__(
         self,
         equipment_type: EquipmentType,
         power_bonus: int = 0,
         defense_bonus: int = 0,
     ):
-        self.equipment_type = equipment_type
-        self.power_bonus = power_bonus
-        self.defense_bonus = defense_bonus
+        self.kind = Kind(
+            equipment_type=equipment_type,
+            power_bonus=power_bonus,
+            defense_bonus=defense_bonus,
+        )
 
 
 class Dagger(Equippable):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(equipment_type=EquipmentType.WEAPON, power_bonus=2)
 
 
 class Sword(Equippable):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(equipment_type=EquipmentType.WEAPON, power_bonus=4)
 
 
 class LeatherArmor(Equippable):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(equipment_type=EquipmentType.ARMOR, defense_bonus=1)
 
 
 class ChainMail(Equippable):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(equipment_type=EquipmentType.ARMOR, defense_bonus=3)
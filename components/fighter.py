@@ -1,9 +1,10 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING
 
 import color
 from components.base_component import BaseComponent
+from kinds import Kind, SharedAttribute
 from render_order import RenderOrder
 
 if TYPE_CHECKING:
@@ -11,13 +12,22 @@ if TYPE_CHECKING:
 
 
 class Fighter(BaseComponent):
+    __slots__ = ("kind", "_hp", "_defense", "_power")
+
     parent: Actor
 
+    # the same for every fighter spawned from one prototype, see kinds.Kind
+    max_hp = SharedAttribute[int]()
+    base_defense = SharedAttribute[int]()
+    base_power = SharedAttribute[int]()
+
     def __init__(self, hp: int, base_defense: int, base_power: int):
-        self.max_hp = hp
+        self.kind = Kind(max_hp=hp, base_defense=base_defense, base_power=base_power)
         self._hp = hp
-        self.base_defense = base_defense
-        self.base_power = base_power
+
+        # defense and power including equipment, added up again after invalidate_stats
+        self._defense: Optional[int] = None
+        self._power: Optional[int] = None
 
     @property
     def hp(self) -> int:
@@ -28,14 +38,34 @@ class Fighter(BaseComponent):
         self._hp = max(0, min(value, self.max_hp))
         if self._hp == 0 and self.parent.ai:
             self.die()
+        else:
+            self.stats_changed()
 
     @property
     def defense(self) -> int:
-        return self.base_defense + self.defense_bonus
+        if self._defense is None:
+            self._defense = self.base_defense + self.defense_bonus
+        return self._defense
 
     @property
     def power(self) -> int:
-        return self.base_power + self.power_bonus
+        if self._power is None:
+            self._power = self.base_power + self.power_bonus
+        return self._power
+
+    def invalidate_stats(self) -> None:
+        """
+        Add up defense and power again the next time they're used.
+        Anything that changes the base stats or the equipment has to call this.
+        """
+        self._defense = None
+        self._power = None
+        self.stats_changed()
+
+    def stats_changed(self) -> None:
+        """Copy the changed stats into the map's entity store"""
+        if hasattr(self, "parent"):
+            self.parent.state_changed()
 
     @property
     def defense_bonus(self) -> int:
@@ -59,17 +89,22 @@ class Fighter(BaseComponent):
             death_message = f"{self.parent.name} is dead!"
             death_message_color = color.enemy_die
 
-        self.parent.char = '%'
-        self.parent.color = (191, 0, 0)
+        self.parent.kind = self.parent.kind.replace(
+            char='%', color=(191, 0, 0), name=f"remains of {self.parent.name}"
+        )
+        self.gamemap.remove_blocker(self.parent.x, self.parent.y)
         self.parent.blocks_movement = False
         self.parent.ai = None
-        self.parent.name = f"remains of {self.parent.name}"
         self.parent.render_order = RenderOrder.CORPSE
+        self.gamemap.entity_changed(self.parent)
 
         self.engine.message_log.add_message(death_message, death_message_color)
 
         self.engine.player.level.add_xp(self.parent.level.xp_given)
 
+        if self.engine.player is not self.parent:
+            self.gamemap.add_corpse(self.parent)
+
     def heal(self, amount: int) -> int:
         if self.hp == self.max_hp:
             return 0
@@ -1,18 +1,96 @@
 from __future__ import annotations
 
-from typing import List, TYPE_CHECKING
+from typing import Any, Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
 
 from components.base_component import BaseComponent
 
 if TYPE_CHECKING:
     from entity import Actor, Item
+    from kinds import Kind
+
+
+class ItemList(List["Item"]):
+    """
+    The items in an inventory, in the order they were picked up,
+    with the stackable ones also indexed by kind.
+    """
+
+    def __init__(self, items: Iterable[Item] = ()):
+        super().__init__(items)
+        # built on first use, as loading a save adds items before their state is set
+        self._by_kind: Optional[Dict[Kind, Item]] = None
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # the index is rebuilt after loading
+        return ItemList, (list(self),)
+
+    @property
+    def by_kind(self) -> Dict[Kind, Item]:
+        """The stack of each stackable kind of item"""
+        if self._by_kind is None:
+            self._by_kind = {}
+            for item in self:
+                if item.stackable:
+                    self._by_kind.setdefault(item.kind, item)
+        return self._by_kind
+
+    def append(self, item: Item) -> None:
+        super().append(item)
+        if self._by_kind is not None and item.stackable:
+            self._by_kind.setdefault(item.kind, item)
+
+    def remove(self, item: Item) -> None:
+        super().remove(item)
+        if self._by_kind is not None and self._by_kind.get(item.kind) is item:
+            del self._by_kind[item.kind]
+
 
 class Inventory(BaseComponent):
+    __slots__ = ("capacity", "_items")
+
     parent: Actor
 
     def __init__(self, capacity: int):
         self.capacity = capacity
-        self.items: List[Item] = []
+        self.items = []  # type: ignore
+
+    @property
+    def items(self) -> ItemList:
+        return self._items
+
+    @items.setter
+    def items(self, items: Iterable[Item]) -> None:
+        self._items = ItemList(items)
+
+    def has_room_for(self, item: Item) -> bool:
+        """Return True if the item fits in a free slot or onto a stack of its kind"""
+        return len(self.items) < self.capacity or self.stack_of(item) is not None
+
+    def stack_of(self, item: Item) -> Optional[Item]:
+        """Return the stack the item would join, or None"""
+        if not item.stackable:
+            return None
+        return self.items.by_kind.get(item.kind)
+
+    def add(self, item: Item) -> Item:
+        """
+        Put the item into the inventory, onto the stack of its kind if there is one.
+        Returns the item or the stack it was added to.
+        """
+        stack = self.stack_of(item)
+        if stack is not None and stack is not item:
+            stack.count += item.count
+            return stack
+        item.parent = self
+        self.items.append(item)
+        return item
+
+    def remove_one(self, item: Item) -> None:
+        """Take one item off its stack, removing the stack once it's empty"""
+        item.count -= 1
+        if item.count <= 0:
+            item.count = 1
+            self.items.remove(item)
 
     def drop(self, item: Item):
         """
@@ -20,6 +98,6 @@ class Inventory(BaseComponent):
         at the player's position
         """
         self.items.remove(item)
-        item.place(self.parent.x, self.parent.y, self.gamemap)
+        self.gamemap.add_item(item, self.parent.x, self.parent.y)
 
-        self.engine.message_log.add_message(f"You dropped the {item.name}.")
+        self.engine.message_log.add_message(f"You dropped the {item.display_name}.")
@@ -3,14 +3,22 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 from components.base_component import BaseComponent
+from kinds import Kind, SharedAttribute
 
 if TYPE_CHECKING:
     from entity import Actor
 
 
 class Level(BaseComponent):
+    __slots__ = ("kind", "current_level", "current_xp")
+
     parent: Actor
 
+    # the same for every actor spawned from one prototype, see kinds.Kind
+    level_up_base = SharedAttribute[int]()
+    level_up_factor = SharedAttribute[int]()
+    xp_given = SharedAttribute[int]()
+
     def __init__(
         self,
         current_level: int = 1,
@@ -19,11 +27,13 @@ class Level(BaseComponent):
         level_up_factor: int = 150,
         xp_given: int = 0,
     ):
+        self.kind = Kind(
+            level_up_base=level_up_base,
+            level_up_factor=level_up_factor,
+            xp_given=xp_given,
+        )
         self.current_level = current_level
         self.current_xp = current_xp
-        self.level_up_base = level_up_base
-        self.level_up_factor = level_up_factor
-        self.xp_given = xp_given
 
     @property
     def experience_to_next_level(self) -> int:
@@ -61,6 +71,7 @@ class Level(BaseComponent):
 
     def increase_power(self, amount: int = 1) -> None:
         self.parent.fighter.base_power += amount
+        self.parent.fighter.invalidate_stats()
 
         self.engine.message_log.add_message("You feel stronger!")
 
@@ -68,6 +79,7 @@ class Level(BaseComponent):
 
     def increase_defense(self, amount: int = 1) -> None:
         self.parent.fighter.base_defense += amount
+        self.parent.fighter.invalidate_stats()
 
         self.engine.message_log.add_message(
             "You're getting tougher, more steadfast!")
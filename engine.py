@@ -1,10 +1,13 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import time
+from typing import Any, Dict, List, Optional, Set, TYPE_CHECKING
 
 from tcod.console import Console
 import tcod
 
+from blackboard import Blackboard
+from components.ai import ai_idle_radius
 import exceptions
 from message_log import MessageLog
 import render_functions
@@ -14,6 +17,15 @@ import pickle
 if TYPE_CHECKING:
     from entity import Actor
     from game_map import GameMap, GameWorld
+    from parallel_ai import ProcessPoolAI
+
+# seconds the enemies may spend on expensive decisions like pathfinding each turn,
+# anything over is deferred to the next turn, None means no limit.
+# It's off unless set, as which enemies get deferred depends on how fast the machine
+# is, so the same seed could play out differently
+enemy_turn_budget: Optional[float] = None
+# the budget the game is played with, see setup_game.new_game
+game_enemy_turn_budget = 0.008
 
 
 class Engine:
@@ -24,14 +36,87 @@ class Engine:
         self.message_log = MessageLog()
         self.mouse_location = (0, 0)
         self.player = player
-
-    def handle_enemy_turns(self) -> None:
-        for entity in set(self.game_map.actors) - {self.player}:
-            if entity.ai:
-                try:
-                    entity.ai.perform()
-                except exceptions.Impossible:
-                    pass  # ignore impossible action exceptions from ai
+        self.turn = 0  # how many times the enemies have taken their turns
+
+        self.enemy_turn_budget = enemy_turn_budget
+        self.turn_deadline: Optional[float] = None  # when the enemies' time is up
+        self.deferred_actors: List[Actor] = []  # these think first on the next turn
+        self.deferred_decisions = 0  # decisions deferred during the last turn
+        # the enemies within ai_idle_radius of the player on the last turn,
+        # everything further away is dormant and skipped
+        self.active_actors: Set[Actor] = set()
+
+        # shared by the enemies, only while they take their turns
+        self.blackboard: Optional[Blackboard] = None
+
+        # when set, the enemy decisions are made across this process pool
+        self.ai_pool: Optional[ProcessPoolAI] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Leave out the process pool, which can't be saved"""
+        state = self.__dict__.copy()
+        state["ai_pool"] = None
+        return state
+
+    def handle_enemy_turns(self) -> int:
+        """
+        Let every enemy take its turn, within the enemy turn budget.
+        Returns how many decisions were deferred to the next turn.
+        """
+        # the player's turn may have changed which tiles are blocked
+        self.game_map.invalidate_movement_cost()
+        self.game_map.update_scent(self.player.x, self.player.y)
+        self.turn += 1
+        self.blackboard = Blackboard(self)
+
+        if self.enemy_turn_budget is None:
+            self.turn_deadline = None
+        else:
+            self.turn_deadline = time.perf_counter() + self.enemy_turn_budget
+        self.deferred_decisions = 0
+
+        player = self.player
+        enemies = set(self.game_map.actors_within(player.x, player.y, ai_idle_radius))
+        enemies.discard(player)
+        # the enemies which went out of range fall asleep, as they would have
+        # in BaseAI.should_think
+        for actor in self.active_actors - enemies:
+            if actor.ai:
+                actor.ai.awake = False
+        self.active_actors = enemies
+        # the enemies which ran out of time last turn go first
+        deferred = [actor for actor in self.deferred_actors if actor in enemies]
+        self.deferred_actors = []
+
+        ordered = deferred + list(enemies.difference(deferred))
+        if self.ai_pool is not None:
+            self.ai_pool.take_turns(self, [
+                entity for entity in ordered
+                if entity.ai and entity.ai.should_think(self.turn)
+            ])
+        else:
+            for entity in ordered:
+                if entity.ai and entity.ai.should_think(self.turn):
+                    try:
+                        entity.ai.perform()
+                    except exceptions.Impossible:
+                        pass  # ignore impossible action exceptions from ai
+
+        self.turn_deadline = None
+        self.blackboard = None
+        return self.deferred_decisions
+
+    def try_think(self, actor: Actor) -> bool:
+        """
+        Return True if there is time left this turn for an expensive AI decision.
+        Otherwise the actor is queued to decide first next turn, and False is returned.
+        """
+        if self.turn_deadline is None or time.perf_counter() < self.turn_deadline:
+            return True
+        self.deferred_decisions += 1
+        if actor not in self.deferred_actors:
+            self.deferred_actors.append(actor)
+        return False
 
     def update_fov(self) -> None:
         """Recompute the visible area based on the players point of view."""
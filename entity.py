@@ -2,8 +2,9 @@ from __future__ import annotations
 
 import copy
 import math
-from typing import Optional, Tuple, Type, TypeVar, TYPE_CHECKING, Union
+from typing import Any, Dict, Optional, Tuple, Type, TypeVar, TYPE_CHECKING, Union
 
+from kinds import Kind, SharedAttribute
 from render_order import RenderOrder
 
 if TYPE_CHECKING:
@@ -18,13 +19,37 @@ if TYPE_CHECKING:
 
 T = TypeVar("T", bound="Entity")
 
+_next_id = 1  # the id new_id hands out next
+
+
+def new_id() -> int:
+    """Return an entity id no other entity has"""
+    global _next_id
+    entity_id = _next_id
+    _next_id += 1
+    return entity_id
+
+
+def reserve_id(entity_id: int) -> None:
+    """Make sure new_id never hands out an id which a loaded entity already has"""
+    global _next_id
+    _next_id = max(_next_id, entity_id + 1)
+
 
 class Entity:
     '''
     A generic object to represent players, enemies, items, etc.
     '''
+    # floors can hold thousands of entities, slots keep each one small
+    __slots__ = ("parent", "id", "kind", "x", "y", "blocks_movement", "render_order")
+
     parent: Union[GameMap, Inventory]
 
+    # the same for every entity spawned from one prototype, see kinds.Kind
+    char = SharedAttribute[str]()
+    color = SharedAttribute[Tuple[int, int, int]]()
+    name = SharedAttribute[str]()
+
     def __init__(
         self,
         parent: Optional[GameMap] = None,
@@ -36,11 +61,10 @@ class Entity:
         blocks_movement: bool = False,
         render_order: RenderOrder = RenderOrder.CORPSE,
     ):
+        self.id = new_id()  # see GameMap.get_entity
+        self.kind = Kind(char=char, color=color, name=name)
         self.x = x
         self.y = y
-        self.char = char
-        self.color = color
-        self.name = name
         self.blocks_movement = blocks_movement
         self.render_order = render_order
         if parent:
@@ -48,6 +72,18 @@ class Entity:
             self.parent = parent
             parent.entities.add(self)
 
+    def __setstate__(
+        self, state: Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]
+    ) -> None:
+        """Restore a pickled or copied entity, keeping its id out of new_id's way"""
+        instance_dict, slots = state
+        if instance_dict:
+            # attributes of subclasses which don't use __slots__
+            self.__dict__.update(instance_dict)
+        for name, value in (slots or {}).items():
+            setattr(self, name, value)
+        reserve_id(self.id)
+
     @property
     def gamemap(self) -> GameMap:
         return self.parent.gamemap
@@ -55,22 +91,40 @@ class Entity:
     def spawn(self: T, gamemap: GameMap, x: int, y: int) -> T:
         """Spawn a copy of this instance at the given location"""
         clone = copy.deepcopy(self)
+        clone.id = new_id()
         clone.x = x
         clone.y = y
         clone.parent = gamemap
         gamemap.entities.add(clone)
+        if clone.blocks_movement:
+            gamemap.add_blocker(x, y)
         return clone
 
     def place(self, x: int, y: int, gamemap: Optional[GameMap] = None) -> None:
         """place this entity at a new location. Handles moving across GameMaps"""
+        on_map = hasattr(self, "parent") and self.parent is self.gamemap
+        if on_map and self.blocks_movement:
+            self.gamemap.remove_blocker(self.x, self.y)
+        if gamemap and on_map:
+            # before moving, so the map unindexes the entity where it was
+            self.gamemap.entities.remove(self)
+
         self.x = x
         self.y = y
         if gamemap:
-            if hasattr(self, "parent"):  # possibly uninitialized
-                if self.parent is self.gamemap:
-                    self.gamemap.entities.remove(self)
             self.parent = gamemap
             gamemap.entities.add(self)
+            on_map = True
+
+        if on_map and self.blocks_movement:
+            self.gamemap.add_blocker(x, y)
+        if on_map:
+            self.gamemap.entity_moved(self)
+
+    def state_changed(self) -> None:
+        """Copy this entity's stats and flags into its map's entity store"""
+        if hasattr(self, "parent") and self.parent is self.gamemap:
+            self.gamemap.entity_changed(self)
 
     def distance(self, x: int, y: int) -> float:
         """
@@ -80,11 +134,20 @@ class Entity:
 
     def move(self, dx: int, dy: int) -> None:
         # move the entity by a given amount
+        on_map = self.blocks_movement and hasattr(self, "parent")
+        if on_map:
+            # keep the shared ai movement costs up to date
+            self.gamemap.remove_blocker(self.x, self.y)
+            self.gamemap.add_blocker(self.x + dx, self.y + dy)
         self.x += dx
         self.y += dy
+        if on_map:
+            self.gamemap.entity_moved(self)
 
 
 class Actor(Entity):
+    __slots__ = ("ai", "equipment", "fighter", "inventory", "level")
+
     def __init__(
         self,
         *,
@@ -132,6 +195,8 @@ class Actor(Entity):
 
 
 class Item(Entity):
+    __slots__ = ("consumable", "equippable", "count")
+
     def __init__(
         self,
         *,
@@ -142,6 +207,7 @@ class Item(Entity):
         name: str = "<Unnamed>",
         consumable: Optional[Consumable] = None,
         equippable: Optional[Equippable] = None,
+        count: int = 1,
     ):
         super().__init__(
             x=x,
@@ -160,3 +226,18 @@ class Item(Entity):
         self.equippable = equippable
         if self.equippable:
             self.equippable.parent = self
+
+        self.count = count  # how many of this item the stack holds, see stackable
+
+    @property
+    def stackable(self) -> bool:
+        """
+        Whether items of this kind stack, as a count on one item, in inventories
+        and in piles on the ground. Consumables stack, equipment never does.
+        """
+        return self.consumable is not None and self.equippable is None
+
+    @property
+    def display_name(self) -> str:
+        """The name with the stack size, for stacks of more than one"""
+        return f"{self.name} (x{self.count})" if self.count > 1 else self.name
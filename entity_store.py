@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+
+from entity import Actor, Item
+
+if TYPE_CHECKING:
+    from entity import Entity
+
+# bits of EntityStore.flags
+BLOCKS = 1  # blocks movement
+ACTOR = 2
+ALIVE = 4  # a living actor
+ITEM = 8
+
+
+class EntityStore:
+    """
+    The positions, combat stats and flags of a map's entities kept in numpy arrays,
+    one row per entity, so systems that look at every entity on a floor can work
+    on whole arrays instead of looping over GameMap.entities.
+    The entities still own their state, the store is a copy of it that GameMap
+    keeps up to date as entities move, fight and die.
+    Rows are in the order of `entities`, entities without a fighter have
+    zeroed stats.
+    """
+
+    def __init__(self, entities: Iterable[Entity]):
+        self.entities: List[Entity] = list(entities)
+        self.rows: Dict[Entity, int] = {
+            entity: row for row, entity in enumerate(self.entities)
+        }
+
+        size = len(self.entities)
+        self.x = np.zeros(size, dtype=np.intc)
+        self.y = np.zeros(size, dtype=np.intc)
+        self.hp = np.zeros(size, dtype=np.intc)
+        self.max_hp = np.zeros(size, dtype=np.intc)
+        self.power = np.zeros(size, dtype=np.intc)
+        self.defense = np.zeros(size, dtype=np.intc)
+        self.render_order = np.zeros(size, dtype=np.int8)
+        self.flags = np.zeros(size, dtype=np.uint8)
+
+        for row, entity in enumerate(self.entities):
+            self.fill(row, entity)
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def fill(self, row: int, entity: Entity) -> None:
+        """Copy everything the store keeps about an entity into its row"""
+        self.x[row] = entity.x
+        self.y[row] = entity.y
+        self.render_order[row] = entity.render_order.value
+
+        flags = BLOCKS if entity.blocks_movement else 0
+        if isinstance(entity, Actor):
+            flags |= ACTOR
+            if entity.is_alive:
+                flags |= ALIVE
+            fighter = entity.fighter
+            self.hp[row] = fighter.hp
+            self.max_hp[row] = fighter.max_hp
+            self.power[row] = fighter.power
+            self.defense[row] = fighter.defense
+        elif isinstance(entity, Item):
+            flags |= ITEM
+        self.flags[row] = flags
+
+    def refresh(self, entity: Entity) -> None:
+        """Copy an entity's current state into the store, if it has a row"""
+        row = self.rows.get(entity)
+        if row is not None:
+            self.fill(row, entity)
+
+    def move(self, entity: Entity) -> None:
+        """Copy just an entity's position into the store, if it has a row"""
+        row = self.rows.get(entity)
+        if row is not None:
+            self.x[row] = entity.x
+            self.y[row] = entity.y
+
+    def mask(self, flags: int) -> np.ndarray:
+        """Return a boolean array of the rows which have every one of the flags set"""
+        return (self.flags & flags) == flags
+
+    def select(self, rows: Iterable[int]) -> List[Entity]:
+        """Return the entities of the given rows"""
+        return [self.entities[row] for row in rows]
@@ -0,0 +1,175 @@
+"""
+Keep generated floors on disk, so a floor can be loaded instead of generated again.
+
+A floor only depends on the world seed, the floor number and the GameWorld settings,
+so those make up the cache key. The source of the modules that decide what a floor
+looks like is part of the key as well, so editing them invalidates the cache.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+
+from entity import Entity
+import entity_factories
+from game_map import GameMap
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+# modules whose source decides what a generated floor looks like
+VERSIONED_MODULES = ("procgen.py", "tile_types.py", "entity_factories.py")
+
+_version: Optional[str] = None
+
+
+def cache_version() -> str:
+    """
+    Return a hash of procgen.LAYOUT_VERSION and the source of every module in
+    VERSIONED_MODULES. Builds which only ship bytecode have no source to hash,
+    so missing modules are left out and the layout version stands in for them.
+    """
+    global _version
+    if _version is None:
+        from procgen import LAYOUT_VERSION
+
+        digest = hashlib.sha1(str(LAYOUT_VERSION).encode())
+        here = os.path.dirname(os.path.abspath(__file__))
+        for module in VERSIONED_MODULES:
+            try:
+                with open(os.path.join(here, module), "rb") as f:
+                    digest.update(f.read())
+            except FileNotFoundError:
+                continue
+        _version = digest.hexdigest()
+    return _version
+
+
+def spawnable_entities() -> Dict[str, str]:
+    """Map the name of every entity in entity_factories to its attribute name"""
+    return {
+        entity.name: attribute
+        for attribute, entity in vars(entity_factories).items()
+        if isinstance(entity, Entity)
+    }
+
+
+class FloorCache:
+    """
+    Stores each floor as a directory holding its tiles and distance map as .npy files,
+    which can be memory mapped, and a json file with the rooms, stairs and spawns.
+    The least recently used floors are removed once the cache grows past `max_bytes`.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, **params: Any) -> str:
+        """Return the cache key for a floor generated with these parameters"""
+        params["version"] = cache_version()
+        return hashlib.sha1(
+            json.dumps(params, sort_keys=True).encode()
+        ).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def load(self, key: str, engine: Engine) -> Optional[GameMap]:
+        """
+        Return the cached floor for `key`, with its entities spawned
+        and the player placed at the start.
+        Returns None if the floor isn't cached.
+        """
+        from procgen import RectangularRoom
+
+        path = self.path(key)
+        try:
+            with open(os.path.join(path, "floor.json")) as f:
+                floor = json.load(f)
+            tiles = np.load(os.path.join(path, "tiles.npy"), mmap_mode="r")
+            start_distance = np.load(
+                os.path.join(path, "start_distance.npy"), mmap_mode="r"
+            )
+        except (OSError, ValueError):
+            return None  # missing, or removed while it was being read
+        os.utime(path)  # mark as recently used
+
+        width, height = tiles.shape
+        dungeon = GameMap(engine, width, height, entities=[engine.player])
+        dungeon.tiles[...] = tiles
+        dungeon.start_distance = np.array(start_distance, order="F")
+        dungeon.rooms = [RectangularRoom(x1, y1, x2 - x1, y2 - y1)
+                         for x1, y1, x2, y2 in floor["rooms"]]
+        dungeon.room_links = [(a, b) for a, b in floor.get("room_links", [])]
+        dungeon.downstairs_location = tuple(floor["downstairs_location"])
+        dungeon.layout = floor["layout"]
+
+        if dungeon.rooms:
+            engine.player.place(*dungeon.rooms[0].center, dungeon)
+        for attribute, x, y in floor["spawns"]:
+            getattr(entity_factories, attribute).spawn(dungeon, x, y)
+
+        return dungeon
+
+    def store(self, key: str, dungeon: GameMap) -> None:
+        """Write a freshly generated floor to the cache"""
+        if dungeon.layout is None or dungeon.start_distance is None:
+            return  # not generated from a seed, so it can't be reproduced
+
+        spawnable = spawnable_entities()
+        spawns: List[List[Any]] = [
+            [spawnable[entity.name], entity.x, entity.y]
+            for entity in dungeon.entities
+            if entity is not dungeon.engine.player
+        ]
+        floor = {
+            "rooms": [[room.x1, room.y1, room.x2, room.y2] for room in dungeon.rooms],
+            "room_links": [list(link) for link in dungeon.room_links],
+            "downstairs_location": list(dungeon.downstairs_location),
+            "layout": dungeon.layout,
+            "spawns": spawns,
+        }
+
+        os.makedirs(self.directory, exist_ok=True)
+        # write into a temporary directory first, so a floor is never half written
+        temp_path = tempfile.mkdtemp(dir=self.directory, prefix=".tmp-")
+        try:
+            np.save(os.path.join(temp_path, "tiles.npy"), dungeon.tiles)
+            np.save(
+                os.path.join(temp_path, "start_distance.npy"), dungeon.start_distance
+            )
+            with open(os.path.join(temp_path, "floor.json"), "w") as f:
+                json.dump(floor, f)
+            os.replace(temp_path, self.path(key))
+        except OSError:
+            # another process cached the same floor first
+            shutil.rmtree(temp_path, ignore_errors=True)
+
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used floors until the cache fits in max_bytes"""
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(path))
+                entries.append((os.path.getmtime(path), size, path))
+            except OSError:
+                continue  # removed by another process
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
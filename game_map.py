@@ -1,17 +1,212 @@
 from __future__ import annotations
 from html.entities import entitydefs
 
-from typing import Iterable, Iterator, Optional, TYPE_CHECKING
+import heapq
+import random
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, TYPE_CHECKING
 
 import numpy as np  # type: ignore
 from tcod.console import Console
 
 from entity import Actor, Item
+from entity_store import ALIVE, EntityStore
+from kinds import Kind
 import tile_types
 
 if TYPE_CHECKING:
     from engine import Engine
     from entity import Entity
+    from floor_cache import FloorCache
+    from procgen import RectangularRoom
+
+# the eight tiles around a position
+NEIGHBORS = [(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
+
+# the player's scent, see GameMap.update_scent
+# each turn scent spreads to the tiles around it weakened by scent_spread,
+# then all of it fades by scent_decay, and anything weaker than scent_minimum is gone
+scent_spread = 0.9
+scent_decay = 0.95
+scent_minimum = 0.001
+
+
+class EntitySet(set):
+    """
+    The set of entities on a map, which also indexes them by id and keeps
+    its living actors, dead actors and items in sets of their own.
+    The living actors, blocking entities and items are also indexed by their
+    tile, and stackable items by their tile and kind, as a pile.
+    Adding or removing an entity invalidates its map's entity store.
+    """
+
+    def __init__(self, entities: Iterable[Entity] = ()):
+        super().__init__(entities)
+        self.game_map: Optional[GameMap] = None
+        # the indexes are built on first use,
+        # as loading a save adds entities before their state is set
+        self._by_id: Optional[Dict[int, Entity]] = None
+        self._living: Set[Actor] = set()
+        self._dead: Set[Actor] = set()
+        self._items: Set[Item] = set()
+        self._actors_at: Dict[Tuple[int, int], List[Actor]] = {}
+        self._blockers_at: Dict[Tuple[int, int], List[Entity]] = {}
+        self._items_at: Dict[Tuple[int, int], List[Item]] = {}
+        self._piles: Dict[Tuple[int, int, Kind], Item] = {}
+        # the tile each entity was filed under, and the kind of each item
+        self._filed: Dict[Entity, Tuple[int, int, Optional[Kind]]] = {}
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # the indexes are rebuilt after loading, and the map sets itself again
+        return EntitySet, (list(self),)
+
+    def _index(self) -> None:
+        if self._by_id is None:
+            self._by_id = {}
+            for entity in self:
+                self._index_entity(entity)
+
+    def _index_entity(self, entity: Entity) -> None:
+        self._by_id[entity.id] = entity  # type: ignore
+        if isinstance(entity, Actor):
+            (self._living if entity.is_alive else self._dead).add(entity)
+        elif isinstance(entity, Item):
+            self._items.add(entity)
+        self._file(entity)
+
+    def _unindex_entity(self, entity: Entity) -> None:
+        del self._by_id[entity.id]  # type: ignore
+        self._living.discard(entity)  # type: ignore
+        self._dead.discard(entity)  # type: ignore
+        self._items.discard(entity)  # type: ignore
+        self._unfile(entity)
+
+    def _file(self, entity: Entity) -> None:
+        """Add the entity to the tile indexes it belongs in"""
+        xy = entity.x, entity.y
+        kind = None
+        if isinstance(entity, Actor) and entity.is_alive:
+            self._actors_at.setdefault(xy, []).append(entity)
+        elif isinstance(entity, Item):
+            kind = entity.kind
+            self._items_at.setdefault(xy, []).append(entity)
+            if entity.stackable:
+                self._piles.setdefault((*xy, kind), entity)
+        if entity.blocks_movement:
+            self._blockers_at.setdefault(xy, []).append(entity)
+        self._filed[entity] = (*xy, kind)
+
+    def _unfile(self, entity: Entity) -> None:
+        """Take the entity out of the tile indexes, from where it was filed"""
+        x, y, kind = self._filed.pop(entity)
+        for index in (self._actors_at, self._blockers_at, self._items_at):
+            entities = index.get((x, y))
+            if entities and entity in entities:
+                entities.remove(entity)
+                if not entities:
+                    del index[x, y]
+        if kind is not None and self._piles.get((x, y, kind)) is entity:
+            del self._piles[x, y, kind]
+
+    @property
+    def by_id(self) -> Dict[int, Entity]:
+        self._index()
+        return self._by_id  # type: ignore
+
+    @property
+    def living(self) -> Set[Actor]:
+        """The actors which were alive when they were added or last refiled"""
+        self._index()
+        return self._living
+
+    @property
+    def dead(self) -> Set[Actor]:
+        self._index()
+        return self._dead
+
+    @property
+    def items(self) -> Set[Item]:
+        self._index()
+        return self._items
+
+    @property
+    def actors_at(self) -> Dict[Tuple[int, int], List[Actor]]:
+        """The living actors on each tile which has any"""
+        self._index()
+        return self._actors_at
+
+    @property
+    def blockers_at(self) -> Dict[Tuple[int, int], List[Entity]]:
+        """The entities blocking movement on each tile which has any"""
+        self._index()
+        return self._blockers_at
+
+    @property
+    def items_at(self) -> Dict[Tuple[int, int], List[Item]]:
+        """The items on each tile which has any"""
+        self._index()
+        return self._items_at
+
+    @property
+    def piles(self) -> Dict[Tuple[int, int, Kind], Item]:
+        """The stackable items by their tile and kind"""
+        self._index()
+        return self._piles
+
+    def moved(self, entity: Entity) -> None:
+        """File an entity under its new tile, after it moved"""
+        if self._by_id is not None and entity in self._filed:
+            self._unfile(entity)
+            self._file(entity)
+
+    def refile(self, entity: Entity) -> None:
+        """
+        File an entity again after its flags changed, like an actor
+        moving from the living to the dead when it dies
+        """
+        if self._by_id is None or entity not in self:
+            return
+        if isinstance(entity, Actor):
+            if entity.is_alive:
+                self._dead.discard(entity)
+                self._living.add(entity)
+            else:
+                self._living.discard(entity)
+                self._dead.add(entity)
+        self._unfile(entity)
+        self._file(entity)
+
+    def changed(self) -> None:
+        if self.game_map is not None:
+            self.game_map.invalidate_entity_store()
+
+    def add(self, entity: Entity) -> None:
+        super().add(entity)
+        if self._by_id is not None:
+            self._index_entity(entity)
+        self.changed()
+
+    def remove(self, entity: Entity) -> None:
+        super().remove(entity)
+        if self._by_id is not None:
+            self._unindex_entity(entity)
+        self.changed()
+
+    def discard(self, entity: Entity) -> None:
+        if entity in self:
+            self.remove(entity)
+
+    def update(self, *others: Iterable[Entity]) -> None:  # type: ignore
+        for entities in others:
+            for entity in entities:
+                self.add(entity)
+
+    def clear(self) -> None:
+        super().clear()
+        self._by_id = None
+        self._living, self._dead, self._items = set(), set(), set()
+        self._actors_at, self._blockers_at, self._items_at = {}, {}, {}
+        self._piles, self._filed = {}, {}
+        self.changed()
 
 
 class GameMap:
@@ -20,7 +215,8 @@ class GameMap:
     ):
         self.engine = engine
         self.width, self.height = width, height
-        self.entities = set(entities)
+        self._entity_store: Optional[EntityStore] = None
+        self.entities = entities  # type: ignore
         self.tiles = np.full(
             (width, height), fill_value=tile_types.wall, order="F")
 
@@ -33,37 +229,366 @@ class GameMap:
 
         self.downstairs_location = (0, 0)
 
+        # how strongly each tile smells of the player, see update_scent
+        self.scent = np.zeros((width, height), dtype=np.float32, order="F")
+
+        # the corpse on each tile as an index into corpse_kinds, or -1, see add_corpse
+        self.corpses = np.full((width, height), fill_value=-1, dtype=np.int16, order="F")
+        self.corpse_kinds: List[Kind] = []  # the glyph, color and name of each corpse
+
+        self.rooms: List[RectangularRoom] = []  # set by procgen
+
+        # pairs of indices into self.rooms joined directly by a tunnel, set by procgen
+        self.room_links: List[Tuple[int, int]] = []
+
+        # walking distance of each tile from the player's start, set by procgen
+        # unreachable tiles hold the maximum value of the array
+        self.start_distance: Optional[np.ndarray] = None
+
+        # the procgen settings and seed which dig this map's tiles, set by procgen
+        # when this is set, saves keep only the tiles that differ from a rebuild
+        self.layout: Optional[Dict[str, Any]] = None
+
+        self._movement_cost: Optional[np.ndarray] = None
+        self._room_index: Optional[np.ndarray] = None
+        self._room_graph: Optional[Dict[int, List[int]]] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        Leave out everything that can be rebuilt from the layout seed,
+        keeping only the tiles which differ from the rebuilt ones.
+        A layout dug by another procgen.LAYOUT_VERSION couldn't be rebuilt the same,
+        so those maps are saved in full.
+        """
+        from procgen import LAYOUT_VERSION, rebuild_tiles
+
+        state = self.__dict__.copy()
+        if self.layout is not None and self.layout.get("version") == LAYOUT_VERSION:
+            rebuilt = GameMap(self.engine, self.width, self.height)
+            rebuilt.layout = self.layout
+            rebuild_tiles(rebuilt)
+
+            changed = np.nonzero(self.tiles != rebuilt.tiles)
+            state["tiles_delta"] = (changed, self.tiles[changed])
+            state["tiles"] = None
+            state["rooms"] = []
+            state["room_links"] = []
+            state["start_distance"] = None
+        state["_movement_cost"] = None
+        state["_room_index"] = None
+        state["_room_graph"] = None
+        state["_entity_store"] = None
+        state["scent"] = None  # only a trail for the next few turns
+        # most tiles have no corpse, so only the ones that do are kept
+        corpses = np.nonzero(self.corpses >= 0)
+        state["corpses"] = (corpses, self.corpses[corpses])
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Rebuild anything that was left out of a save"""
+        tiles_delta = state.pop("tiles_delta", None)
+        corpses, corpse_indices = state.pop("corpses")
+        self.__dict__.update(state)
+        self._entities.game_map = self
+        self.scent = np.zeros((self.width, self.height), dtype=np.float32, order="F")
+        self.corpses = np.full(
+            (self.width, self.height), fill_value=-1, dtype=np.int16, order="F")
+        self.corpses[corpses] = corpse_indices
+        if tiles_delta is not None:
+            from procgen import LAYOUT_VERSION, rebuild_tiles
+
+            if self.layout["version"] != LAYOUT_VERSION:
+                raise ValueError(
+                    "This save was made by a different version of the map generator.")
+            rebuild_tiles(self)
+
+            changed, tiles = tiles_delta
+            self.tiles[changed] = tiles
+
     @property
     def gamemap(self) -> GameMap:
         return self
 
+    @property
+    def entities(self) -> EntitySet:
+        return self._entities
+
+    @entities.setter
+    def entities(self, entities: Iterable[Entity]) -> None:
+        self._entities = EntitySet(entities)
+        self._entities.game_map = self
+        self.invalidate_entity_store()
+
+    def get_entity(self, entity_id: int) -> Optional[Entity]:
+        """Return the entity on this map with the given id, or None"""
+        return self.entities.by_id.get(entity_id)
+
+    @property
+    def movement_cost(self) -> np.ndarray:
+        """
+        The cost of walking onto each tile, shared read-only by every AI pathfinder.
+        Walls are 0, open floor is 1 and every blocking entity on a tile adds 10.
+        It's built on first use and kept up to date as blocking entities move,
+        anything else that changes which tiles are blocked should call
+        `invalidate_movement_cost`.
+        """
+        if self._movement_cost is None:
+            # copy the walkable array, wide enough for many blockers stacked on a tile
+            cost = np.array(self.tiles["walkable"], dtype=np.int16)
+
+            for entity in self.entities:
+                # check that an entity blocks movement and the cost isn't zero (blocking)
+                if entity.blocks_movement and cost[entity.x, entity.y]:
+                    # add to the cost of a blocked position
+                    # a lower number means more enemies will crowd behind each other in
+                    # hallways. a higher number means enemies will take longer paths in
+                    # order to surround the player
+                    cost[entity.x, entity.y] += 10
+
+            self._movement_cost = cost
+        return self._movement_cost
+
+    def invalidate_movement_cost(self) -> None:
+        """Rebuild the movement cost array the next time it's used"""
+        self._movement_cost = None
+
+    def add_blocker(self, x: int, y: int) -> None:
+        """Update the movement cost for a blocking entity arriving at a tile"""
+        if self._movement_cost is not None and self._movement_cost[x, y]:
+            self._movement_cost[x, y] += 10
+
+    def remove_blocker(self, x: int, y: int) -> None:
+        """Update the movement cost for a blocking entity leaving a tile"""
+        if self._movement_cost is not None and self._movement_cost[x, y]:
+            assert self._movement_cost[x, y] > 10, f"no blocker to remove at {x}, {y}"
+            self._movement_cost[x, y] -= 10
+
+    @property
+    def room_index(self) -> np.ndarray:
+        """
+        The index into self.rooms of the room each tile is in, or -1 outside of rooms.
+        It's built on first use, after procgen has set the rooms.
+        """
+        if self._room_index is None:
+            index = np.full((self.width, self.height), -1, dtype=np.int16, order="F")
+            for i, room in enumerate(self.rooms):
+                index[room.inner] = i
+            self._room_index = index
+        return self._room_index
+
+    def room_at(self, x: int, y: int) -> Optional[int]:
+        """Return the index of the room at x, y, or None for tunnels and walls"""
+        i = int(self.room_index[x, y])
+        return i if i >= 0 else None
+
+    def room_route(self, start: int, goal: int) -> List[int]:
+        """
+        Return the rooms to walk through to get from the start room to the goal room,
+        including both, by the shortest distance between room centers.
+        Returns an empty list if there is no way through the room links.
+        """
+        if self._room_graph is None:
+            graph: Dict[int, List[int]] = {}
+            for a, b in self.room_links:
+                graph.setdefault(a, []).append(b)
+                graph.setdefault(b, []).append(a)
+            self._room_graph = graph
+
+        # dijkstra over the room graph, which only has a few dozen nodes
+        previous: Dict[int, int] = {start: start}
+        distance = {start: 0}
+        queue = [(0, start)]
+        while queue:
+            cost, room = heapq.heappop(queue)
+            if room == goal:
+                break
+            if cost > distance[room]:
+                continue
+            x, y = self.rooms[room].center
+            for neighbor in self._room_graph.get(room, []):
+                neighbor_x, neighbor_y = self.rooms[neighbor].center
+                new_cost = cost + max(abs(neighbor_x - x), abs(neighbor_y - y))
+                if new_cost < distance.get(neighbor, new_cost + 1):
+                    distance[neighbor] = new_cost
+                    previous[neighbor] = room
+                    heapq.heappush(queue, (new_cost, neighbor))
+
+        if goal not in previous:
+            return []
+        route = [goal]
+        while route[-1] != start:
+            route.append(previous[route[-1]])
+        return route[::-1]
+
     @property
     def actors(self) -> Iterator[Actor]:
         """Iterate over this maps living actors"""
-        yield from(
-            entity
-            for entity in self.entities
-            if (
-                isinstance(entity, Actor)
-                and entity.is_alive
-            )
+        yield from (actor for actor in self.entities.living if actor.is_alive)
+
+    @property
+    def dead_actors(self) -> Iterator[Actor]:
+        """Iterate over the dead actors still on this map, like the player after dying"""
+        yield from self.entities.dead
+
+    @property
+    def entity_store(self) -> EntityStore:
+        """
+        This maps entities as arrays, for systems which look at every entity at once.
+        It's built on first use and kept up to date as entities move, fight and die,
+        adding or removing entities rebuilds it.
+        """
+        if self._entity_store is None:
+            self._entity_store = EntityStore(self.entities)
+        return self._entity_store
+
+    def invalidate_entity_store(self) -> None:
+        """Rebuild the entity store the next time it's used"""
+        self._entity_store = None
+
+    def entity_moved(self, entity: Entity) -> None:
+        """Update the tile indexes and the entity store for an entity which moved on this map"""
+        self.entities.moved(entity)
+        if self._entity_store is not None:
+            self._entity_store.move(entity)
+
+    def entity_changed(self, entity: Entity) -> None:
+        """Update the indexes and the entity store for an entity whose stats or flags changed"""
+        self.entities.refile(entity)
+        if self._entity_store is not None:
+            self._entity_store.refresh(entity)
+
+    def actors_in_radius(self, x: int, y: int, radius: float) -> List[Actor]:
+        """Return every living actor within radius tiles of x, y, by straight distance"""
+        store = self.entity_store
+        distances = (store.x - x) ** 2 + (store.y - y) ** 2
+        inside = store.mask(ALIVE) & (distances <= radius ** 2)
+        return store.select(np.flatnonzero(inside))  # type: ignore
+
+    def actors_within(self, x: int, y: int, distance: int) -> List[Actor]:
+        """
+        Return every living actor at most `distance` tiles from x, y,
+        counting diagonal steps as one tile
+        """
+        store = self.entity_store
+        inside = (
+            store.mask(ALIVE)
+            & (np.abs(store.x - x) <= distance)
+            & (np.abs(store.y - y) <= distance)
         )
+        return store.select(np.flatnonzero(inside))  # type: ignore
+
+    def nearest_visible_actor(
+        self, x: int, y: int, max_distance: float, exclude: Optional[Actor] = None
+    ) -> Optional[Actor]:
+        """
+        Return the living actor on a visible tile closest to x, y by straight distance,
+        if it's closer than max_distance, leaving out `exclude`.
+        Returns None when there's no such actor.
+        """
+        store = self.entity_store
+        distances = ((store.x - x) ** 2 + (store.y - y) ** 2).astype(np.float64)
+        candidates = store.mask(ALIVE) & self.visible[store.x, store.y]
+        distances[~candidates | (distances >= max_distance ** 2)] = np.inf
+        if exclude in store.rows:
+            distances[store.rows[exclude]] = np.inf  # type: ignore
+        if not np.isfinite(distances).any():
+            return None
+        return store.entities[int(np.argmin(distances))]  # type: ignore
 
     @property
     def items(self) -> Iterator[Item]:
-        yield from (entity for entity in self.entities if isinstance(entity, Item))
+        yield from self.entities.items
+
+    def update_scent(self, x: int, y: int) -> None:
+        """
+        Spread and fade the scent by one turn, then leave fresh scent at x, y.
+        Scent only spreads over walkable tiles, so it follows the
+        way the player went instead of going through walls.
+        """
+        padded = np.pad(self.scent, 1)
+        strongest = np.zeros_like(self.scent)
+        for dx, dy in NEIGHBORS:
+            np.maximum(
+                strongest,
+                padded[1 + dx:1 + dx + self.width, 1 + dy:1 + dy + self.height],
+                out=strongest,
+            )
+
+        scent = np.maximum(self.scent, strongest * scent_spread) * scent_decay
+        scent[~self.tiles["walkable"] | (scent < scent_minimum)] = 0
+        scent[x, y] = 1
+        self.scent = scent
+
+    def scent_step(self, x: int, y: int) -> Optional[Tuple[int, int]]:
+        """
+        Return the direction of the free tile next to x, y with the strongest scent,
+        or None if no free tile smells stronger than x, y does.
+        """
+        best = None
+        strongest = self.scent[x, y]
+        cost = self.movement_cost
+        for dx, dy in NEIGHBORS:
+            if (
+                self.in_bounds(x + dx, y + dy)
+                and cost[x + dx, y + dy] == 1
+                and self.scent[x + dx, y + dy] > strongest
+            ):
+                best, strongest = (dx, dy), self.scent[x + dx, y + dy]
+        return best
+
+    def item_pile_at(self, x: int, y: int, kind: Optional[Kind] = None) -> Optional[Item]:
+        """
+        Return the pile of stackable items of this kind lying at x, y,
+        or without a kind any item or pile there. Returns None if there's none.
+        """
+        if kind is not None:
+            return self.entities.piles.get((x, y, kind))
+        items = self.entities.items_at.get((x, y))
+        return items[0] if items else None
+
+    def add_item(self, item: Item, x: int, y: int) -> Item:
+        """
+        Put an item on the ground at x, y, onto the pile of its kind if there is one.
+        Returns the item or the pile it was added to.
+        """
+        pile = self.item_pile_at(x, y, item.kind) if item.stackable else None
+        if pile is not None and pile is not item:
+            pile.count += item.count
+            return pile
+        item.place(x, y, self)
+        return item
+
+    def add_corpse(self, actor: Actor) -> None:
+        """
+        Leave a dead actor's corpse on its tile and take the actor off the map.
+        A corpse is just an entry in the corpse layer, so a floor full of them
+        costs nothing to scan and the dead actors' components can be freed.
+        A newer corpse covers an older one on the same tile.
+        """
+        for index, kind in enumerate(self.corpse_kinds):
+            if (kind.char, kind.color, kind.name) == (actor.char, actor.color, actor.name):
+                break
+        else:
+            index = len(self.corpse_kinds)
+            self.corpse_kinds.append(actor.kind)
+        self.corpses[actor.x, actor.y] = index
+        self.entities.discard(actor)
+
+    def corpse_at(self, x: int, y: int) -> Optional[Kind]:
+        """Return the kind of the corpse lying at x, y, or None"""
+        index = self.corpses[x, y]
+        return self.corpse_kinds[index] if index >= 0 else None
+
+    def make_noise(self, x: int, y: int, radius: int) -> None:
+        """Let the AI of every actor within radius tiles hear a noise, waking it up"""
+        for actor in self.actors_within(x, y, radius):
+            actor.ai.hear(x, y)  # type: ignore
 
     def get_blocking_entity_at_location(
         self, location_x: int, location_y: int
     ) -> Optional[Entity]:
-        for entity in self.entities:
-            if (
-                entity.blocks_movement
-                and entity.x == location_x
-                and entity.y == location_y
-            ):
-                return entity
-        return None
+        blockers = self.entities.blockers_at.get((location_x, location_y))
+        return blockers[0] if blockers else None
 
     def in_bounds(self, x: int, y: int) -> bool:
         """return true if x and y are inside the bounds of this map"""
@@ -83,21 +608,28 @@ class GameMap:
             default=tile_types.SHROUD,
         )
 
-        entities_sorted_for_rendering = sorted(
-            self.entities, key=lambda x: x.render_order.value
-        )
+        # corpses in the fov, under every entity
+        corpse_tiles = self.visible & (self.corpses >= 0)
+        if corpse_tiles.any():
+            kinds = self.corpses[corpse_tiles]
+            glyphs = np.array([ord(kind.char) for kind in self.corpse_kinds])
+            colors = np.array([kind.color for kind in self.corpse_kinds], dtype=np.uint8)
+            on_map = console.rgb[0:self.width, 0:self.height]
+            on_map["ch"][corpse_tiles] = glyphs[kinds]
+            on_map["fg"][corpse_tiles] = colors[kinds]
+
+        # only print entities that are in the fov, lowest render order first
+        store = self.entity_store
+        in_fov = np.flatnonzero(self.visible[store.x, store.y])
+        in_fov = in_fov[np.argsort(store.render_order[in_fov], kind="stable")]
 
-        for entity in entities_sorted_for_rendering:
-            # only print entities taht are in the fov
-            if self.visible[entity.x, entity.y]:
-                console.print(x=entity.x, y=entity.y,
-                              string=entity.char, fg=entity.color)
+        for entity in store.select(in_fov):
+            console.print(x=entity.x, y=entity.y,
+                          string=entity.char, fg=entity.color)
 
     def get_actor_at_location(self, x: int, y: int) -> Optional[Actor]:
-        for actor in self.actors:
-            if actor.x == x and actor.y == y:
-                return actor
-        return None
+        actors = self.entities.actors_at.get((x, y))
+        return actors[0] if actors else None
 
 
 class GameWorld:
@@ -115,7 +647,10 @@ class GameWorld:
         max_rooms: int,
         room_min_size: int,
         room_max_size: int,
-        current_floor: int = 0
+        current_floor: int = 0,
+        generator: str = "rooms",
+        seed: Optional[int] = None,
+        floor_cache: Optional[FloorCache] = None,
     ):
         self.engine = engine
 
@@ -129,10 +664,56 @@ class GameWorld:
 
         self.current_floor = current_floor
 
+        # name of the room layout algorithm in procgen.room_generators
+        self.generator = generator
+
+        # every random stream in the world is derived from this seed
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.seed = seed
+
+        self.combat_rng = self.rng("combat")
+
+        # generated floors are loaded from here when possible
+        self.floor_cache = floor_cache
+
+    def stream_seed(self, stream: str, floor: Optional[int] = None) -> str:
+        """
+        Return the seed for a named random stream, optionally for a single floor.
+        Each stream is independent, so drawing more numbers from one of them
+        never changes what another produces.
+        """
+        return f"{self.seed}:{stream}:{floor}"
+
+    def rng(self, stream: str, floor: Optional[int] = None) -> random.Random:
+        """Return a new random generator for a named stream"""
+        return random.Random(self.stream_seed(stream, floor))
+
+    def floor_cache_key(self) -> str:
+        """Return the floor cache key of the current floor"""
+        assert self.floor_cache is not None
+        return self.floor_cache.key(
+            seed=self.seed,
+            floor=self.current_floor,
+            generator=self.generator,
+            max_rooms=self.max_rooms,
+            room_min_size=self.room_min_size,
+            room_max_size=self.room_max_size,
+            map_width=self.map_width,
+            map_height=self.map_height,
+        )
+
     def generate_floor(self) -> None:
         from procgen import generate_dungeon
         self.current_floor += 1
 
+        if self.floor_cache is not None:
+            cached_map = self.floor_cache.load(
+                self.floor_cache_key(), self.engine)
+            if cached_map is not None:
+                self.engine.game_map = cached_map
+                return
+
         self.engine.game_map = generate_dungeon(
             max_rooms=self.max_rooms,
             room_min_size=self.room_min_size,
@@ -140,4 +721,10 @@ class GameWorld:
             map_width=self.map_width,
             map_height=self.map_height,
             engine=self.engine,
+            generator=self.generator,
+            layout_seed=self.stream_seed("generation", self.current_floor),
+            spawn_rng=self.rng("spawning", self.current_floor),
         )
+
+        if self.floor_cache is not None:
+            self.floor_cache.store(self.floor_cache_key(), self.engine.game_map)
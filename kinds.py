@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Generic, Optional, Type, TypeVar, overload
+
+T = TypeVar("T")
+
+
+class Kind:
+    """
+    Read-only data shared by every entity or component spawned from the same
+    prototype, like its name, glyph and base stats.
+    Copying a kind returns the same kind, so the clones made by Entity.spawn
+    keep sharing their prototype's one, and a save pickles it once.
+    Kinds are equal when their fields are, so a kind loaded from a save still
+    matches the prototype's one, like when stacking items.
+    """
+
+    def __init__(self, **fields: Any):
+        self.__dict__.update(fields)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"kinds are read-only, use replace() to change {name}")
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Kind):
+            return NotImplemented
+        return self is other or self.__dict__ == other.__dict__
+
+    def __hash__(self) -> int:
+        return hash(tuple(sorted(self.__dict__.items())))
+
+    def __copy__(self) -> Kind:
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Kind:
+        return self
+
+    def replace(self, **changes: Any) -> Kind:
+        """Return a new kind with the same fields as this one, apart from `changes`"""
+        return Kind(**{**self.__dict__, **changes})
+
+
+class SharedAttribute(Generic[T]):
+    """
+    An attribute which is read from the owner's `kind`.
+    Setting it gives just that owner a changed kind of its own,
+    the prototype and the other clones keep the shared one.
+    """
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    @overload
+    def __get__(self, instance: None, owner: Optional[Type[Any]] = None) -> SharedAttribute[T]:
+        ...
+
+    @overload
+    def __get__(self, instance: Any, owner: Optional[Type[Any]] = None) -> T:
+        ...
+
+    def __get__(self, instance: Any, owner: Optional[Type[Any]] = None) -> Any:
+        if instance is None:
+            return self
+        return getattr(instance.kind, self.name)
+
+    def __set__(self, instance: Any, value: T) -> None:
+        instance.kind = instance.kind.replace(**{self.name: value})
@@ -0,0 +1,246 @@
+"""
+Decide the enemy turns across a pool of worker processes, for floors with
+thousands of monsters.
+
+The workers see the map through shared memory, so only the monster positions
+are sent to them each turn. They send back a proposed action for each monster,
+and the main process applies the proposals one at a time in a fixed order,
+checking each against the map as it is by then. Two monsters stepping onto the
+same tile, or a step onto a tile another monster just took, leave the later
+monster waiting, so the outcome never depends on which worker finished first.
+
+Only HostileEnemy decisions are made by the workers, every other AI still
+performs in the main process. The workers don't keep the enemies' cached paths
+or claim flank tiles on the blackboard, they search for a step towards the
+player every turn instead.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+import tcod
+
+from actions import MeleeAction, MovementAction
+from components.ai import HostileEnemy, path_heuristics, path_search_margin
+import exceptions
+from game_map import NEIGHBORS
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from entity import Actor
+    from game_map import GameMap
+
+# a proposal is (index into the batch, kind, dx, dy), kind being one of these
+MELEE, MOVE, WAIT = "melee", "move", "wait"
+
+# the arrays shared with the workers, and their dtypes
+SHARED_ARRAYS = {"cost": np.int16, "scent": np.float32, "visible": np.bool_}
+
+# shared memory blocks this worker has attached to, by name
+_attached: Dict[str, Tuple[shared_memory.SharedMemory, np.ndarray]] = {}
+
+
+def _shared_array(name: str, shape: Tuple[int, int], dtype: Any) -> np.ndarray:
+    """Return a worker's view of a shared array, attaching to it the first time"""
+    if name not in _attached:
+        block = shared_memory.SharedMemory(name=name)
+        _attached[name] = block, np.ndarray(shape, dtype=dtype, buffer=block.buf, order="F")
+    return _attached[name][1]
+
+
+def _detach_stale(names: Sequence[str]) -> None:
+    """Close the shared memory of maps the worker is done with"""
+    for name in list(_attached):
+        if name not in names:
+            block, _ = _attached.pop(name)
+            block.close()
+
+
+def first_step(
+    cost: np.ndarray, x: int, y: int, dest_x: int, dest_y: int
+) -> Optional[Tuple[int, int]]:
+    """
+    Return the first step of a path to the destination, searching the same window
+    as BaseAI.get_path_to, or None if there's no path inside that window
+    """
+    width, height = cost.shape
+    x1 = max(0, min(x, dest_x) - path_search_margin)
+    y1 = max(0, min(y, dest_y) - path_search_margin)
+    x2 = min(width, max(x, dest_x) + path_search_margin + 1)
+    y2 = min(height, max(y, dest_y) + path_search_margin + 1)
+
+    graph = tcod.path.SimpleGraph(cost=cost[x1:x2, y1:y2], cardinal=2, diagonal=3)
+    graph.set_heuristic(**path_heuristics["octile"])
+    pathfinder = tcod.path.Pathfinder(graph)
+    pathfinder.add_root((x - x1, y - y1))
+    path = pathfinder.path_to((dest_x - x1, dest_y - y1))
+    if len(path) < 2:
+        return None
+    return int(path[1][0]) + x1 - x, int(path[1][1]) + y1 - y
+
+
+def propose(
+    cost: np.ndarray,
+    scent: np.ndarray,
+    visible: np.ndarray,
+    player_xy: Tuple[int, int],
+    x: int,
+    y: int,
+) -> Tuple[str, int, int]:
+    """
+    Decide what a HostileEnemy at x, y does, from the map arrays alone.
+    It attacks the player when next to them, heads for them when it can see them,
+    and otherwise follows the scent.
+    """
+    player_x, player_y = player_xy
+    dx, dy = player_x - x, player_y - y
+
+    if visible[x, y]:
+        if max(abs(dx), abs(dy)) <= 1:
+            return MELEE, dx, dy
+        step = first_step(cost, x, y, player_x, player_y)
+        if step:
+            return (MOVE, *step)
+
+    best = None
+    strongest = scent[x, y]
+    for step_x, step_y in NEIGHBORS:
+        to_x, to_y = x + step_x, y + step_y
+        if (
+            0 <= to_x < cost.shape[0]
+            and 0 <= to_y < cost.shape[1]
+            and cost[to_x, to_y] == 1
+            and scent[to_x, to_y] > strongest
+        ):
+            best, strongest = (step_x, step_y), scent[to_x, to_y]
+    if best:
+        return (MOVE, *best)
+    return WAIT, 0, 0
+
+
+def propose_batch(task: Tuple[Any, ...]) -> List[Tuple[int, str, int, int]]:
+    """Run `propose` in a worker for a batch of (index, x, y) positions"""
+    arrays, shape, player_xy, batch = task
+    _detach_stale([name for name, _ in arrays.values()])
+    cost, scent, visible = (
+        _shared_array(name, shape, dtype) for name, dtype in arrays.values()
+    )
+    return [
+        (index, *propose(cost, scent, visible, player_xy, x, y))
+        for index, x, y in batch
+    ]
+
+
+class ProcessPoolAI:
+    """
+    Takes the enemy turns with the HostileEnemy decisions spread over a process pool.
+    Set it as `Engine.ai_pool` to use it, and close it when done.
+    """
+
+    def __init__(self, workers: Optional[int] = None, batches_per_worker: int = 4):
+        self.workers = workers or multiprocessing.cpu_count()
+        self.batches_per_worker = batches_per_worker
+        if os.name == "posix":
+            # the workers have to share this process's resource tracker, otherwise
+            # their own trackers would unlink the shared memory when they exit.
+            # other systems have no tracker, their shared memory lives as long as
+            # a process has it open
+            resource_tracker.ensure_running()
+        self.pool = multiprocessing.Pool(self.workers)
+        self.blocks: Dict[str, shared_memory.SharedMemory] = {}
+        self.shape: Optional[Tuple[int, int]] = None
+
+    def share(self, game_map: GameMap) -> Dict[str, np.ndarray]:
+        """Copy this turn's map arrays into shared memory, sized for the map"""
+        shape = game_map.width, game_map.height
+        if shape != self.shape:
+            self.release()
+            for key, dtype in SHARED_ARRAYS.items():
+                size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+                self.blocks[key] = shared_memory.SharedMemory(create=True, size=size)
+            self.shape = shape
+
+        arrays = {
+            key: np.ndarray(shape, dtype=dtype, buffer=self.blocks[key].buf, order="F")
+            for key, dtype in SHARED_ARRAYS.items()
+        }
+        arrays["cost"][...] = game_map.movement_cost
+        arrays["scent"][...] = game_map.scent
+        arrays["visible"][...] = game_map.visible
+        return arrays
+
+    def take_turns(self, engine: Engine, enemies: List[Actor]) -> None:
+        """
+        Let the enemies take their turns, in a fixed order.
+        HostileEnemy decisions are made by the pool, everything else performs here.
+        """
+        # sorting by position makes the order, and so the outcome, reproducible
+        enemies = sorted(enemies, key=lambda actor: (actor.y, actor.x))
+        proposals = self.collect_proposals(
+            engine, [actor for actor in enemies if type(actor.ai) is HostileEnemy])
+
+        for actor in enemies:
+            if not actor.ai or not actor.is_alive:
+                continue  # killed earlier this turn
+            proposal = proposals.get(id(actor))
+            try:
+                if proposal is None:
+                    actor.ai.perform()
+                    continue
+                kind, dx, dy = proposal
+                if kind == MELEE:
+                    actor.ai.perform_or_wait(MeleeAction(actor, dx, dy))
+                elif kind == MOVE:
+                    actor.ai.perform_or_wait(MovementAction(actor, dx, dy))
+            except exceptions.Impossible:
+                pass  # ignore impossible action exceptions from ai
+
+    def collect_proposals(
+        self, engine: Engine, hostile: List[Actor]
+    ) -> Dict[int, Tuple[str, int, int]]:
+        """
+        Have the pool decide what the hostile enemies do this turn.
+        Returns a proposal for each enemy, by the id of the enemy.
+        """
+        proposals: Dict[int, Tuple[str, int, int]] = {}
+        if not hostile:
+            return proposals
+
+        self.share(engine.game_map)
+        arrays = {key: (block.name, SHARED_ARRAYS[key])
+                  for key, block in self.blocks.items()}
+        positions = [(i, actor.x, actor.y) for i, actor in enumerate(hostile)]
+        batch_size = -(-len(positions) // (self.workers * self.batches_per_worker))
+        tasks = [
+            (arrays, self.shape, (engine.player.x, engine.player.y),
+             positions[start:start + batch_size])
+            for start in range(0, len(positions), batch_size)
+        ]
+        for batch in self.pool.map(propose_batch, tasks):
+            for index, kind, dx, dy in batch:
+                proposals[id(hostile[index])] = kind, dx, dy
+        return proposals
+
+    def release(self) -> None:
+        """Free the shared memory"""
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+        self.blocks = {}
+        self.shape = None
+
+    def close(self) -> None:
+        """Stop the workers and free the shared memory"""
+        self.pool.close()
+        self.pool.join()
+        self.release()
+
+    def __enter__(self) -> ProcessPoolAI:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -1,7 +1,8 @@
 from __future__ import annotations
-from typing import Tuple, Iterator, List, TYPE_CHECKING, Dict
+from typing import Callable, Tuple, Iterator, List, Optional, TYPE_CHECKING, Dict, Set
 import random
 
+import numpy as np  # type: ignore
 import tcod
 
 import entity_factories
@@ -30,6 +31,14 @@ item_chances: Dict[int, List[Tuple[Entity, int]]] = {
     6: [(entity_factories.fireball_scroll, 25), (entity_factories.chain_mail, 15)],
 }
 
+# the stairs are placed this far along the walking distances from the player's start
+stairs_distance_percentile = 90
+
+# saved with each map's layout, so a save which only keeps the tiles that changed
+# is never applied to a different layout. bump it whenever a change to procgen
+# or tile_types makes the same seed dig different tiles
+LAYOUT_VERSION = 1
+
 enemy_chances: Dict[int, List[Tuple[Entity, int]]] = {
     0: [(entity_factories.orc, 80)],
     3: [(entity_factories.troll, 15)],
@@ -56,6 +65,7 @@ def get_entities_at_random(
     weighted_chances_by_floor: Dict[int, List[Tuple[Entity, int]]],
     number_of_entities: int,
     floor: int,
+    rng: random.Random,
 ) -> List[Entity]:
     entity_weighted_chances = {}
 
@@ -71,7 +81,7 @@ def get_entities_at_random(
     entities = list(entity_weighted_chances.keys())
     entity_weighted_chance_values = list(entity_weighted_chances.values())
 
-    chosen_entities = random.choices(
+    chosen_entities = rng.choices(
         entities, weights=entity_weighted_chance_values, k=number_of_entities
     )
 
@@ -111,37 +121,40 @@ def place_entities(
     room: RectangularRoom,
     dungeon: GameMap,
     floor_number: int,
+    rng: random.Random,
 ) -> None:
-    number_of_monsters = random.randint(
+    number_of_monsters = rng.randint(
         0, get_max_value_for_floor(max_monsters_by_floor, floor_number)
     )
-    number_of_items = random.randint(
+    number_of_items = rng.randint(
         0, get_max_value_for_floor(max_items_by_floor, floor_number)
     )
 
     monsters: List[Entity] = get_entities_at_random(
-        enemy_chances, number_of_monsters, floor_number
+        enemy_chances, number_of_monsters, floor_number, rng
     )
 
     items: List[Entity] = get_entities_at_random(
-        item_chances, number_of_items, floor_number
+        item_chances, number_of_items, floor_number, rng
     )
 
     for entity in monsters + items:
-        x = random.randint(room.x1 + 1, room.x2 - 1)
-        y = random.randint(room.y1 + 1, room.y2 - 1)
+        x = rng.randint(room.x1 + 1, room.x2 - 1)
+        y = rng.randint(room.y1 + 1, room.y2 - 1)
 
+        if not dungeon.tiles["walkable"][x, y]:
+            continue  # the room was walled in as unreachable
         if not any(entity.x == x and entity.y == y for entity in dungeon.entities):
             entity.spawn(dungeon, x, y)
 
 
-def tunnel_between(
-    start: Tuple[int, int], end: Tuple[int, int]
-) -> Iterator[Tuple[int, int]]:
-    """Return an L-shaped tunnel between these two points"""
+def tunnel_indices(
+    start: Tuple[int, int], end: Tuple[int, int], rng: random.Random
+) -> np.ndarray:
+    """Return the coordinates of an L-shaped tunnel as an (N, 2) array"""
     x1, y1 = start
     x2, y2 = end
-    if random.random() < 0.5:  # 50% chance
+    if rng.random() < 0.5:  # 50% chance
         # move horizontally, then vertically
         corner_x, corner_y = x2, y1
     else:
@@ -149,33 +162,47 @@ def tunnel_between(
         corner_x, corner_y = x1, y2
 
     # gnerate the coordinaes for this tunnel
-    for x, y in tcod.los.bresenham((x1, y1), (corner_x, corner_y)).tolist():
-        yield x, y
-    for x, y in tcod.los.bresenham((corner_x, corner_y), (x2, y2)).tolist():
-        yield x, y
+    return np.concatenate(
+        (
+            tcod.los.bresenham((x1, y1), (corner_x, corner_y)),
+            tcod.los.bresenham((corner_x, corner_y), (x2, y2)),
+        )
+    )
 
 
-def generate_dungeon(
-        max_rooms: int,
-        room_min_size: int,
-        room_max_size: int,
-        map_width: int,
-        map_height: int,
-        engine: Engine,) -> GameMap:
-    """Generate a new dungeon map"""
-    player = engine.player
-    dungeon = GameMap(engine, map_width, map_height, entities=[player])
+def tunnel_between(
+    start: Tuple[int, int],
+    end: Tuple[int, int],
+    rng: Optional[random.Random] = None,
+) -> Iterator[Tuple[int, int]]:
+    """Return an L-shaped tunnel between these two points"""
+    if rng is None:
+        rng = random.Random()
+    for x, y in tunnel_indices(start, end, rng).tolist():
+        yield x, y
 
-    rooms: List[RectangularRoom] = []
 
-    center_of_last_room = (0, 0)
+def random_rooms(
+    max_rooms: int,
+    room_min_size: int,
+    room_max_size: int,
+    map_width: int,
+    map_height: int,
+    rng: random.Random,
+) -> List[RectangularRoom]:
+    """
+    Try to place `max_rooms` rooms at random positions.
+    Any room which overlaps an earlier one is thrown away, so the number
+    of rooms returned varies between calls.
+    """
+    rooms: List[RectangularRoom] = []
 
     for r in range(max_rooms):
-        room_width = random.randint(room_min_size, room_max_size)
-        room_height = random.randint(room_min_size, room_max_size)
+        room_width = rng.randint(room_min_size, room_max_size)
+        room_height = rng.randint(room_min_size, room_max_size)
 
-        x = random.randint(0, dungeon.width - room_width - 1)
-        y = random.randint(0, dungeon.height - room_height - 1)
+        x = rng.randint(0, map_width - room_width - 1)
+        y = rng.randint(0, map_height - room_height - 1)
 
         # "RectangularRoom" class makes rectangles easier to work with
         new_room = RectangularRoom(x, y, room_width, room_height)
@@ -184,28 +211,265 @@ def generate_dungeon(
         if any(new_room.intersects(other_room) for other_room in rooms):
             continue  # this room intersects, so go to the next attempt
         # if there are no intersections then the room is valid
+        rooms.append(new_room)
 
-        # Dig out the rooms inner area
-        dungeon.tiles[new_room.inner] = tile_types.floor
+    return rooms
+
+
+def bsp_rooms(
+    max_rooms: int,
+    room_min_size: int,
+    room_max_size: int,
+    map_width: int,
+    map_height: int,
+    rng: random.Random,
+) -> List[RectangularRoom]:
+    """
+    Split the map into `max_rooms` partitions and place one room in each.
+    The largest partition is split until there are enough of them, so every
+    room fits on the first try and the room count only falls short when the
+    map has no space left for another room.
+    Rooms are returned in the order of the partition tree, so neighbours in
+    the list are also neighbours on the map.
+    """
+    # a partition needs space for a room plus the wall between it and the next one
+    min_leaf_size = room_min_size + 1
+
+    root = tcod.bsp.BSP(x=0, y=0, width=map_width, height=map_height)
+    leaves = [root]
+
+    while len(leaves) < max_rooms:
+        splittable = [
+            leaf
+            for leaf in leaves
+            if max(leaf.width, leaf.height) >= min_leaf_size * 2
+        ]
+        if not splittable:
+            break  # the map is full
+
+        leaf = max(splittable, key=lambda node: node.width * node.height)
+        # split across the longer side, unless it is too short to split
+        if leaf.height >= min_leaf_size * 2 and (
+            leaf.height > leaf.width or leaf.width < min_leaf_size * 2
+        ):
+            horizontal = True
+            position = rng.randint(
+                leaf.y + min_leaf_size, leaf.y + leaf.height - min_leaf_size
+            )
+        else:
+            horizontal = False
+            position = rng.randint(
+                leaf.x + min_leaf_size, leaf.x + leaf.width - min_leaf_size
+            )
+        leaf.split_once(horizontal, position)
+        leaves.remove(leaf)
+        leaves.extend(leaf.children)
 
-        if len(rooms) == 0:
-            # the first room, where the player starts
-            player.place(*new_room.center, dungeon)
-        else:  # all rooms after the first
-            # dig out a tunnel between this room and the previous one
-            for x, y, in tunnel_between(rooms[-1].center, new_room.center):
-                dungeon.tiles[x, y] = tile_types.floor
+    rooms: List[RectangularRoom] = []
 
-            center_of_last_room = new_room.center
+    for node in root.in_order():
+        if node.children:
+            continue
+        # keep the room one tile away from the far edge of the partition
+        # so that it never shares a wall with the room next to it
+        if min(node.width, node.height) < min_leaf_size:
+            continue  # too small for a room, only possible on tiny maps
+        room_width = rng.randint(
+            room_min_size, min(room_max_size, node.width - 1))
+        room_height = rng.randint(
+            room_min_size, min(room_max_size, node.height - 1))
 
-        place_entities(new_room, dungeon, engine.game_world.current_floor)
+        x = rng.randint(node.x, node.x + node.width - room_width - 1)
+        y = rng.randint(node.y, node.y + node.height - room_height - 1)
 
-        # note: this gets set for every room, but if another room comes along
-        # the tunnel between will override the tile type
-        dungeon.tiles[center_of_last_room] = tile_types.down_stairs
-        dungeon.downstairs_location = center_of_last_room
+        rooms.append(RectangularRoom(x, y, room_width, room_height))
 
-        # finally, append the new room to the list
-        rooms.append(new_room)
+    return rooms
+
+
+room_generators: Dict[str, Callable[..., List[RectangularRoom]]] = {
+    "rooms": random_rooms,
+    "bsp": bsp_rooms,
+}
+
+
+def carve_rooms(
+    dungeon: GameMap, rooms: List[RectangularRoom], rng: random.Random
+) -> None:
+    """
+    Dig out every room, and a tunnel between each room and the one before it.
+    The floor is collected into a mask first so the tiles are written once.
+    Every pair of rooms a tunnel runs straight between is added to `room_links`.
+    """
+    floor = np.zeros((dungeon.width, dungeon.height), dtype=bool, order="F")
+    room_index = np.full((dungeon.width, dungeon.height), -1, dtype=np.int16, order="F")
+
+    for i, room in enumerate(rooms):
+        floor[room.inner] = True
+        room_index[room.inner] = i
+
+    links: Set[Tuple[int, int]] = set()
+    if len(rooms) > 1:
+        tunnels = [
+            tunnel_indices(previous.center, room.center, rng)
+            for previous, room in zip(rooms, rooms[1:])
+        ]
+        for tunnel in tunnels:
+            # the rooms this tunnel passes through, in order
+            passed = room_index[tunnel[:, 0], tunnel[:, 1]]
+            passed = passed[passed >= 0]
+            passed = passed[np.insert(passed[1:] != passed[:-1], 0, True)]
+            links.update(
+                (min(a, b), max(a, b)) for a, b in zip(passed.tolist(), passed[1:].tolist())
+            )
+
+        tunnel_tiles = np.concatenate(tunnels)
+        floor[tunnel_tiles[:, 0], tunnel_tiles[:, 1]] = True
+
+    dungeon.tiles[floor] = tile_types.floor
+    dungeon.room_links = sorted(links)
+
+
+def compute_start_distance(dungeon: GameMap, start: Tuple[int, int]) -> np.ndarray:
+    """
+    Return the walking distance of every tile from `start`, in a single dijkstra pass.
+    Steps cost 2 cardinally and 3 diagonally, the same as BaseAI.get_path_to.
+    Tiles which can't be reached are left at the maximum value of the array.
+    """
+    distance = tcod.path.maxarray(
+        (dungeon.width, dungeon.height), dtype=np.int32, order="F")
+    distance[start] = 0
+    return tcod.path.dijkstra2d(
+        distance, dungeon.tiles["walkable"], cardinal=2, diagonal=3, out=distance)
+
+
+def remove_unreachable(dungeon: GameMap, distance: np.ndarray) -> None:
+    """
+    Fill in every walkable tile which has no path from the start,
+    along with anything that was spawned there.
+    """
+    unreachable = dungeon.tiles["walkable"] & (
+        distance == np.iinfo(distance.dtype).max)
+    if not unreachable.any():
+        return
+
+    dungeon.tiles[unreachable] = tile_types.wall
+    for entity in list(dungeon.entities):
+        if unreachable[entity.x, entity.y]:
+            dungeon.entities.remove(entity)
+
+
+def place_stairs(
+    dungeon: GameMap,
+    distance: np.ndarray,
+    start: Tuple[int, int],
+    percentile: float,
+    rng: random.Random,
+) -> None:
+    """
+    Put the down stairs on a tile at the given percentile of walking distance
+    from the start, so 100 is as far away as possible.
+    """
+    candidates = dungeon.tiles["walkable"] & (
+        distance != np.iinfo(distance.dtype).max)
+    candidates[start] = False  # never start the player on the stairs
+    if not candidates.any():
+        return
+
+    distances = np.sort(distance[candidates])
+    index = min(len(distances) - 1, int(len(distances) * percentile / 100))
+    xs, ys = np.nonzero(candidates & (distance == distances[index]))
+
+    choice = rng.randrange(len(xs))
+    dungeon.downstairs_location = int(xs[choice]), int(ys[choice])
+    dungeon.tiles[dungeon.downstairs_location] = tile_types.down_stairs
+
+
+def generate_layout(
+    dungeon: GameMap,
+    generator: str,
+    max_rooms: int,
+    room_min_size: int,
+    room_max_size: int,
+    stairs_percentile: float,
+    rng: random.Random,
+) -> None:
+    """
+    Dig the rooms, tunnels and stairs of a dungeon which is still all walls.
+    Only `rng` is used, so the same seed always digs the same layout.
+    """
+    rooms = room_generators[generator](
+        max_rooms, room_min_size, room_max_size, dungeon.width, dungeon.height, rng
+    )
+    dungeon.rooms = rooms
+
+    carve_rooms(dungeon, rooms, rng)
+
+    if rooms:
+        start = rooms[0].center
+        # one pass over the finished floor checks that everything can be
+        # reached and is kept around for anything else that needs distances
+        distance = compute_start_distance(dungeon, start)
+        remove_unreachable(dungeon, distance)
+        place_stairs(dungeon, distance, start, stairs_percentile, rng)
+        dungeon.start_distance = distance
+
+
+def generate_dungeon(
+        max_rooms: int,
+        room_min_size: int,
+        room_max_size: int,
+        map_width: int,
+        map_height: int,
+        engine: Engine,
+        generator: str = "rooms",
+        stairs_percentile: float = stairs_distance_percentile,
+        layout_seed: Optional[str] = None,
+        spawn_rng: Optional[random.Random] = None,) -> GameMap:
+    """
+    Generate a new dungeon map
+    `generator` picks the room layout algorithm from `room_generators`
+    `stairs_percentile` is how far from the start the stairs are, see `place_stairs`
+    `layout_seed` seeds the layout, and is kept on the map along with LAYOUT_VERSION,
+    so saves can rebuild the tiles instead of storing them
+    `spawn_rng` is used for the monsters and items
+    """
+    player = engine.player
+    dungeon = GameMap(engine, map_width, map_height, entities=[player])
+
+    layout = {
+        "generator": generator,
+        "max_rooms": max_rooms,
+        "room_min_size": room_min_size,
+        "room_max_size": room_max_size,
+        "stairs_percentile": stairs_percentile,
+    }
+    generate_layout(dungeon, rng=random.Random(layout_seed), **layout)
+    if layout_seed is not None:
+        dungeon.layout = dict(layout, seed=layout_seed, version=LAYOUT_VERSION)
+
+    if spawn_rng is None:
+        spawn_rng = random.Random()
+
+    for i, room in enumerate(dungeon.rooms):
+        if i == 0:
+            # the first room, where the player starts
+            player.place(*room.center, dungeon)
+
+        place_entities(
+            room, dungeon, engine.game_world.current_floor, spawn_rng)
 
     return dungeon
+
+
+def rebuild_tiles(dungeon: GameMap) -> None:
+    """
+    Dig the layout of `dungeon` again from the seed it was generated with.
+    The tiles, rooms, stairs and distance map are replaced.
+    """
+    layout = dict(dungeon.layout)
+    seed = layout.pop("seed")
+    layout.pop("version", None)
+    dungeon.tiles = np.full(
+        (dungeon.width, dungeon.height), fill_value=tile_types.wall, order="F")
+    generate_layout(dungeon, rng=random.Random(seed), **layout)
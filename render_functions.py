@@ -16,11 +16,12 @@ def get_names_at_location(x: int, y: int, game_map: GameMap) -> str:
     if not game_map.in_bounds(x, y) or not game_map.visible[x, y]:
         return ""
 
-    names = ", ".join(
-        entity.name for entity in game_map.entities if entity.x == x and entity.y == y
-    )
+    names = [entity.name for entity in game_map.entities if entity.x == x and entity.y == y]
+    corpse = game_map.corpse_at(x, y)
+    if corpse:
+        names.append(corpse.name)
 
-    return names.capitalize()
+    return ", ".join(names).capitalize()
 
 
 def render_bar(
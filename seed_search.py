@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+"""
+Generate a dungeon floor for many seeds and write layout metrics for each one.
+
+Runs across a process pool without opening a tcod window, and streams one row per
+seed to a .csv or .jsonl file as soon as it is ready.
+Run `python seed_search.py --help` to see the options.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import multiprocessing
+import sys
+from typing import Any, Dict, Iterable, List, Optional, TextIO
+
+import numpy as np  # type: ignore
+
+import benchmark
+from entity import Actor
+from game_map import GameMap
+import procgen
+
+FIELDS = [
+    "seed",
+    "floor",
+    "rooms",
+    "floor_coverage",
+    "corridor_length",
+    "stairs_distance",
+    "monsters",
+    "items",
+    "monsters_per_room",
+]
+
+
+def layout_metrics(game_map: GameMap) -> Dict[str, Any]:
+    """Return the layout metrics of a generated floor"""
+    walkable = game_map.tiles["walkable"]
+
+    in_room = np.zeros(walkable.shape, dtype=bool)
+    for room in game_map.rooms:
+        in_room[room.inner] = True
+
+    monsters = sum(
+        1 for entity in game_map.entities
+        if isinstance(entity, Actor) and entity is not game_map.engine.player
+    )
+    items = len(game_map.entities) - monsters - 1  # everything else but the player
+
+    if game_map.start_distance is not None:
+        # walking cost from the start, 2 per cardinal step and 3 per diagonal one
+        stairs_distance = int(game_map.start_distance[game_map.downstairs_location])
+    else:
+        stairs_distance = -1
+
+    return {
+        "rooms": len(game_map.rooms),
+        "floor_coverage": float(walkable.mean()),
+        "corridor_length": int(np.count_nonzero(walkable & ~in_room)),
+        "stairs_distance": stairs_distance,
+        "monsters": monsters,
+        "items": items,
+        "monsters_per_room": monsters / max(1, len(game_map.rooms)),
+    }
+
+
+def floor_metrics(seed: int, floor: int = 1, generator: str = "rooms") -> Dict[str, Any]:
+    """Generate `floor` of the world with the given seed and return its metrics"""
+    engine = benchmark.new_headless_engine(generator, seed=seed)
+    engine.game_world.current_floor = floor - 1
+    engine.game_world.generate_floor()
+
+    metrics = layout_metrics(engine.game_map)
+    metrics["seed"] = seed
+    metrics["floor"] = floor
+    return metrics
+
+
+class _FloorMetrics:
+    """Picklable `floor_metrics` with the floor and generator filled in, for the pool"""
+
+    def __init__(self, floor: int, generator: str):
+        self.floor = floor
+        self.generator = generator
+
+    def __call__(self, seed: int) -> Dict[str, Any]:
+        return floor_metrics(seed, self.floor, self.generator)
+
+
+def write_rows(rows: Iterable[Dict[str, Any]], output: TextIO, file_format: str) -> int:
+    """Write each row as soon as it arrives, returning how many were written"""
+    count = 0
+    if file_format == "csv":
+        writer = csv.DictWriter(output, fieldnames=FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    else:
+        for row in rows:
+            output.write(json.dumps(row) + "\n")
+            count += 1
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seeds", type=int, default=1000, help="number of seeds")
+    parser.add_argument("--first-seed", type=int, default=0, help="first seed to try")
+    parser.add_argument("--floor", type=int, default=1, help="floor to generate")
+    parser.add_argument(
+        "--generator", choices=sorted(procgen.room_generators), default="rooms"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=multiprocessing.cpu_count(),
+        help="worker processes (default: one per core)",
+    )
+    parser.add_argument(
+        "--output",
+        default="-",
+        help="a .csv or .jsonl file to write to (default: jsonl to stdout)",
+    )
+    args = parser.parse_args(argv)
+
+    seeds = range(args.first_seed, args.first_seed + args.seeds)
+    metrics = _FloorMetrics(args.floor, args.generator)
+    file_format = "csv" if args.output.endswith(".csv") else "jsonl"
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    try:
+        if args.workers <= 1:
+            write_rows(map(metrics, seeds), output, file_format)
+        else:
+            with multiprocessing.Pool(args.workers) as pool:
+                # big chunks keep the per-task overhead small next to a few ms of work
+                chunksize = max(1, min(256, args.seeds // (args.workers * 8)))
+                write_rows(
+                    pool.imap_unordered(metrics, seeds, chunksize), output, file_format
+                )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,7 @@ from typing import Optional
 import tcod
 
 import color
-from engine import Engine
+from engine import Engine, game_enemy_turn_budget
 import entity_factories
 from game_map import GameWorld
 import input_handlers
@@ -31,6 +31,7 @@ def new_game() -> Engine:
     player = copy.deepcopy(entity_factories.player)
 
     engine = Engine(player=player)
+    engine.enemy_turn_budget = game_enemy_turn_budget
 
     engine.game_world = GameWorld(
         engine=engine,